@@ -0,0 +1,268 @@
+# run_benchmarks.py
+"""Benchmarks for the config, canvas and matrix hot paths
+
+Runs headless against the simulated display backend, so no driver calls
+are made. Canvas, matrix and drag benchmarks need a Tk display and are
+skipped without one.
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --filter canvas --repeat 9
+    python -m benchmarks.run_benchmarks --save-baseline
+
+Every benchmark is timed several times and its median time per call is
+compared with benchmarks/baseline.json. A benchmark that got slower than
+the baseline by more than --threshold is flagged as a regression and
+makes the run exit with status 1.
+"""
+import argparse
+import inspect
+import json
+import os
+import statistics
+import sys
+import tempfile
+import timeit
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.display_backend import SimulatedBackend
+from src.display_config import DisplayConfig
+from src.layout_validator import validate_layout
+from src.profiles import ProfileStore
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+DISPLAY_COUNTS = (2, 16, 64, 256)
+ZOOM_LEVELS = (0.02, 0.1, 0.5, 1.0)
+
+# A median this many times the baseline counts as a regression
+DEFAULT_THRESHOLD = 1.5
+
+# Each case is a name and a setup function returning the callable to time.
+# A setup that needs cleaning up is a generator yielding the callable once.
+Case = Tuple[str, Callable[[], Callable[[], None]]]
+
+
+def wall_layout(count: int) -> Dict[str, Dict]:
+    """Get the layout of a simulated wall of displays"""
+    config = DisplayConfig(SimulatedBackend(count=count))
+    return {name: dict(info) for name, info in config.snapshot().items()}
+
+
+def config_cases() -> Iterator[Case]:
+    for count in DISPLAY_COUNTS:
+
+        def enumerate_displays(count=count):
+            config = DisplayConfig(SimulatedBackend(count=count))
+            return config.enumerate_displays
+
+        def apply_changes(count=count):
+            config = DisplayConfig(SimulatedBackend(count=count))
+            offsets = iter(range(1, 1 << 30))
+
+            def run():
+                # Shift the whole wall so every display changes and stays valid
+                dx = next(offsets) % 2 * 10 - 5
+                config.set_positions(
+                    {
+                        name: (info["x"] + dx, info["y"])
+                        for name, info in config.snapshot().items()
+                    }
+                )
+                config.apply_changes()
+
+            return run
+
+        def move_and_snapshot(count=count):
+            config = DisplayConfig(SimulatedBackend(count=count))
+            name = list(config.displays)[-1]
+            offsets = iter(range(1, 1 << 30))
+
+            def run():
+                config.set_position(name, next(offsets), 0)
+                config.snapshot()
+
+            return run
+
+        def validate(count=count):
+            layout = wall_layout(count)
+            return lambda: validate_layout(layout)
+
+        yield f"config.enumerate_displays[{count}]", enumerate_displays
+        yield f"config.apply_changes[{count}]", apply_changes
+        yield f"config.move_and_snapshot[{count}]", move_and_snapshot
+        yield f"validator.validate_layout[{count}]", validate
+
+
+def tk_cases(root) -> Iterator[Case]:
+    from src.display_canvas import DisplayCanvas
+    from src.main import DisplayManager, DisplayMatrixEditor
+
+    for count in DISPLAY_COUNTS:
+        layout = wall_layout(count)
+
+        for zoom in ZOOM_LEVELS:
+
+            def canvas_pan(layout=layout, zoom=zoom):
+                canvas = DisplayCanvas(root, lambda *args: None, width=800, height=600)
+                try:
+                    canvas.pack()
+                    root.update()
+                    canvas.scale = zoom
+                    canvas.update_displays(layout)
+
+                    def run():
+                        canvas.offset_x += 7
+                        canvas.redraw()
+
+                    yield run
+                finally:
+                    canvas.destroy()
+
+            yield f"canvas.redraw_pan[{count},zoom={zoom}]", canvas_pan
+
+        def matrix_update(layout=layout):
+            editor = DisplayMatrixEditor(root)
+            try:
+                name = list(layout)[-1]
+                moved = dict(layout)
+                moved[name] = dict(layout[name], x=layout[name]["x"] + 1)
+                layouts = iter(range(1 << 30))
+
+                def run():
+                    editor.update_displays(moved if next(layouts) % 2 else layout)
+
+                yield run
+            finally:
+                editor.frame.destroy()
+
+        def drag(count=count):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                manager = DisplayManager(
+                    backend=SimulatedBackend(count=count),
+                    profile_store=ProfileStore(os.path.join(temp_dir, "profiles.json")),
+                )
+                try:
+                    # Map the window, an unsized preview canvas skips drawing
+                    manager.root.update()
+                    manager.refresh_preview()
+                    name = list(manager.display_config.displays)[-1]
+                    start = manager.display_config.snapshot()[name]["x"]
+                    steps = iter(range(1 << 30))
+
+                    def run():
+                        # One drag sequence of 20 motion updates
+                        base = next(steps) % 2
+                        for i in range(20):
+                            manager.on_display_moved(name, start + base + i, 0)
+
+                    yield run
+                finally:
+                    manager.root.destroy()
+
+        yield f"matrix.update_displays[{count}]", matrix_update
+        yield f"manager.drag_sequence[{count}]", drag
+
+
+def measure(fn: Callable[[], None], repeat: int) -> Dict[str, float]:
+    """Time a callable, returning the median and best seconds per call"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {"median": statistics.median(times), "best": min(times)}
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, float],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Get the names of the benchmarks that regressed against the baseline"""
+    return [
+        name
+        for name, result in results.items()
+        if name in baseline and result["median"] > baseline[name] * threshold
+    ]
+
+
+def run(pattern: Optional[str] = None, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark whose name contains pattern"""
+    cases = list(config_cases())
+
+    root = None
+    try:
+        import tkinter as tk
+
+        root = tk.Tk()
+    except Exception as e:  # No display or no Tk at all
+        print(f"Skipping canvas, matrix and drag benchmarks: {e}", file=sys.stderr)
+    if root is not None:
+        cases += list(tk_cases(root))
+
+    results = {}
+    try:
+        for name, setup in cases:
+            if pattern and pattern not in name:
+                continue
+            fn = setup()
+            cleanup = None
+            if inspect.isgenerator(fn):
+                cleanup, fn = fn, next(fn)
+            try:
+                results[name] = measure(fn, repeat)
+            finally:
+                if cleanup is not None:
+                    cleanup.close()
+            print(f"{name:<45} {results[name]['median'] * 1e6:12.1f} us", flush=True)
+    finally:
+        if root is not None:
+            root.destroy()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="only run benchmarks containing this text")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per benchmark")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--output", help="write all results to this JSON file")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the medians as the new baseline instead of comparing",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+
+    if args.save_baseline:
+        baseline.update({name: result["median"] for name, result in results.items()})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name in regressions:
+        print(
+            f"REGRESSION {name}: {results[name]['median'] * 1e6:.1f} us, "
+            f"baseline {baseline[name] * 1e6:.1f} us"
+        )
+    missing = [name for name in results if name not in baseline]
+    if missing:
+        print(f"{len(missing)} benchmarks have no baseline yet")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
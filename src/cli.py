@@ -0,0 +1,338 @@
+# cli.py
+"""Headless command line interface
+
+Runs on DisplayConfig and the display backend only and never imports
+tkinter, so login scripts and docking hooks do not pay for GUI startup.
+Every command prints JSON to stdout.
+
+    python -m src.cli list
+    python -m src.cli set-position "\\\\.\\DISPLAY2" 1920 0
+    python -m src.cli set-orientation "\\\\.\\DISPLAY2" 90
+    python -m src.cli modes "\\\\.\\DISPLAY2"
+    python -m src.cli set-mode "\\\\.\\DISPLAY2" 2560x1440 --refresh 144
+    python -m src.cli export layout.json
+    python -m src.cli apply layout.json
+    python -m src.cli apply --profile docked
+    python -m src.cli watch --profile docked
+    python -m src.cli serve
+"""
+import argparse
+import json
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.display_backend import DISP_CHANGE_SUCCESSFUL, SimulatedBackend
+from src.display_config import DisplayConfig
+from src.layout_validator import describe_problems
+from src.hotplug import (
+    DEBOUNCE_SECONDS,
+    LATENCY_BUDGET_SECONDS,
+    HotplugWatcher,
+    ScriptedChangeSource,
+    Win32ChangeSource,
+)
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+def _report(results: Dict[str, int], problems: Optional[List[str]] = None) -> int:
+    ok = all(code == DISP_CHANGE_SUCCESSFUL for code in results.values())
+    output = {"ok": ok, "results": results}
+    if problems:
+        output["problems"] = problems
+    _print(output)
+    return EXIT_OK if ok else EXIT_FAILED
+
+
+def _commit(config: DisplayConfig) -> int:
+    results = config.commit_changes()
+    problems = None
+    if any(code != DISP_CHANGE_SUCCESSFUL for code in results.values()):
+        # A rejected layout keeps its pending changes, say what is wrong
+        problems = describe_problems(config.validate_changes())
+    return _report(results, problems)
+
+
+def _print(data) -> None:
+    json.dump(data, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+def _error(message: str) -> int:
+    _print({"ok": False, "error": message})
+    return EXIT_FAILED
+
+
+def cmd_list(config: DisplayConfig, args) -> int:
+    _print([dict(info) for info in config.snapshot().values()])
+    return EXIT_OK
+
+
+def cmd_set_position(config: DisplayConfig, args) -> int:
+    if args.device not in config.displays:
+        return _error(f"Unknown display {args.device}")
+    config.set_position(args.device, args.x, args.y)
+    return _commit(config)
+
+
+def cmd_set_orientation(config: DisplayConfig, args) -> int:
+    if args.device not in config.displays:
+        return _error(f"Unknown display {args.device}")
+    config.set_orientation(args.device, args.degrees // 90)
+    return _commit(config)
+
+
+def cmd_modes(config: DisplayConfig, args) -> int:
+    if args.device not in config.displays:
+        return _error(f"Unknown display {args.device}")
+    _print([mode._asdict() for mode in config.modes(args.device)])
+    return EXIT_OK
+
+
+def cmd_set_mode(config: DisplayConfig, args) -> int:
+    if args.device not in config.displays:
+        return _error(f"Unknown display {args.device}")
+    try:
+        config.set_mode(args.device, *args.resolution, args.refresh)
+    except ValueError as e:
+        return _error(str(e))
+    return _commit(config)
+
+
+def _resolution(value: str) -> Tuple[int, int]:
+    try:
+        width, height = value.lower().split("x")
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value}")
+
+
+def _display_count(value: str) -> int:
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number, got {value}")
+    if not 1 <= count <= SimulatedBackend.MAX_OUTPUTS:
+        raise argparse.ArgumentTypeError(
+            f"expected 1 to {SimulatedBackend.MAX_OUTPUTS} displays, got {count}"
+        )
+    return count
+
+
+def cmd_export(config: DisplayConfig, args) -> int:
+    layout = config.export_layout()
+    if args.file:
+        try:
+            with open(args.file, "w", encoding="utf-8") as f:
+                json.dump(layout, f, indent=2)
+        except OSError as e:
+            return _error(f"Cannot write {args.file}: {e}")
+        _print({"ok": True, "file": args.file})
+    else:
+        _print(layout)
+    return EXIT_OK
+
+
+def cmd_apply(config: DisplayConfig, args) -> int:
+    if args.profile:
+        from src.profiles import ProfileStore
+
+        store = ProfileStore(args.profiles_file)
+        if store.load_error:
+            return _error(store.load_error)
+        try:
+            results = store.apply_profile(args.profile, config)
+        except KeyError:
+            return _error(f"Unknown profile {args.profile}")
+        except ValueError as e:
+            return _error(str(e))
+        return _report(results)
+
+    if not args.file:
+        return _error("Give a layout file or --profile")
+    try:
+        with open(args.file, "r", encoding="utf-8") as f:
+            layout = json.load(f)
+    except (OSError, ValueError) as e:
+        return _error(f"Cannot read {args.file}: {e}")
+
+    problem = _layout_problem(layout)
+    if problem:
+        return _error(f"Invalid layout in {args.file}: {problem}")
+    unknown = sorted(set(layout) - set(config.displays))
+    if unknown:
+        return _error(f"Unknown displays: {', '.join(unknown)}")
+    config.queue_layout(layout)
+    return _commit(config)
+
+
+def _layout_problem(layout) -> Optional[str]:
+    """Get what is wrong with the shape of a layout file, if anything"""
+    if not isinstance(layout, dict):
+        return "expected an object of displays"
+    for device_name, target in layout.items():
+        if not isinstance(target, dict):
+            return f"{device_name} must be an object"
+        for key in ("x", "y", "orientation"):
+            # Exact type, JSON true and false would pass as ints
+            if key in target and type(target[key]) is not int:
+                return f"{device_name} {key} must be an integer"
+        if target.get("orientation", 0) not in range(4):
+            return f"{device_name} orientation must be 0 to 3"
+    return None
+
+
+def cmd_watch(config: DisplayConfig, args) -> int:
+    from src.profiles import ProfileStore
+
+    # A simulated wall never changes on its own, nothing will fire
+    try:
+        source = (
+            ScriptedChangeSource() if args.simulate is not None else Win32ChangeSource()
+        )
+    except Exception as e:  # The listener window could not be created
+        return _error(f"Cannot watch for display changes: {e}")
+    watcher = HotplugWatcher(
+        config,
+        ProfileStore(args.profiles_file),
+        source,
+        profile=args.profile,
+        debounce=args.debounce,
+        latency_budget=args.latency_budget,
+        on_change=lambda event: _print_line(event),
+    )
+
+    # Waiting on a lock cannot be interrupted on Windows, so the watcher
+    # runs on a thread and the main thread stays responsive to Ctrl+C
+    thread = threading.Thread(target=watcher.run, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(1.0)
+    except KeyboardInterrupt:
+        watcher.stop()
+        thread.join()
+    if not watcher.stopped:
+        _print_line({"ok": False, "error": "The watcher stopped unexpectedly"})
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def cmd_serve(config: DisplayConfig, args) -> int:
+    from src.ipc_server import IpcServer
+
+    server = IpcServer(config, args.address)
+    try:
+        server.start()
+    except RuntimeError as e:
+        return _error(str(e))
+    _print_line({"address": server.address})
+
+    # Same as watch, keep the main thread free for Ctrl+C
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(1.0)
+    except KeyboardInterrupt:
+        server.close()
+        thread.join()
+    return EXIT_OK
+
+
+def _print_line(data) -> None:
+    sys.stdout.write(json.dumps(data) + "\n")
+    sys.stdout.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="monitor-layout", description="Headless monitor layout manager"
+    )
+    parser.add_argument(
+        "--simulate",
+        type=_display_count,
+        metavar="COUNT",
+        help="use a simulated wall of COUNT displays instead of the real ones",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="print every display").set_defaults(
+        func=cmd_list
+    )
+
+    position = commands.add_parser("set-position", help="move a display")
+    position.add_argument("device")
+    position.add_argument("x", type=int)
+    position.add_argument("y", type=int)
+    position.set_defaults(func=cmd_set_position)
+
+    orientation = commands.add_parser("set-orientation", help="rotate a display")
+    orientation.add_argument("device")
+    orientation.add_argument("degrees", type=int, choices=(0, 90, 180, 270))
+    orientation.set_defaults(func=cmd_set_orientation)
+
+    modes = commands.add_parser("modes", help="print the modes a display supports")
+    modes.add_argument("device")
+    modes.set_defaults(func=cmd_modes)
+
+    mode = commands.add_parser("set-mode", help="change resolution and refresh rate")
+    mode.add_argument("device")
+    mode.add_argument("resolution", type=_resolution, help="WIDTHxHEIGHT")
+    mode.add_argument(
+        "--refresh", type=int, help="refresh rate in Hz, the highest by default"
+    )
+    mode.set_defaults(func=cmd_set_mode)
+
+    export = commands.add_parser("export", help="save the current layout")
+    export.add_argument("file", nargs="?", help="write to FILE instead of stdout")
+    export.set_defaults(func=cmd_export)
+
+    apply = commands.add_parser("apply", help="apply a layout or profile")
+    apply.add_argument("file", nargs="?", help="layout written by export")
+    apply.add_argument("--profile", help="apply a saved profile instead")
+    apply.add_argument("--profiles-file", help="profile store to read")
+    apply.set_defaults(func=cmd_apply)
+
+    watch = commands.add_parser(
+        "watch", help="reapply saved profiles whenever the displays change"
+    )
+    watch.add_argument("--profile", help="preferred profile when several match")
+    watch.add_argument("--profiles-file", help="profile store to read")
+    watch.add_argument(
+        "--debounce",
+        type=float,
+        default=DEBOUNCE_SECONDS,
+        help="seconds to wait for a burst of changes to settle",
+    )
+    watch.add_argument(
+        "--latency-budget",
+        type=float,
+        default=LATENCY_BUDGET_SECONDS,
+        help="flag changes handled later than this many seconds as over_budget",
+    )
+    watch.set_defaults(func=cmd_watch)
+
+    serve = commands.add_parser(
+        "serve", help="accept JSON-RPC calls from local scripts"
+    )
+    serve.add_argument("--address", help="socket or named pipe to listen on")
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    backend = (
+        SimulatedBackend(count=args.simulate) if args.simulate is not None else None
+    )
+    config = DisplayConfig(backend)
+    return args.func(config, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
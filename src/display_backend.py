@@ -0,0 +1,354 @@
+# display_backend.py
+import ctypes
+import math
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# ChangeDisplaySettingsEx flags
+CDS_UPDATEREGISTRY = 0x00000001
+CDS_NORESET = 0x10000000
+CDS_GLOBAL = 0x00000008
+CDS_TEST = 0x00000002
+
+# ChangeDisplaySettingsEx result codes
+DISP_CHANGE_SUCCESSFUL = 0
+DISP_CHANGE_FAILED = -1
+DISP_CHANGE_BADMODE = -2
+DISP_CHANGE_BADPARAM = -5
+
+# DEVMODE dmFields bits
+DM_POSITION = 0x00000020
+DM_DISPLAYORIENTATION = 0x00000080
+DM_BITSPERPEL = 0x00040000
+DM_PELSWIDTH = 0x00080000
+DM_PELSHEIGHT = 0x00100000
+DM_DISPLAYFREQUENCY = 0x00400000
+
+# EnumDisplaySettings mode number of the current settings
+ENUM_CURRENT_SETTINGS = -1
+
+# Primary display flag as read by DisplayConfig.get_display_info
+PRIMARY_DISPLAY_FLAG = 0x00000001
+
+
+class DEVMODE(ctypes.Structure):
+    _fields_ = [
+        ("dmDeviceName", ctypes.c_wchar * 32),
+        ("dmSpecVersion", ctypes.c_ushort),
+        ("dmDriverVersion", ctypes.c_ushort),
+        ("dmSize", ctypes.c_ushort),
+        ("dmDriverExtra", ctypes.c_ushort),
+        ("dmFields", ctypes.c_ulong),
+        ("dmPositionX", ctypes.c_long),
+        ("dmPositionY", ctypes.c_long),
+        ("dmDisplayOrientation", ctypes.c_ulong),
+        ("dmDisplayFixedOutput", ctypes.c_ulong),
+        ("dmColor", ctypes.c_short),
+        ("dmDuplex", ctypes.c_short),
+        ("dmYResolution", ctypes.c_short),
+        ("dmTTOption", ctypes.c_short),
+        ("dmCollate", ctypes.c_short),
+        ("dmFormName", ctypes.c_wchar * 32),
+        ("dmLogPixels", ctypes.c_ushort),
+        ("dmBitsPerPel", ctypes.c_ulong),
+        ("dmPelsWidth", ctypes.c_ulong),
+        ("dmPelsHeight", ctypes.c_ulong),
+        ("dmDisplayFlags", ctypes.c_ulong),
+        ("dmDisplayFrequency", ctypes.c_ulong),
+    ]
+
+
+class DisplayBackend:
+    """Interface between DisplayConfig and the display driver"""
+
+    def enumerate_devices(self) -> List[str]:
+        """Get the names of all displays attached to the desktop"""
+        raise NotImplementedError
+
+    def read_settings(self, device_name: str) -> Optional[DEVMODE]:
+        """Read the current settings of a display"""
+        raise NotImplementedError
+
+    def list_modes(self, device_name: str) -> List[DEVMODE]:
+        """Read every mode a display supports"""
+        raise NotImplementedError
+
+    def stage(self, device_name: str, devmode: DEVMODE, flags: int) -> int:
+        """Stage new settings for a display, returning a DISP_CHANGE code
+
+        With CDS_TEST in ``flags`` the driver only checks the settings and
+        nothing is staged.
+        """
+        raise NotImplementedError
+
+    def commit(self) -> int:
+        """Apply all staged settings with a single mode reset"""
+        raise NotImplementedError
+
+
+class Win32Backend(DisplayBackend):
+    """Display backend using the Windows display API
+
+    pywin32 is imported on first use, so importing this module stays cheap
+    and works on machines without it.
+    """
+
+    def enumerate_devices(self) -> List[str]:
+        """Get the names of all displays attached to the desktop"""
+        import win32api
+        import win32con
+
+        names = []
+        i = 0
+
+        while True:
+            try:
+                device = win32api.EnumDisplayDevices(None, i)
+                if device.StateFlags & win32con.DISPLAY_DEVICE_ATTACHED_TO_DESKTOP:
+                    names.append(device.DeviceName)
+                i += 1
+            except win32api.error:
+                break
+
+        return names
+
+    def read_settings(self, device_name: str) -> Optional[DEVMODE]:
+        """Read the current settings of a display"""
+        settings = DEVMODE()
+        settings.dmSize = ctypes.sizeof(DEVMODE)
+
+        if ctypes.windll.user32.EnumDisplaySettingsW(
+            device_name,
+            ENUM_CURRENT_SETTINGS,
+            ctypes.byref(settings),
+        ):
+            return settings
+        return None
+
+    def list_modes(self, device_name: str) -> List[DEVMODE]:
+        """Read every mode a display supports"""
+        modes = []
+        mode_number = 0
+
+        while True:
+            settings = DEVMODE()
+            settings.dmSize = ctypes.sizeof(DEVMODE)
+            if not ctypes.windll.user32.EnumDisplaySettingsW(
+                device_name, mode_number, ctypes.byref(settings)
+            ):
+                break
+            modes.append(settings)
+            mode_number += 1
+
+        return modes
+
+    def stage(self, device_name: str, devmode: DEVMODE, flags: int) -> int:
+        """Stage new settings for a display, returning a DISP_CHANGE code"""
+        return ctypes.windll.user32.ChangeDisplaySettingsExW(
+            device_name, ctypes.byref(devmode), None, flags, None
+        )
+
+    def commit(self) -> int:
+        """Apply all staged settings with a single mode reset"""
+        return ctypes.windll.user32.ChangeDisplaySettingsExW(
+            None, None, None, 0, None  # APPLY NOW
+        )
+
+
+class SimulatedBackend(DisplayBackend):
+    """Deterministic in-memory display backend
+
+    Models a wall of outputs laid out left to right, top to bottom. Every
+    call is counted in ``calls`` and adds ``latency`` seconds, every mode
+    reset adds ``reset_latency`` seconds. ``result_codes`` maps device names
+    to the DISP_CHANGE code their staging should fail with, and
+    ``test_codes`` to the code a CDS_TEST check should return instead.
+
+    ``modes`` maps device names to their supported (width, height,
+    refresh_rate, bits_per_pixel) modes. Staging a mode that is not
+    listed fails with DISP_CHANGE_BADMODE.
+    """
+
+    MAX_OUTPUTS = 256
+    # Resolutions offered by a simulated display, up to its native one
+    RESOLUTIONS = (
+        (3840, 2160),
+        (2560, 1440),
+        (1920, 1080),
+        (1600, 900),
+        (1280, 720),
+    )
+    # DEVMODE fields of a mode, in the order of the ``modes`` tuples
+    MODE_FIELDS = (
+        ("dmPelsWidth", DM_PELSWIDTH),
+        ("dmPelsHeight", DM_PELSHEIGHT),
+        ("dmDisplayFrequency", DM_DISPLAYFREQUENCY),
+        ("dmBitsPerPel", DM_BITSPERPEL),
+    )
+
+    def __init__(
+        self,
+        count: int = 2,
+        resolution: Tuple[int, int] = (1920, 1080),
+        refresh_rate: int = 60,
+        columns: Optional[int] = None,
+        latency: float = 0.0,
+        reset_latency: float = 0.0,
+        result_codes: Optional[Dict[str, int]] = None,
+        test_codes: Optional[Dict[str, int]] = None,
+    ):
+        if not 1 <= count <= self.MAX_OUTPUTS:
+            raise ValueError(f"count must be between 1 and {self.MAX_OUTPUTS}")
+
+        self.latency = latency
+        self.reset_latency = reset_latency
+        self.result_codes: Dict[str, int] = dict(result_codes or {})
+        self.test_codes: Dict[str, int] = dict(test_codes or {})
+        self.calls: Counter = Counter()
+        self.reset_count = 0
+        self.elapsed = 0.0
+
+        self.devices: Dict[str, DEVMODE] = {}
+        self.modes: Dict[str, List[Tuple[int, int, int, int]]] = {}
+        self._staged: Dict[str, DEVMODE] = {}
+
+        width, height = resolution
+        columns = columns or math.ceil(math.sqrt(count))
+        for i in range(count):
+            self.connect(
+                f"\\\\.\\DISPLAY{i + 1}",
+                (i % columns) * width,
+                (i // columns) * height,
+                resolution,
+                refresh_rate,
+            )
+
+    def connect(
+        self,
+        device_name: str,
+        x: int = 0,
+        y: int = 0,
+        resolution: Tuple[int, int] = (1920, 1080),
+        refresh_rate: int = 60,
+        modes: Optional[List[Tuple[int, int, int, int]]] = None,
+    ) -> None:
+        """Attach a simulated display
+
+        Without ``modes`` the display supports the common resolutions up
+        to its native one, at 60Hz and at its native refresh rate.
+        """
+        settings = DEVMODE()
+        settings.dmSize = ctypes.sizeof(DEVMODE)
+        settings.dmDeviceName = device_name[:31]
+        settings.dmPositionX = x
+        settings.dmPositionY = y
+        settings.dmPelsWidth, settings.dmPelsHeight = resolution
+        settings.dmDisplayFrequency = refresh_rate
+        settings.dmBitsPerPel = 32
+        if not self.devices:
+            settings.dmDisplayFlags = PRIMARY_DISPLAY_FLAG
+        self.devices[device_name] = settings
+
+        if modes is None:
+            width, height = resolution
+            resolutions = {resolution} | {
+                (w, h) for w, h in self.RESOLUTIONS if w <= width and h <= height
+            }
+            modes = [
+                (w, h, rate, 32)
+                for w, h in sorted(resolutions, reverse=True)
+                for rate in sorted({60, refresh_rate}, reverse=True)
+            ]
+        self.modes[device_name] = list(modes)
+
+    def disconnect(self, device_name: str) -> None:
+        """Detach a simulated display"""
+        self.devices.pop(device_name, None)
+        self.modes.pop(device_name, None)
+        self._staged.pop(device_name, None)
+
+    def _call(self, name: str) -> None:
+        self.calls[name] += 1
+        self.elapsed += self.latency
+        if self.latency:
+            time.sleep(self.latency)
+
+    def enumerate_devices(self) -> List[str]:
+        """Get the names of all displays attached to the desktop"""
+        self._call("enumerate_devices")
+        return list(self.devices)
+
+    def read_settings(self, device_name: str) -> Optional[DEVMODE]:
+        """Read the current settings of a display"""
+        self._call("read_settings")
+        settings = self.devices.get(device_name)
+        if settings is None:
+            return None
+        return DEVMODE.from_buffer_copy(settings)
+
+    def list_modes(self, device_name: str) -> List[DEVMODE]:
+        """Read every mode a display supports"""
+        self._call("list_modes")
+        modes = []
+        for width, height, refresh_rate, bits_per_pixel in self.modes.get(
+            device_name, ()
+        ):
+            settings = DEVMODE()
+            settings.dmSize = ctypes.sizeof(DEVMODE)
+            settings.dmPelsWidth = width
+            settings.dmPelsHeight = height
+            settings.dmDisplayFrequency = refresh_rate
+            settings.dmBitsPerPel = bits_per_pixel
+            modes.append(settings)
+        return modes
+
+    def stage(self, device_name: str, devmode: DEVMODE, flags: int) -> int:
+        """Stage new settings for a display, returning a DISP_CHANGE code"""
+        testing = bool(flags & CDS_TEST)
+        self._call("test" if testing else "stage")
+        if device_name not in self.devices:
+            return DISP_CHANGE_FAILED
+
+        result = self.result_codes.get(device_name, DISP_CHANGE_SUCCESSFUL)
+        if testing:
+            result = self.test_codes.get(device_name, result)
+        if result == DISP_CHANGE_SUCCESSFUL and not self._mode_supported(
+            device_name, devmode
+        ):
+            result = DISP_CHANGE_BADMODE
+        if result == DISP_CHANGE_SUCCESSFUL and not testing:
+            self._staged[device_name] = DEVMODE.from_buffer_copy(devmode)
+        return result
+
+    def _mode_supported(self, device_name: str, devmode: DEVMODE) -> bool:
+        if not any(devmode.dmFields & flag for _, flag in self.MODE_FIELDS):
+            return True
+
+        current = self.devices[device_name]
+        mode = tuple(
+            getattr(devmode if devmode.dmFields & flag else current, field)
+            for field, flag in self.MODE_FIELDS
+        )
+        return mode in self.modes.get(device_name, ())
+
+    def commit(self) -> int:
+        """Apply all staged settings with a single mode reset"""
+        self._call("commit")
+        self.reset_count += 1
+        self.elapsed += self.reset_latency
+        if self.reset_latency:
+            time.sleep(self.reset_latency)
+
+        for device_name, staged in self._staged.items():
+            current = self.devices[device_name]
+            if staged.dmFields & DM_POSITION:
+                current.dmPositionX = staged.dmPositionX
+                current.dmPositionY = staged.dmPositionY
+            if staged.dmFields & DM_DISPLAYORIENTATION:
+                current.dmDisplayOrientation = staged.dmDisplayOrientation
+            for field, flag in self.MODE_FIELDS:
+                if staged.dmFields & flag:
+                    setattr(current, field, getattr(staged, field))
+        self._staged.clear()
+        return DISP_CHANGE_SUCCESSFUL
@@ -1,5 +1,29 @@
 import tkinter as tk
-from typing import Dict, Optional, Callable
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.instrumentation import span
+from src.snapping import SnapEngine
+from src.spatial_index import SpatialIndex
+
+# Minor grid steps in screen pixels, major lines are drawn every 5 steps
+GRID_STEPS = (100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+GRID_MAJOR_EVERY = 5
+# Maximum number of grid lines kept on the canvas
+GRID_LINE_BUDGET = 200
+# Fraction of the viewport rendered beyond each edge so pans can reuse it
+GRID_OVERSCAN = 0.25
+# Motion, pan and zoom events are coalesced into one update per frame
+FRAME_INTERVAL_MS = 16
+
+# Snap distance while dragging, in canvas pixels
+SNAP_DISTANCE = 8
+
+DISPLAY_FILL = "white"
+SELECTED_FILL = "#E3F2FD"
+DISPLAY_OUTLINE = "#2196F3"
+HOVER_OUTLINE = "#0D47A1"
+OVERLAP_COLOR = "#F44336"
+GAP_COLOR = "#FF9800"
 
 
 class DisplayCanvas(tk.Canvas):
@@ -8,6 +32,10 @@ class DisplayCanvas(tk.Canvas):
         self.on_display_moved = on_display_moved
         self.displays: Dict[str, Dict] = {}
         self.selected: Optional[str] = None
+        self.selected_group: Set[str] = set()
+        self.hovered: Optional[str] = None
+        self.diagnostics: Optional[Dict] = None
+        self._diagnostics_drawn = False
         self.scale = 0.1
         self.offset_x = 100
         self.offset_y = 100
@@ -24,7 +52,36 @@ class DisplayCanvas(tk.Canvas):
         self.bind("<ButtonPress-1>", self.start_drag)
         self.bind("<B1-Motion>", self.drag)
         self.bind("<ButtonRelease-1>", self.end_drag)
+        self.bind("<Motion>", self.on_hover)
+        self.bind("<Configure>", lambda e: self.request_redraw())
         self._drag_data = {"x": 0, "y": 0, "display": None}
+        self._rubber_band: Optional[Tuple[int, int, int]] = None
+
+        # Display rectangles in screen coordinates for hit-testing and snapping
+        self._rects: Dict[str, Tuple[int, int, int, int]] = {}
+        self._index = SpatialIndex()
+        self.snap_engine = SnapEngine()
+        self.snap_enabled = True
+
+        # Retained canvas items, reused across redraws
+        self._display_items: Dict[str, Tuple[int, int]] = {}
+        self._display_drawn: Dict[str, Tuple] = {}
+        self._display_style: Dict[str, Tuple[str, str]] = {}
+        self._grid_items: Dict[str, List[int]] = {
+            kind: [] for kind in ("major", "minor", "xlabel", "ylabel")
+        }
+        self._grid_drawn: Dict[str, List[Optional[Tuple]]] = {
+            kind: [] for kind in self._grid_items
+        }
+        self._grid_view: Optional[Tuple] = None
+        self._grid_offset: Tuple[float, float] = (0, 0)
+        self._grid_drawn_offset: Tuple[float, float] = (0, 0)
+        self._display_view: Optional[Tuple] = None
+
+        # Coalesced updates flushed once per frame
+        self._frame_job = None
+        self._needs_redraw = False
+        self._pending_move: Optional[Tuple[str, int, int]] = None
 
     def screen_to_canvas(self, x: int, y: int) -> tuple[int, int]:
         """Convert screen coordinates to canvas coordinates"""
@@ -43,106 +100,459 @@ class DisplayCanvas(tk.Canvas):
     def update_displays(self, displays: Dict[str, Dict]) -> None:
         """Update the display layout"""
         self.displays = displays
-        self.redraw()
 
-    def redraw(self) -> None:
-        """Redraw all displays"""
-        self.delete("all")
+        rects = {
+            name: (
+                display["x"],
+                display["y"],
+                display["x"] + display["width"],
+                display["y"] + display["height"],
+            )
+            for name, display in displays.items()
+        }
+        if rects != self._rects:
+            # Diagnostics describe the layout they were computed for
+            self.diagnostics = None
+
+        if rects.keys() != self._rects.keys():
+            self._index.rebuild(rects)
+            self.snap_engine.update(rects)
+        else:
+            # Usually only the dragged display moved
+            for name, rect in rects.items():
+                if rect != self._rects[name]:
+                    self._index.insert(name, rect)
+                    self.snap_engine.move(name, self._rects[name], rect)
+        self._rects = rects
 
-        # Calculate grid parameters
-        grid_step = 100  # Real screen coordinates (pixels)
-        w = self.winfo_width()
-        h = self.winfo_height()
+        self.redraw()
 
-        # Find visible area bounds in screen coordinates
-        left = -self.offset_x / self.scale
-        right = (w - self.offset_x) / self.scale
-        top = -self.offset_y / self.scale
-        bottom = (h - self.offset_y) / self.scale
+    def update_display(self, name: str, display: Dict) -> None:
+        """Update a single display, touching only its own items"""
+        old_rect = self._rects.get(name)
+        if old_rect is None:
+            self.update_displays({**self.displays, name: display})
+            return
 
-        # Draw major grid lines (every 500 pixels)
-        major_step = 500
+        self.displays = {**self.displays, name: display}
+        rect = (
+            display["x"],
+            display["y"],
+            display["x"] + display["width"],
+            display["y"] + display["height"],
+        )
+        if rect != old_rect:
+            self._index.insert(name, rect)
+            self.snap_engine.move(name, old_rect, rect)
+            self._rects[name] = rect
+            if self.diagnostics:
+                self.show_diagnostics(None)
+
+        if self._display_view == (self.scale, self.offset_x, self.offset_y):
+            self._draw_display(name, display)
+        else:
+            self.redraw()
 
-        # Vertical major grid lines
-        for x in range(
-            int(left // major_step) * major_step, int(right) + major_step, major_step
-        ):
-            canvas_x = x * self.scale + self.offset_x
-            self.create_line(canvas_x, 0, canvas_x, h, fill="#CCCCCC", width=2)
-            self.create_text(
-                canvas_x, 20, text=str(x), fill="#666666", font=("Arial", 8, "bold")
+    def display_at(self, x: int, y: int) -> Optional[str]:
+        """Get the topmost display under a canvas point"""
+        hits = self._index.query_point(
+            (x - self.offset_x) / self.scale, (y - self.offset_y) / self.scale
+        )
+        return hits[-1] if hits else None
+
+    def displays_in_area(self, x0: int, y0: int, x1: int, y1: int) -> List[str]:
+        """Get the displays intersecting a canvas rectangle"""
+        left, right = sorted((x0, x1))
+        top, bottom = sorted((y0, y1))
+        return self._index.query_rect(
+            (
+                (left - self.offset_x) / self.scale,
+                (top - self.offset_y) / self.scale,
+                (right - self.offset_x) / self.scale,
+                (bottom - self.offset_y) / self.scale,
             )
+        )
 
-        # Horizontal major grid lines
-        for y in range(
-            int(top // major_step) * major_step, int(bottom) + major_step, major_step
-        ):
-            canvas_y = y * self.scale + self.offset_y
-            self.create_line(0, canvas_y, w, canvas_y, fill="#CCCCCC", width=2)
-            self.create_text(
-                20, canvas_y, text=str(y), fill="#666666", font=("Arial", 8, "bold")
-            )
+    def redraw(self) -> None:
+        """Redraw all displays
+
+        Canvas items are created once and then updated in place, so only the
+        items whose geometry or selection changed are touched.
+        """
+        self._needs_redraw = False
+        w = int(self.winfo_width())
+        h = int(self.winfo_height())
+        if w <= 1 or h <= 1:
+            # Not laid out yet or hidden, <Configure> redraws once sized
+            return
 
-        # Draw minor grid lines
+        with span("canvas.redraw", displays=len(self.displays)):
+            with span("canvas.redraw.grid"):
+                created = self._draw_grid(w, h)
+            with span("canvas.redraw.displays"):
+                self._draw_displays()
+                self._draw_diagnostics()
+
+            if created:
+                # Keep displays above newly created grid items, and the
+                # overlap and gap markers above the displays
+                self.tag_raise("display")
+                self.tag_raise("diagnostic")
+
+    def request_redraw(self) -> None:
+        """Redraw on the next frame"""
+        self._needs_redraw = True
+        self._schedule_frame()
+
+    def _schedule_frame(self) -> None:
+        if self._frame_job is None:
+            self._frame_job = self.after(FRAME_INTERVAL_MS, self.flush)
+
+    def flush(self) -> None:
+        """Deliver the coalesced display move and redraw if needed"""
+        if self._frame_job is not None:
+            self.after_cancel(self._frame_job)
+            self._frame_job = None
+
+        if self._pending_move is not None:
+            name, x, y = self._pending_move
+            self._pending_move = None
+            self.on_display_moved(name, x, y)
+
+        if self._needs_redraw:
+            self.redraw()
+
+    def destroy(self):
+        """Cancel the scheduled frame and destroy the canvas"""
+        if self._frame_job is not None:
+            self.after_cancel(self._frame_job)
+            self._frame_job = None
+        super().destroy()
+
+    def grid_step(self, w: int, h: int) -> int:
+        """Pick the minor grid step that keeps the grid within budget"""
+        extent = (w + h) * (1 + 2 * GRID_OVERSCAN)
+        for step in GRID_STEPS:
+            # Each axis can add two partial lines at the rendered edges
+            if extent / (step * self.scale) + 4 <= GRID_LINE_BUDGET:
+                return step
+        return GRID_STEPS[-1]
+
+    def _draw_grid(self, w: int, h: int) -> bool:
+        """Update the grid items for the current view
+
+        The grid is rendered with some overscan, so a pan that stays within
+        the rendered bounds only moves the existing items. Returns True if
+        new grid items had to be created.
+        """
+        margin_x = w * GRID_OVERSCAN
+        margin_y = h * GRID_OVERSCAN
+
+        if self._grid_view == (self.scale, w, h):
+            render_x, render_y = self._grid_offset
+            if (
+                abs(self.offset_x - render_x) <= margin_x
+                and abs(self.offset_y - render_y) <= margin_y
+            ):
+                self._move_grid(
+                    self.offset_x - self._grid_drawn_offset[0],
+                    self.offset_y - self._grid_drawn_offset[1],
+                )
+                return False
+
+        self._grid_view = (self.scale, w, h)
+        self._grid_offset = (self.offset_x, self.offset_y)
+        self._grid_drawn_offset = self._grid_offset
+
+        grid_step = self.grid_step(w, h)  # Real screen coordinates (pixels)
+        major_step = grid_step * GRID_MAJOR_EVERY
+
+        # Rendered area bounds in screen coordinates
+        left = (-margin_x - self.offset_x) / self.scale
+        right = (w + margin_x - self.offset_x) / self.scale
+        top = (-margin_y - self.offset_y) / self.scale
+        bottom = (h + margin_y - self.offset_y) / self.scale
+
+        major: List[Tuple] = []
+        minor: List[Tuple] = []
+        xlabels: List[Tuple] = []
+        ylabels: List[Tuple] = []
+
+        # Vertical grid lines
         for x in range(
             int(left // grid_step) * grid_step, int(right) + grid_step, grid_step
         ):
-            if x % major_step != 0:  # Skip if major line
-                canvas_x = x * self.scale + self.offset_x
-                self.create_line(canvas_x, 0, canvas_x, h, fill="#EEEEEE")
-
+            canvas_x = x * self.scale + self.offset_x
+            line = (canvas_x, -margin_y, canvas_x, h + margin_y)
+            if x % major_step == 0:
+                major.append(line)
+                xlabels.append((canvas_x, 20, str(x)))
+            else:
+                minor.append(line)
+
+        # Horizontal grid lines
         for y in range(
             int(top // grid_step) * grid_step, int(bottom) + grid_step, grid_step
         ):
-            if y % major_step != 0:  # Skip if major line
-                canvas_y = y * self.scale + self.offset_y
-                self.create_line(0, canvas_y, w, canvas_y, fill="#EEEEEE")
-
-        # Draw displays
-        for name, display in self.displays.items():
-            x, y = self.screen_to_canvas(display["x"], display["y"])
-            width = int(display["width"] * self.scale)
-            height = int(display["height"] * self.scale)
+            canvas_y = y * self.scale + self.offset_y
+            line = (-margin_x, canvas_y, w + margin_x, canvas_y)
+            if y % major_step == 0:
+                major.append(line)
+                ylabels.append((20, canvas_y, str(y)))
+            else:
+                minor.append(line)
+
+        created = self._sync_grid_items("minor", minor)
+        created |= self._sync_grid_items("major", major)
+        created |= self._sync_grid_items("xlabel", xlabels)
+        created |= self._sync_grid_items("ylabel", ylabels)
+        return created
+
+    def _move_grid(self, dx: float, dy: float) -> None:
+        """Shift the rendered grid, keeping labels pinned to the edges"""
+        if not dx and not dy:
+            return
 
-            # Display rectangle
-            fill = "#E3F2FD" if name == self.selected else "white"
-            self.create_rectangle(
+        self.move("grid_line", dx, dy)
+        if dx:
+            self.move("grid_xlabel", dx, 0)
+        if dy:
+            self.move("grid_ylabel", 0, dy)
+        self._grid_drawn_offset = (self.offset_x, self.offset_y)
+
+        shifts = {
+            "major": (dx, dy, dx, dy),
+            "minor": (dx, dy, dx, dy),
+            "xlabel": (dx, 0, None),
+            "ylabel": (0, dy, None),
+        }
+        for kind, shift in shifts.items():
+            self._grid_drawn[kind] = [
+                (
+                    None
+                    if spec is None
+                    else tuple(v if d is None else v + d for v, d in zip(spec, shift))
+                )
+                for spec in self._grid_drawn[kind]
+            ]
+
+    def _create_grid_item(self, kind: str, spec: Tuple) -> int:
+        """Create a grid line or label"""
+        if kind in ("xlabel", "ylabel"):
+            x, y, text = spec
+            return self.create_text(
                 x,
                 y,
-                x + width,
-                y + height,
-                fill=fill,
-                outline="#2196F3",
+                text=text,
+                fill="#666666",
+                font=("Arial", 8, "bold"),
+                tags=("grid", f"grid_{kind}"),
+            )
+        if kind == "major":
+            return self.create_line(
+                *spec, fill="#CCCCCC", width=2, tags=("grid", "grid_line")
+            )
+        return self.create_line(*spec, fill="#EEEEEE", tags=("grid", "grid_line"))
+
+    def _sync_grid_items(self, kind: str, specs: List[Tuple]) -> bool:
+        """Move pooled grid items into place, hiding the unused ones"""
+        items = self._grid_items[kind]
+        drawn = self._grid_drawn[kind]
+        created = False
+
+        for i, spec in enumerate(specs):
+            if i == len(items):
+                items.append(self._create_grid_item(kind, spec))
+                drawn.append(spec)
+                created = True
+                continue
+
+            previous = drawn[i]
+            if previous == spec:
+                continue
+            if previous is None:
+                self.itemconfigure(items[i], state="normal")
+            if kind in ("xlabel", "ylabel"):
+                self.coords(items[i], spec[0], spec[1])
+                if previous is None or previous[2] != spec[2]:
+                    self.itemconfigure(items[i], text=spec[2])
+            else:
+                self.coords(items[i], *spec)
+            drawn[i] = spec
+
+        for i in range(len(specs), len(items)):
+            if drawn[i] is not None:
+                self.itemconfigure(items[i], state="hidden")
+                drawn[i] = None
+
+        return created
+
+    def _draw_displays(self) -> None:
+        """Create, move or restyle display items that changed"""
+        view = (self.scale, self.offset_x, self.offset_y)
+        if self._display_view is not None and view[0] == self._display_view[0]:
+            # A pan at the same scale moves every display item in one call
+            dx = self.offset_x - self._display_view[1]
+            dy = self.offset_y - self._display_view[2]
+            if (dx or dy) and dx == int(dx) and dy == int(dy):
+                self.move("display", dx, dy)
+                for name, (geometry, label) in self._display_drawn.items():
+                    x0, y0, x1, y1 = geometry
+                    geometry = (x0 + dx, y0 + dy, x1 + dx, y1 + dy)
+                    self._display_drawn[name] = (geometry, label)
+        self._display_view = view
+
+        for name in list(self._display_items):
+            if name not in self.displays:
+                self.delete(*self._display_items.pop(name))
+                del self._display_drawn[name]
+                del self._display_style[name]
+
+        for name, display in self.displays.items():
+            self._draw_display(name, display)
+
+    def _draw_display(self, name: str, display: Dict) -> None:
+        """Create a display's items, or update them if they changed"""
+        x, y = self.screen_to_canvas(display["x"], display["y"])
+        width = int(display["width"] * self.scale)
+        height = int(display["height"] * self.scale)
+        label = f"{name}\n{display['width']}x{display['height']}"
+        geometry = (x, y, x + width, y + height)
+
+        items = self._display_items.get(name)
+        if items is None:
+            style = self._display_style_for(name)
+            rect = self.create_rectangle(
+                *geometry,
+                fill=style[0],
+                outline=style[1],
                 width=2,
                 tags=(name, "display"),
             )
-
-            # Display information
-            self.create_text(
+            text = self.create_text(
                 x + width / 2,
                 y + height / 2,
-                text=f"{name}\n{display['width']}x{display['height']}",
+                text=label,
                 tags=(name, "display"),
             )
+            self._display_items[name] = (rect, text)
+            self._display_drawn[name] = (geometry, label)
+            self._display_style[name] = style
+            return
+
+        rect, text = items
+        drawn_geometry, drawn_label = self._display_drawn[name]
+        if geometry != drawn_geometry:
+            self.coords(rect, *geometry)
+            self.coords(text, x + width / 2, y + height / 2)
+        if label != drawn_label:
+            self.itemconfigure(text, text=label)
+        self._display_drawn[name] = (geometry, label)
+        self._restyle_display(name)
+
+    def show_diagnostics(self, report: Optional[Dict]) -> None:
+        """Highlight overlaps and gaps from a layout validation report"""
+        self.diagnostics = report
+        self._draw_diagnostics()
+
+    def _draw_diagnostics(self) -> None:
+        """Draw the overlap and gap markers of the current diagnostics"""
+        # Only a handful of markers, so they are simply recreated
+        if self._diagnostics_drawn:
+            self.delete("diagnostic")
+            self._diagnostics_drawn = False
+        if not self.diagnostics:
+            return
+        self._diagnostics_drawn = True
+
+        markers = [
+            (item["rect"], OVERLAP_COLOR) for item in self.diagnostics["overlaps"]
+        ]
+        markers += [(gap["rect"], GAP_COLOR) for gap in self.diagnostics["gaps"]]
+        for (x0, y0, x1, y1), color in markers:
+            left, top = self.screen_to_canvas(x0, y0)
+            right, bottom = self.screen_to_canvas(x1, y1)
+            self.create_rectangle(
+                left - 1,
+                top - 1,
+                right + 1,
+                bottom + 1,
+                outline=color,
+                fill=color,
+                stipple="gray25",
+                width=2,
+                tags="diagnostic",
+            )
+
+    def _display_style_for(self, name: str) -> Tuple[str, str]:
+        """Get the fill and outline of a display"""
+        selected = name == self.selected or name in self.selected_group
+        return (
+            SELECTED_FILL if selected else DISPLAY_FILL,
+            HOVER_OUTLINE if name == self.hovered else DISPLAY_OUTLINE,
+        )
+
+    def _restyle_display(self, name: Optional[str]) -> None:
+        """Update the fill and outline of a display if they changed"""
+        if name not in self._display_items:
+            return
+
+        style = self._display_style_for(name)
+        if style != self._display_style[name]:
+            rect = self._display_items[name][0]
+            self.itemconfigure(rect, fill=style[0], outline=style[1])
+            self._display_style[name] = style
 
     def select_display(self, name: Optional[str]) -> None:
         """Select a display"""
+        previous = self.selected
+        group = self.selected_group
         self.selected = name
-        self.redraw()
+        self.selected_group = set()
+
+        for other in {previous, name} | group:
+            self._restyle_display(other)
+
+    def select_group(self, names: List[str]) -> None:
+        """Select several displays, e.g. from a rubber-band selection"""
+        previous = self.selected_group | {self.selected}
+        self.selected = None
+        self.selected_group = set(names)
+
+        for name in previous | self.selected_group:
+            self._restyle_display(name)
+
+    def on_hover(self, event):
+        """Highlight the display under the mouse"""
+        name = self.display_at(event.x, event.y)
+        if name != self.hovered:
+            previous = self.hovered
+            self.hovered = name
+            self._restyle_display(previous)
+            self._restyle_display(name)
 
     def start_drag(self, event):
-        """Start dragging a display"""
+        """Start dragging a display, or a rubber-band selection on empty space"""
         x, y = event.x, event.y
-        items = self.find_closest(x, y)
+        name = self.display_at(x, y)
+
+        if name is not None:
+            self._drag_data = {"x": x, "y": y, "display": name}
+            self.select_display(name)
+            return
 
-        for name in self.displays:
-            if name in self.gettags(items[0]):
-                self._drag_data = {"x": x, "y": y, "display": name}
-                self.select_display(name)
-                break
+        band = self.create_rectangle(
+            x, y, x, y, outline=HOVER_OUTLINE, dash=(4, 2), tags="rubber_band"
+        )
+        self._rubber_band = (x, y, band)
 
     def drag(self, event):
         """Handle display dragging"""
+        if self._rubber_band is not None:
+            x, y, band = self._rubber_band
+            self.coords(band, x, y, event.x, event.y)
+            return
+
         if not self._drag_data["display"]:
             return
 
@@ -155,13 +565,32 @@ class DisplayCanvas(tk.Canvas):
         self._drag_data["y"] = event.y
 
         # Convert to screen coordinates
+        name = self._drag_data["display"]
         screen_x, screen_y = self.canvas_to_screen(event.x, event.y)
+        if self.snap_enabled and name in self.displays:
+            screen_x, screen_y = self.snap_engine.snap(
+                name,
+                screen_x,
+                screen_y,
+                self.displays[name]["width"],
+                self.displays[name]["height"],
+                tolerance=SNAP_DISTANCE / self.scale,
+            )
 
-        # Notify about the move
-        self.on_display_moved(self._drag_data["display"], screen_x, screen_y)
+        # Notify about the move on the next frame
+        self._pending_move = (name, screen_x, screen_y)
+        self._schedule_frame()
 
     def end_drag(self, event):
         """End display dragging"""
+        if self._rubber_band is not None:
+            x, y, band = self._rubber_band
+            self._rubber_band = None
+            self.delete(band)
+            if event is not None:
+                self.select_group(self.displays_in_area(x, y, event.x, event.y))
+
+        self.flush()
         self._drag_data = {"x": 0, "y": 0, "display": None}
 
     def on_mousewheel(self, event):
@@ -172,7 +601,7 @@ class DisplayCanvas(tk.Canvas):
         # Scroll amount based on OS/platform
         delta = -1 * (event.delta // 120)
         self.offset_y += delta * 50
-        self.redraw()
+        self.request_redraw()
 
     def on_zoom(self, event):
         """Handle zooming with Ctrl+MouseWheel"""
@@ -184,7 +613,7 @@ class DisplayCanvas(tk.Canvas):
 
         # Limit scale range
         self.scale = max(0.01, min(1.0, self.scale))
-        self.redraw()
+        self.request_redraw()
 
     def start_pan(self, event):
         """Start canvas panning"""
@@ -199,7 +628,7 @@ class DisplayCanvas(tk.Canvas):
             self.offset_y += dy
             self._drag_data["x"] = event.x
             self._drag_data["y"] = event.y
-            self.redraw()
+            self.request_redraw()
 
     def reset_view(self):
         """Reset view to default position and scale"""
@@ -1,68 +1,164 @@
 # display_config.py
-import ctypes
-import win32api
-import win32con
-from typing import Dict, Optional
-
-
-class DEVMODE(ctypes.Structure):
-    _fields_ = [
-        ("dmDeviceName", ctypes.c_wchar * 32),
-        ("dmSpecVersion", ctypes.c_ushort),
-        ("dmDriverVersion", ctypes.c_ushort),
-        ("dmSize", ctypes.c_ushort),
-        ("dmDriverExtra", ctypes.c_ushort),
-        ("dmFields", ctypes.c_ulong),
-        ("dmPositionX", ctypes.c_long),
-        ("dmPositionY", ctypes.c_long),
-        ("dmDisplayOrientation", ctypes.c_ulong),
-        ("dmDisplayFixedOutput", ctypes.c_ulong),
-        ("dmColor", ctypes.c_short),
-        ("dmDuplex", ctypes.c_short),
-        ("dmYResolution", ctypes.c_short),
-        ("dmTTOption", ctypes.c_short),
-        ("dmCollate", ctypes.c_short),
-        ("dmFormName", ctypes.c_wchar * 32),
-        ("dmLogPixels", ctypes.c_ushort),
-        ("dmBitsPerPel", ctypes.c_ulong),
-        ("dmPelsWidth", ctypes.c_ulong),
-        ("dmPelsHeight", ctypes.c_ulong),
-        ("dmDisplayFlags", ctypes.c_ulong),
-        ("dmDisplayFrequency", ctypes.c_ulong),
-    ]
+import copy
+import threading
+from concurrent.futures import Executor, Future
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from src.display_backend import (
+    CDS_GLOBAL,
+    CDS_NORESET,
+    CDS_TEST,
+    CDS_UPDATEREGISTRY,
+    DEVMODE,
+    DISP_CHANGE_BADPARAM,
+    DISP_CHANGE_SUCCESSFUL,
+    DM_BITSPERPEL,
+    DM_DISPLAYFREQUENCY,
+    DM_DISPLAYORIENTATION,
+    DM_PELSHEIGHT,
+    DM_PELSWIDTH,
+    DM_POSITION,
+    DisplayBackend,
+    Win32Backend,
+)
+from src.display_modes import DisplayMode, ModeCatalogue
+from src.instrumentation import span
+from src.layout_model import LayoutModel
+from src.layout_validator import validate_layout
+
+
+class _ImmediateExecutor(Executor):
+    """Executor that runs work on the calling thread"""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def _resolved(result) -> Future:
+    future: Future = Future()
+    future.set_result(result)
+    return future
 
 
 class DisplayConfig:
-    def __init__(self):
+    def __init__(
+        self, backend: Optional[DisplayBackend] = None, auto_enumerate: bool = True
+    ):
+        self.backend = backend if backend is not None else Win32Backend()
         self.displays: Dict[str, DEVMODE] = {}
         self.pending_changes: Dict[str, Dict] = {}
-        self.enumerate_displays()
+
+        # Supported modes, read from the driver on first use per display
+        self._modes: Dict[str, ModeCatalogue] = {}
+
+        # Current settings with pending changes, kept in step by _touch
+        self.layout = LayoutModel()
+
+        # Bumped whenever the layout returned by snapshot() changes
+        self.version = 0
+        self._changed_at: Dict[str, int] = {}
+        self._snapshot = self.layout.freeze()
+        self._snapshot_version = -1
+
+        # Plan, committed pending changes and whether the driver applied
+        # them, for a commit_changes_async call
+        self._in_flight: Optional[
+            Tuple[Dict[str, Dict], Dict[str, Dict], threading.Event]
+        ] = None
+
+        if auto_enumerate:
+            self.enumerate_displays()
+
+    def _touch(self, device_names: Iterable[str]) -> None:
+        """Record that the given displays changed in a new version"""
+        self.version += 1
+        for device_name in device_names:
+            self._changed_at[device_name] = self.version
+            info = self.get_display_info(device_name)
+            if info is not None:
+                self.layout.set_display(
+                    device_name,
+                    info["x"],
+                    info["y"],
+                    info["width"],
+                    info["height"],
+                    info["orientation"],
+                    info["refresh_rate"],
+                    info["is_primary"],
+                )
+
+    def changes_since(self, version: int) -> Set[str]:
+        """Get the displays that changed, appeared or went away after version"""
+        return {
+            device_name
+            for device_name, changed_at in self._changed_at.items()
+            if changed_at > version
+        }
+
+    def snapshot(self) -> LayoutModel:
+        """Get a frozen copy of the layout, including pending changes
+
+        The copy is made only when the version has changed since the last
+        call. It maps display names to read-only views with the same keys
+        as ``get_display_info``.
+        """
+        if self._snapshot_version != self.version:
+            self._snapshot = self.layout.freeze()
+            self._snapshot_version = self.version
+        return self._snapshot
 
     def enumerate_displays(self) -> None:
         """Get all connected displays and their current settings"""
-        i = 0
+        with span("config.enumerate_displays"):
+            self.set_displays(self.read_displays())
+
+    def read_displays(self) -> Dict[str, DEVMODE]:
+        """Read every connected display from the backend
+
+        Only talks to the backend, so it can run on a worker thread while
+        the UI keeps using this object. Pass the result to set_displays.
+        """
+        displays: Dict[str, DEVMODE] = {}
+        for device_name in self.backend.enumerate_devices():
+            settings = self.backend.read_settings(device_name)
+            if settings is not None:
+                displays[device_name] = settings
+        return displays
+
+    def set_displays(self, displays: Dict[str, DEVMODE]) -> None:
+        """Replace the known displays with freshly read settings"""
+        previous = list(self.displays)
         self.displays.clear()
+        self.displays.update(displays)
+        # Another monitor may now be behind the same device name
+        self._modes.clear()
 
-        while True:
-            try:
-                device = win32api.EnumDisplayDevices(None, i)
-                if not device.StateFlags & win32con.DISPLAY_DEVICE_ATTACHED_TO_DESKTOP:
-                    i += 1
-                    continue
+        self.layout.clear()
+        self._touch(list(self.displays) + previous)
 
-                settings = DEVMODE()
-                settings.dmSize = ctypes.sizeof(DEVMODE)
+    def refresh_displays(self, device_names: Iterable[str]) -> None:
+        """Re-read the current settings of the given displays only
 
-                if ctypes.windll.user32.EnumDisplaySettingsW(
-                    device.DeviceName,
-                    -1,  # ENUM_CURRENT_SETTINGS
-                    ctypes.byref(settings),
-                ):
-                    self.displays[device.DeviceName] = settings
+        Falls back to a full enumeration when one of the devices is unknown
+        or can no longer be read, since the set of displays has changed.
+        """
+        refreshed: Dict[str, DEVMODE] = {}
+        for device_name in device_names:
+            settings = None
+            if device_name in self.displays:
+                settings = self.backend.read_settings(device_name)
+            if settings is None:
+                self.enumerate_displays()
+                return
+            refreshed[device_name] = settings
 
-                i += 1
-            except win32api.error:
-                break
+        self.displays.update(refreshed)
+        self._touch(refreshed)
 
     def get_display_info(self, device_name: str) -> Optional[Dict]:
         """Get display information in a dictionary format"""
@@ -76,10 +172,10 @@ class DisplayConfig:
             "name": device_name,
             "x": pending.get("x", display.dmPositionX),
             "y": pending.get("y", display.dmPositionY),
-            "width": display.dmPelsWidth,
-            "height": display.dmPelsHeight,
+            "width": pending.get("width", display.dmPelsWidth),
+            "height": pending.get("height", display.dmPelsHeight),
             "orientation": pending.get("orientation", display.dmDisplayOrientation),
-            "refresh_rate": display.dmDisplayFrequency,
+            "refresh_rate": pending.get("refresh_rate", display.dmDisplayFrequency),
             "is_primary": bool(
                 display.dmDisplayFlags & 0x00000001
             ),  # Primary display flag
@@ -87,65 +183,354 @@ class DisplayConfig:
 
     def set_position(self, device_name: str, x: int, y: int) -> None:
         """Queue position change for a display"""
-        if device_name not in self.displays:
-            return
+        self.set_positions({device_name: (x, y)})
+
+    def set_positions(self, positions: Dict[str, Tuple[int, int]]) -> None:
+        """Queue position changes for several displays in one version"""
+        moved = []
+        for device_name, (x, y) in positions.items():
+            if device_name not in self.displays:
+                continue
+
+            display = self.displays[device_name]
+            pending = self.pending_changes.setdefault(device_name, {})
+            before = (
+                pending.get("x", display.dmPositionX),
+                pending.get("y", display.dmPositionY),
+            )
 
-        if device_name not in self.pending_changes:
-            self.pending_changes[device_name] = {}
+            pending.update({"x": x, "y": y})
+            if before != (x, y):
+                moved.append(device_name)
 
-        self.pending_changes[device_name].update({"x": x, "y": y})
+        if moved:
+            self._touch(moved)
 
     def set_orientation(self, device_name: str, orientation: int) -> None:
         """Queue orientation change for a display"""
         if device_name not in self.displays:
             return
 
-        if device_name not in self.pending_changes:
-            self.pending_changes[device_name] = {}
+        display = self.displays[device_name]
+        pending = self.pending_changes.setdefault(device_name, {})
+        before = pending.get("orientation", display.dmDisplayOrientation)
+
+        pending["orientation"] = orientation % 4
+        if before != pending["orientation"]:
+            self._touch([device_name])
+
+    def modes(self, device_name: str) -> Optional[ModeCatalogue]:
+        """Get the modes a display supports
 
-        self.pending_changes[device_name]["orientation"] = orientation % 4
+        The driver is asked once per display, later calls are answered
+        from the cached catalogue until the displays are enumerated again.
+        """
+        if device_name not in self.displays:
+            return None
+
+        catalogue = self._modes.get(device_name)
+        if catalogue is None:
+            with span("config.list_modes", device=device_name):
+                catalogue = ModeCatalogue(
+                    DisplayMode.from_devmode(mode)
+                    for mode in self.backend.list_modes(device_name)
+                )
+            self._modes[device_name] = catalogue
+        return catalogue
+
+    def set_mode(
+        self,
+        device_name: str,
+        width: int,
+        height: int,
+        refresh_rate: Optional[int] = None,
+        bits_per_pixel: Optional[int] = None,
+    ) -> None:
+        """Queue resolution and refresh rate change for a display
+
+        Without a refresh rate or color depth the best one supported at
+        that resolution is used. Raises ValueError if the display has no
+        such mode.
+        """
+        catalogue = self.modes(device_name)
+        if catalogue is None:
+            return
+
+        mode = catalogue.best_mode(width, height, refresh_rate, bits_per_pixel)
+        if mode is None:
+            rate = f" at {refresh_rate}Hz" if refresh_rate is not None else ""
+            raise ValueError(f"{device_name} does not support {width}x{height}{rate}")
+
+        display = self.displays[device_name]
+        pending = self.pending_changes.setdefault(device_name, {})
+        before = DisplayMode(
+            pending.get("width", display.dmPelsWidth),
+            pending.get("height", display.dmPelsHeight),
+            pending.get("refresh_rate", display.dmDisplayFrequency),
+            pending.get("bits_per_pixel", display.dmBitsPerPel),
+        )
+
+        pending.update(mode._asdict())
+        if before != mode:
+            self._touch([device_name])
+
+    def set_refresh_rate(self, device_name: str, refresh_rate: int) -> None:
+        """Queue refresh rate change at the display's queued resolution"""
+        info = self.get_display_info(device_name)
+        if info is not None:
+            self.set_mode(device_name, info["width"], info["height"], refresh_rate)
+
+    def export_layout(self) -> Dict[str, Dict]:
+        """Get the position and orientation of every display
+
+        Pending changes are included. The result can be given back to
+        queue_layout and is what profiles and the CLI store.
+        """
+        return {
+            device_name: {
+                "x": info["x"],
+                "y": info["y"],
+                "orientation": info["orientation"],
+            }
+            for device_name, info in self.snapshot().items()
+        }
+
+    def queue_layout(self, layout: Dict[str, Dict]) -> None:
+        """Queue the positions and orientations of an exported layout"""
+        self.set_positions(
+            {
+                device_name: (target["x"], target["y"])
+                for device_name, target in layout.items()
+                if "x" in target and "y" in target
+            }
+        )
+        for device_name, target in layout.items():
+            if "orientation" in target:
+                self.set_orientation(device_name, target["orientation"])
+
+    def plan_changes(self) -> Dict[str, Dict]:
+        """Get the pending changes that differ from the current settings
+
+        Devices whose queued values already match their DEVMODE are left
+        out, and only the fields that actually change are kept.
+        """
+        plan: Dict[str, Dict] = {}
+        for device_name, changes in self.pending_changes.items():
+            display = self.displays.get(device_name)
+            if display is None:
+                continue
+
+            current = {
+                "x": display.dmPositionX,
+                "y": display.dmPositionY,
+                "orientation": display.dmDisplayOrientation,
+                "width": display.dmPelsWidth,
+                "height": display.dmPelsHeight,
+                "refresh_rate": display.dmDisplayFrequency,
+                "bits_per_pixel": display.dmBitsPerPel,
+            }
+            changed = {
+                key: value
+                for key, value in changes.items()
+                if current.get(key) != value
+            }
+            if changed:
+                plan[device_name] = changed
+
+        return plan
+
+    def get_layout(self) -> Dict[str, Dict]:
+        """Get display information for every display, including pending changes"""
+        return {name: self.get_display_info(name) for name in self.displays}
+
+    def validate_changes(self) -> Dict:
+        """Check the layout with pending changes for overlaps and gaps"""
+        return validate_layout(self.get_layout())
+
+    def test_changes(self) -> Dict[str, int]:
+        """Ask the driver whether it would accept the pending changes
+
+        Every planned change is checked with CDS_TEST, which touches
+        neither the registry nor the live configuration. Returns the
+        verdict for each device that needs a change. An invalid layout
+        gets DISP_CHANGE_BADPARAM for every device without asking the
+        driver.
+        """
+        plan = self.plan_changes()
+        if not self.validate_changes()["valid"]:
+            return {device_name: DISP_CHANGE_BADPARAM for device_name in plan}
+
+        staged = [
+            (device_name, self._staged_settings(device_name, changes))
+            for device_name, changes in plan.items()
+        ]
+        return self._test_staged(staged)
+
+    def _test_staged(self, staged) -> Dict[str, int]:
+        with span("config.test", devices=len(staged)):
+            return {
+                device_name: self.backend.stage(device_name, display, CDS_TEST)
+                for device_name, display in staged
+            }
 
     def apply_changes(self) -> bool:
         """Apply all pending changes"""
-        success = True
-        for device_name, changes in self.pending_changes.items():
-            display = self.displays[device_name]
+        results = self.commit_changes()
+        return all(code == DISP_CHANGE_SUCCESSFUL for code in results.values())
 
-            if "x" in changes:
-                display.dmPositionX = changes["x"]
-            if "y" in changes:
-                display.dmPositionY = changes["y"]
-            if "orientation" in changes:
-                display.dmDisplayOrientation = changes["orientation"]
-
-            # Combine flags to make changes permanent
-            flags = (
-                0x00000001  # CDS_UPDATEREGISTRY
-                | 0x00000002  # CDS_NORESET
-                | 0x00000004  # CDS_GLOBAL
-            )
+    def commit_changes(self, preflight: bool = True) -> Dict[str, int]:
+        """Stage every planned change, then apply them with a single reset
 
-            # First update with NORESET flag
-            result = ctypes.windll.user32.ChangeDisplaySettingsExW(
-                device_name, ctypes.byref(display), None, flags, None
-            )
+        Returns the ChangeDisplaySettingsEx result code for each device
+        that needed a change. If the resulting layout has overlapping or
+        disconnected displays, nothing is sent to the driver, the pending
+        changes are kept and every device gets DISP_CHANGE_BADPARAM.
+
+        With ``preflight`` the changes are first checked as in
+        test_changes. If the driver rejects any device, nothing is applied,
+        the pending changes are kept and the verdicts are returned.
+        """
+        future = self.commit_changes_async(_ImmediateExecutor(), preflight=preflight)
+        if self.committing:
+            self.finish_commit(future)
+        return future.result()
+
+    @property
+    def committing(self) -> bool:
+        """Whether a commit is waiting for finish_commit"""
+        return self._in_flight is not None
 
-            # Then apply changes globally
-            ctypes.windll.user32.ChangeDisplaySettingsExW(
-                None,
-                None,
-                None,
-                0,  # APPLY NOW
-                None,
+    def commit_changes_async(
+        self,
+        executor: Executor,
+        progress: Optional[Callable[[str, int, int, int], None]] = None,
+        preflight: bool = True,
+    ) -> Future:
+        """Start committing the pending changes on an executor
+
+        The plan is made and validated on the calling thread, the driver
+        calls run on the executor. ``progress(device_name, result, done,
+        total)`` is called from the executor after each device is staged.
+        The future resolves to the same result codes as commit_changes,
+        including the preflight check.
+
+        Once the future is done, finish_commit must be called on the
+        thread that owns this object. Changes queued while the commit is
+        running stay pending, only the values that were committed are
+        cleared.
+        """
+        if self.committing:
+            raise RuntimeError("A commit is already in progress")
+
+        plan = self.plan_changes()
+        if not plan:
+            self.pending_changes.clear()
+            return _resolved({})
+        if not self.validate_changes()["valid"]:
+            return _resolved(
+                {device_name: DISP_CHANGE_BADPARAM for device_name in plan}
             )
 
-            if result != 0:  # DISP_CHANGE_SUCCESSFUL
-                success = False
+        # Stage copies so a rejected change leaves our settings intact
+        staged = [
+            (device_name, self._staged_settings(device_name, changes))
+            for device_name, changes in plan.items()
+        ]
+        committed = {
+            device_name: dict(changes)
+            for device_name, changes in self.pending_changes.items()
+        }
+        applied = threading.Event()
+        self._in_flight = (plan, committed, applied)
+        return executor.submit(
+            self._stage_and_commit, staged, progress, preflight, applied
+        )
+
+    def finish_commit(self, future: Future) -> None:
+        """Update pending changes and settings after commit_changes_async"""
+        plan, committed, applied = self._in_flight
+        self._in_flight = None
+        if future.exception() is None and not applied.is_set():
+            return  # Rejected by the preflight check, nothing was staged
+
+        if future.exception() is None:
+            for device_name, changes in committed.items():
+                pending = self.pending_changes.get(device_name)
+                if pending is None:
+                    continue
+                for key, value in changes.items():
+                    if pending.get(key) == value:
+                        del pending[key]
+                if not pending:
+                    del self.pending_changes[device_name]
+
+        self.refresh_displays(plan)  # Refresh the changed displays only
+
+    def _staged_settings(self, device_name: str, changes: Dict) -> DEVMODE:
+        display = DEVMODE.from_buffer_copy(self.displays[device_name])
+        display.dmFields = 0
+
+        if "x" in changes or "y" in changes:
+            display.dmPositionX = changes.get("x", display.dmPositionX)
+            display.dmPositionY = changes.get("y", display.dmPositionY)
+            display.dmFields |= DM_POSITION
+        if "orientation" in changes:
+            display.dmDisplayOrientation = changes["orientation"]
+            display.dmFields |= DM_DISPLAYORIENTATION
+        if "width" in changes or "height" in changes:
+            display.dmPelsWidth = changes.get("width", display.dmPelsWidth)
+            display.dmPelsHeight = changes.get("height", display.dmPelsHeight)
+            display.dmFields |= DM_PELSWIDTH | DM_PELSHEIGHT
+        if "refresh_rate" in changes:
+            display.dmDisplayFrequency = changes["refresh_rate"]
+            display.dmFields |= DM_DISPLAYFREQUENCY
+        if "bits_per_pixel" in changes:
+            display.dmBitsPerPel = changes["bits_per_pixel"]
+            display.dmFields |= DM_BITSPERPEL
+        return display
+
+    def _stage_and_commit(
+        self, staged, progress=None, preflight=True, applied=None
+    ) -> Dict[str, int]:
+        """Send staged settings to the driver, touching no other state
+
+        Sets ``applied`` once the settings have been committed.
+        """
+        if preflight:
+            verdicts = self._test_staged(staged)
+            if any(code != DISP_CHANGE_SUCCESSFUL for code in verdicts.values()):
+                return verdicts
+
+        results: Dict[str, int] = {}
+        for done, (device_name, display) in enumerate(staged, 1):
+            # Write to the registry without resetting the mode yet
+            with span("config.stage", device=device_name):
+                results[device_name] = self.backend.stage(
+                    device_name,
+                    display,
+                    CDS_UPDATEREGISTRY | CDS_NORESET | CDS_GLOBAL,
+                )
+            if progress is not None:
+                progress(device_name, results[device_name], done, len(staged))
+
+        # Apply all staged changes at once
+        with span("config.commit", devices=len(staged)):
+            self.backend.commit()
+        if applied is not None:
+            applied.set()
+        return results
 
+    def restore_pending(self, pending: Dict[str, Dict]) -> None:
+        """Replace every pending change, positions and modes alike"""
+        changed = set(self.pending_changes) | set(pending)
         self.pending_changes.clear()
-        self.enumerate_displays()  # Refresh display information
-        return success
+        self.pending_changes.update(copy.deepcopy(pending))
+        if changed:
+            self._touch(changed)
 
     def discard_changes(self) -> None:
         """Discard all pending changes"""
+        discarded = list(self.pending_changes)
         self.pending_changes.clear()
+        if discarded:
+            self._touch(discarded)
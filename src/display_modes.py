@@ -0,0 +1,97 @@
+# display_modes.py
+"""Catalogue of the display modes a device supports
+
+The driver lists modes one index at a time, which is slow and returns
+duplicates. DisplayConfig reads them once per device and keeps them in a
+ModeCatalogue, so questions like "the best mode for 2560x1440" are
+answered with a dict lookup instead of another walk over the driver.
+"""
+
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class DisplayMode(NamedTuple):
+    width: int
+    height: int
+    refresh_rate: int
+    bits_per_pixel: int
+
+    @classmethod
+    def from_devmode(cls, devmode) -> "DisplayMode":
+        """Get the mode described by a DEVMODE"""
+        return cls(
+            devmode.dmPelsWidth,
+            devmode.dmPelsHeight,
+            devmode.dmDisplayFrequency,
+            devmode.dmBitsPerPel,
+        )
+
+
+class ModeCatalogue:
+    """Supported modes of one display, indexed for lookups
+
+    Modes are keyed by (width, height, refresh_rate, bits_per_pixel) and
+    grouped by resolution with the best mode first.
+    """
+
+    __slots__ = ("_modes", "_by_resolution")
+
+    def __init__(self, modes: Iterable[DisplayMode] = ()):
+        self._modes = frozenset(DisplayMode(*mode) for mode in modes)
+
+        by_resolution: Dict[Tuple[int, int], List[DisplayMode]] = {}
+        for mode in self._modes:
+            by_resolution.setdefault((mode.width, mode.height), []).append(mode)
+        for resolution_modes in by_resolution.values():
+            resolution_modes.sort(
+                key=lambda mode: (mode.refresh_rate, mode.bits_per_pixel),
+                reverse=True,
+            )
+        self._by_resolution = by_resolution
+
+    def __contains__(self, mode) -> bool:
+        return mode in self._modes
+
+    def __len__(self) -> int:
+        return len(self._modes)
+
+    def __iter__(self) -> Iterator[DisplayMode]:
+        for resolution in self.resolutions():
+            yield from self._by_resolution[resolution]
+
+    def resolutions(self) -> List[Tuple[int, int]]:
+        """Get every supported resolution, largest first"""
+        return sorted(
+            self._by_resolution,
+            key=lambda resolution: (resolution[0] * resolution[1], resolution),
+            reverse=True,
+        )
+
+    def refresh_rates(self, width: int, height: int) -> List[int]:
+        """Get the refresh rates supported at a resolution, highest first"""
+        rates: List[int] = []
+        for mode in self._by_resolution.get((width, height), ()):
+            if mode.refresh_rate not in rates:
+                rates.append(mode.refresh_rate)
+        return rates
+
+    def best_mode(
+        self,
+        width: int,
+        height: int,
+        refresh_rate: Optional[int] = None,
+        bits_per_pixel: Optional[int] = None,
+    ) -> Optional[DisplayMode]:
+        """Get the best mode at a resolution
+
+        Picks the highest refresh rate and color depth unless they are
+        given. Returns None when the resolution or the requested values
+        are not supported.
+        """
+        for mode in self._by_resolution.get((width, height), ()):
+            if refresh_rate is not None and mode.refresh_rate != refresh_rate:
+                continue
+            if bits_per_pixel is not None and mode.bits_per_pixel != bits_per_pixel:
+                continue
+            return mode
+        return None
@@ -0,0 +1,273 @@
+# hotplug.py
+"""Watch for display topology changes and reapply saved profiles
+
+A change source wakes the watcher when displays are connected,
+disconnected or reconfigured. Bursts of events, such as those sent while
+a dock comes up, are merged into a single re-enumeration, after which the
+saved profile for the new monitor set is applied with one commit.
+
+Applying a profile makes Windows send WM_DISPLAYCHANGE again. Changes
+that follow the watcher's own commit without changing the monitor set
+are not reapplied, so a layout Windows adjusts cannot cause a loop.
+"""
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from src.display_backend import DISP_CHANGE_SUCCESSFUL
+from src.display_config import DisplayConfig
+from src.instrumentation import span
+from src.profiles import ProfileStore, config_fingerprint
+
+# Events closer together than this (in seconds) are merged
+DEBOUNCE_SECONDS = 0.5
+# A burst is handled at most this long after its first event, even if
+# events keep arriving
+MAX_DELAY_SECONDS = 2.0
+# Number of handled changes kept in HotplugWatcher.history
+HISTORY_SIZE = 100
+# Changes starting this soon after the watcher's own commit are taken as
+# its echo if the same monitors are connected
+ECHO_SECONDS = 5.0
+# Changes handled later than this after their first event are reported
+# as over budget
+LATENCY_BUDGET_SECONDS = 5.0
+
+
+class ChangeSource:
+    """Blocking source of display change events
+
+    Subclasses call ``signal()`` when the topology changes. Waiting blocks
+    on a condition variable, so an idle watcher uses no CPU.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._pending = 0
+        self.closed = False
+
+    def signal(self) -> None:
+        """Report a change event"""
+        with self._condition:
+            self._pending += 1
+            self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for change events, returning True if any arrived
+
+        All events received so far are consumed. Returns False on timeout
+        or once the source is closed.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._pending or self.closed, timeout=timeout
+            )
+            if self.closed or not self._pending:
+                return False
+            self._pending = 0
+            return True
+
+    def close(self) -> None:
+        """Stop the source and wake up every waiter"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class ScriptedChangeSource(ChangeSource):
+    """Change source driven by calls to ``notify``, for tests and scripts"""
+
+    def notify(self, count: int = 1) -> None:
+        """Send one or more change events"""
+        for _ in range(count):
+            self.signal()
+
+
+class Win32ChangeSource(ChangeSource):
+    """Change source listening for WM_DISPLAYCHANGE
+
+    Runs a hidden window with its own message loop on a daemon thread.
+    pywin32 is imported when the source is created.
+    """
+
+    def __init__(self):
+        super().__init__()
+        import win32con
+        import win32gui
+
+        self._win32con = win32con
+        self._win32gui = win32gui
+        self._hwnd = None
+        self._error: Optional[BaseException] = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._message_loop, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def _message_loop(self) -> None:
+        win32con, win32gui = self._win32con, self._win32gui
+
+        def window_proc(hwnd, message, wparam, lparam):
+            if message == win32con.WM_DISPLAYCHANGE:
+                self.signal()
+                return 0
+            if message == win32con.WM_DESTROY:
+                win32gui.PostQuitMessage(0)
+                return 0
+            return win32gui.DefWindowProc(hwnd, message, wparam, lparam)
+
+        try:
+            window_class = win32gui.WNDCLASS()
+            window_class.lpszClassName = "MonitorLayoutHotplug"
+            window_class.lpfnWndProc = window_proc
+            class_atom = win32gui.RegisterClass(window_class)
+            # A hidden top-level window, message-only windows get no broadcasts
+            self._hwnd = win32gui.CreateWindow(
+                class_atom, "Monitor Layout Hotplug", 0, 0, 0, 0, 0, 0, 0, 0, None
+            )
+        except BaseException as e:  # Raised again by __init__
+            self._error = e
+            return
+        finally:
+            self._ready.set()
+        win32gui.PumpMessages()
+
+    def close(self) -> None:
+        """Stop the message loop and wake up every waiter"""
+        if self._hwnd is not None:
+            self._win32gui.PostMessage(self._hwnd, self._win32con.WM_CLOSE, 0, 0)
+            self._hwnd = None
+        super().close()
+
+
+class HotplugWatcher:
+    """Re-enumerate displays and reapply profiles when the topology changes
+
+    ``profile`` names the preferred profile. If it does not match the
+    connected monitors, the most recently added matching profile is used.
+    Every handled change is appended to ``history`` and passed to
+    ``on_change``. A change that fails is reported with an ``error``
+    and the watcher keeps running. Events handled later than
+    ``latency_budget`` seconds after they arrived are marked
+    ``over_budget``.
+    """
+
+    def __init__(
+        self,
+        config: DisplayConfig,
+        store: ProfileStore,
+        source: ChangeSource,
+        profile: Optional[str] = None,
+        debounce: float = DEBOUNCE_SECONDS,
+        max_delay: float = MAX_DELAY_SECONDS,
+        on_change: Optional[Callable[[Dict], None]] = None,
+        latency_budget: float = LATENCY_BUDGET_SECONDS,
+        echo_window: float = ECHO_SECONDS,
+    ):
+        self.config = config
+        self.store = store
+        self.source = source
+        self.profile = profile
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.on_change = on_change
+        self.latency_budget = latency_budget
+        self.echo_window = echo_window
+        # Profile, monitor fingerprint and time of the last reapply
+        self._last_apply: Optional[Tuple[str, str, float]] = None
+        self.history: Deque[Dict] = deque(maxlen=HISTORY_SIZE)
+        self.stopped = False
+
+    def run(self) -> None:
+        """Handle change events until the source is closed"""
+        while not self.source.closed:
+            if not self.source.wait():
+                continue
+
+            # Keep merging events until the burst settles
+            first_event = time.monotonic()
+            while True:
+                remaining = self.max_delay - (time.monotonic() - first_event)
+                if remaining <= 0 or not self.source.wait(
+                    min(self.debounce, remaining)
+                ):
+                    break
+            if self.source.closed:
+                break
+
+            self.handle_change(first_event)
+
+    def stop(self) -> None:
+        """Make run() return"""
+        self.stopped = True
+        self.source.close()
+
+    def choose_profile(self) -> Optional[str]:
+        """Get the profile to apply to the connected monitors"""
+        matching = self.store.profiles_for(self.config)
+        if self.profile in matching:
+            return self.profile
+        return matching[-1] if matching else None
+
+    def _is_echo(self, name: str, first_event: float) -> bool:
+        """Whether a change was caused by the watcher applying this profile"""
+        if self._last_apply is None:
+            return False
+        last_name, fingerprint, applied_at = self._last_apply
+        return (
+            name == last_name
+            and first_event - applied_at <= self.echo_window
+            and fingerprint == config_fingerprint(self.config)
+        )
+
+    def handle_change(self, first_event: Optional[float] = None) -> Dict:
+        """Re-enumerate displays and apply the matching profile"""
+        if first_event is None:
+            first_event = time.monotonic()
+
+        name = None
+        results: Dict[str, int] = {}
+        error = None
+        echo = False
+        with span("hotplug.handle_change"):
+            try:
+                self.config.discard_changes()
+                self.config.enumerate_displays()
+                # Profiles may have been saved by another process meanwhile
+                self.store.load()
+                if self.store.load_error:
+                    raise ValueError(self.store.load_error)
+
+                name = self.choose_profile()
+                echo = name is not None and self._is_echo(name, first_event)
+                if name is not None and not echo:
+                    results = self.store.apply_profile(name, self.config)
+                    self._last_apply = (
+                        name,
+                        config_fingerprint(self.config),
+                        time.monotonic(),
+                    )
+            except Exception as e:  # Report it and wait for the next change
+                error = f"{type(e).__name__}: {e}"
+
+        latency = time.monotonic() - first_event
+        event = {
+            "time": time.time(),
+            "displays": len(self.config.displays),
+            "profile": name,
+            "results": results,
+            "echo": echo,
+            "ok": error is None
+            and all(code == DISP_CHANGE_SUCCESSFUL for code in results.values()),
+            "latency": latency,
+            "over_budget": latency > self.latency_budget,
+        }
+        if error is not None:
+            event["error"] = error
+        self.history.append(event)
+        if self.on_change is not None:
+            self.on_change(event)
+        return event
@@ -0,0 +1,157 @@
+# instrumentation.py
+"""Timing spans for the hot paths
+
+Spans are recorded into a fixed size ring buffer while tracing is
+enabled. Disabled tracing costs one attribute check per span:
+
+    with span("canvas.redraw"):
+        ...
+
+Whole functions can be timed with the ``traced`` decorator. Tracing
+starts enabled when the MONITOR_LAYOUT_TRACE environment variable
+is set, or with ``tracer.enable()``.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+# Spans kept in the ring buffer, older ones are dropped
+DEFAULT_CAPACITY = 10000
+PERCENTILES = (50, 90, 99)
+
+_NO_SPAN = nullcontext()
+
+
+class Span(NamedTuple):
+    name: str
+    start: float  # perf_counter seconds
+    duration: float  # seconds
+    thread: int
+    args: Optional[Dict]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Get a percentile of sorted values by linear interpolation"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+class Tracer:
+    """Collect timing spans in a ring buffer"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: Deque[Span] = deque(maxlen=capacity)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+    def span(self, name: str, **args):
+        """Time a block, doing nothing while tracing is disabled"""
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(name, args or None)
+
+    @contextmanager
+    def _span(self, name: str, args: Optional[Dict]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # deque.append is atomic, so worker threads can record too
+            self.spans.append(
+                Span(
+                    name,
+                    start,
+                    time.perf_counter() - start,
+                    threading.get_ident(),
+                    args,
+                )
+            )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Get the count and duration percentiles of every span name, in ms"""
+        durations: Dict[str, List[float]] = {}
+        for recorded in list(self.spans):
+            durations.setdefault(recorded.name, []).append(recorded.duration * 1000)
+
+        summary = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            summary[name] = {"count": len(values), "max": values[-1]}
+            for pct in PERCENTILES:
+                summary[name][f"p{pct}"] = percentile(values, pct)
+        return summary
+
+    def export_json(self) -> str:
+        """Get the recorded spans and their summary as JSON"""
+        return json.dumps(
+            {
+                "spans": [recorded._asdict() for recorded in list(self.spans)],
+                "summary": self.summary(),
+            },
+            indent=2,
+        )
+
+    def export_chrome_trace(self) -> str:
+        """Get the recorded spans in the Chrome trace event format
+
+        The result can be loaded in chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": recorded.name,
+                "ph": "X",
+                "ts": recorded.start * 1e6,
+                "dur": recorded.duration * 1e6,
+                "pid": pid,
+                "tid": recorded.thread,
+                "args": recorded.args or {},
+            }
+            for recorded in list(self.spans)
+        ]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+# Process wide tracer used by the instrumented modules
+tracer = Tracer(enabled=bool(os.environ.get("MONITOR_LAYOUT_TRACE")))
+
+
+def span(name: str, **args):
+    """Time a block with the process wide tracer"""
+    if not tracer.enabled:
+        return _NO_SPAN
+    return tracer._span(name, args or None)
+
+
+def traced(name: str):
+    """Time every call of the decorated function with the process wide tracer"""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with tracer._span(name, None):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,368 @@
+# ipc_server.py
+"""Local JSON-RPC control API for DisplayConfig
+
+The server listens on a named pipe on Windows and on a Unix domain socket
+elsewhere. It keeps one DisplayConfig warm between calls. Every message is
+a JSON-RPC 2.0 request or response:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "set_position",
+     "params": {"device": "\\\\.\\DISPLAY2", "x": 1920, "y": 0}}
+
+Methods: enumerate, snapshot, modes, set_position, set_orientation,
+set_mode, test, apply, discard and batch. A batch runs a list of set_position,
+set_orientation and set_mode operations. With ``apply`` set it then commits them once.
+If an operation or the commit fails, the pending changes are rolled back.
+"""
+
+import copy
+import inspect
+import json
+import os
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional
+
+from src.display_backend import DISP_CHANGE_SUCCESSFUL
+from src.display_config import DisplayConfig
+from src.instrumentation import span
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+APPLY_FAILED = -32000
+
+# Operations allowed inside a batch
+BATCH_METHODS = ("set_position", "set_orientation", "set_mode")
+
+
+def default_address() -> str:
+    """Get the per-user address of the server"""
+    if sys.platform == "win32":
+        return r"\\.\pipe\monitor-layout-" + os.environ.get("USERNAME", "user")
+    return os.path.join(tempfile.gettempdir(), f"monitor-layout-{os.getuid()}.sock")
+
+
+class IpcError(Exception):
+    """A JSON-RPC error, raised by handlers and by IpcClient"""
+
+    def __init__(self, code: int, message: str, data=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class IpcServer:
+    """Serve DisplayConfig operations to local clients
+
+    Each connection is handled on its own thread. Calls are serialized
+    with a lock, so every batch sees and leaves a consistent layout.
+    """
+
+    def __init__(
+        self,
+        config: DisplayConfig,
+        address: Optional[str] = None,
+        authkey: Optional[bytes] = None,
+    ):
+        self.config = config
+        self.address = address or default_address()
+        self.authkey = authkey
+        self.listener: Optional[Listener] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.methods = {
+            "enumerate": self.rpc_enumerate,
+            "snapshot": self.rpc_snapshot,
+            "set_position": self.rpc_set_position,
+            "set_orientation": self.rpc_set_orientation,
+            "modes": self.rpc_modes,
+            "set_mode": self.rpc_set_mode,
+            "test": self.rpc_test,
+            "apply": self.rpc_apply,
+            "discard": self.rpc_discard,
+            "batch": self.rpc_batch,
+        }
+
+    def start(self) -> None:
+        """Start listening, removing a socket left behind by a dead server"""
+        if not self.address.startswith("\\\\") and os.path.exists(self.address):
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                os.unlink(self.address)
+            else:
+                raise RuntimeError(f"A server is already listening on {self.address}")
+        self.listener = Listener(self.address, authkey=self.authkey)
+
+    def serve_forever(self) -> None:
+        """Accept connections until close() is called"""
+        if self.listener is None:
+            self.start()
+        while not self._closed:
+            try:
+                connection = self.listener.accept()
+            except (OSError, EOFError):
+                if self._closed:
+                    break
+                continue  # A client that failed the handshake
+            threading.Thread(
+                target=self._serve_connection, args=(connection,), daemon=True
+            ).start()
+
+    def close(self) -> None:
+        """Stop accepting connections"""
+        self._closed = True
+        if self.listener is not None:
+            listener, self.listener = self.listener, None
+            # Wake up accept() so serve_forever can return
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+            listener.close()
+
+    def _serve_connection(self, connection) -> None:
+        with connection:
+            while True:
+                try:
+                    message = connection.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                connection.send_bytes(self.handle_message(message))
+
+    def handle_message(self, message: bytes) -> bytes:
+        """Handle one encoded JSON-RPC request"""
+        request_id = None
+        try:
+            try:
+                request = json.loads(message)
+            except ValueError as e:
+                raise IpcError(PARSE_ERROR, f"Invalid JSON: {e}")
+            if not isinstance(request, dict) or not isinstance(
+                request.get("method"), str
+            ):
+                raise IpcError(INVALID_REQUEST, "Expected a JSON-RPC request object")
+
+            request_id = request.get("id")
+            result = self.call(request["method"], request.get("params") or {})
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except IpcError as e:
+            error = {"code": e.code, "message": e.message}
+            if e.data is not None:
+                error["data"] = e.data
+            response = {"jsonrpc": "2.0", "id": request_id, "error": error}
+        except Exception as e:  # A bug or a backend failure, keep serving
+            error = {"code": INTERNAL_ERROR, "message": f"{type(e).__name__}: {e}"}
+            response = {"jsonrpc": "2.0", "id": request_id, "error": error}
+        return json.dumps(response).encode("utf-8")
+
+    def call(self, method: str, params: Dict):
+        """Run a method with the config lock held"""
+        handler = self.methods.get(method)
+        if handler is None:
+            raise IpcError(METHOD_NOT_FOUND, f"Unknown method {method}")
+        if not isinstance(params, dict):
+            raise IpcError(INVALID_PARAMS, "Params must be an object")
+
+        self._check_params(handler, params)
+        with self._lock, span(f"ipc.{method}"):
+            return handler(**params)
+
+    @staticmethod
+    def _check_params(handler, params: Dict, prefix: str = "") -> None:
+        """Raise INVALID_PARAMS unless the handler accepts the params"""
+        try:
+            inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            raise IpcError(INVALID_PARAMS, f"{prefix}{e}")
+
+    def _check_device(self, device: str) -> None:
+        if device not in self.config.displays:
+            raise IpcError(INVALID_PARAMS, f"Unknown display {device}")
+
+    def rpc_enumerate(self) -> List[Dict]:
+        """Re-read the connected displays"""
+        self.config.enumerate_displays()
+        return self.rpc_snapshot()["displays"]
+
+    def rpc_snapshot(self) -> Dict:
+        """Get the layout with pending changes and its version"""
+        return {
+            "version": self.config.version,
+            "displays": [dict(info) for info in self.config.snapshot().values()],
+            # Copied, the response is encoded after the lock is released
+            "pending": copy.deepcopy(self.config.pending_changes),
+        }
+
+    def rpc_set_position(self, device: str, x: int, y: int) -> int:
+        """Queue a position change, returning the new version"""
+        self._check_device(device)
+        if not isinstance(x, int) or not isinstance(y, int):
+            raise IpcError(INVALID_PARAMS, "x and y must be integers")
+        self.config.set_position(device, x, y)
+        return self.config.version
+
+    def rpc_set_orientation(self, device: str, degrees: int) -> int:
+        """Queue a rotation of 0, 90, 180 or 270 degrees"""
+        self._check_device(device)
+        if degrees not in (0, 90, 180, 270):
+            raise IpcError(INVALID_PARAMS, "degrees must be 0, 90, 180 or 270")
+        self.config.set_orientation(device, degrees // 90)
+        return self.config.version
+
+    def rpc_modes(self, device: str) -> List[Dict]:
+        """Get the modes a display supports, best first"""
+        self._check_device(device)
+        return [mode._asdict() for mode in self.config.modes(device)]
+
+    def rpc_set_mode(
+        self,
+        device: str,
+        width: int,
+        height: int,
+        refresh_rate: Optional[int] = None,
+    ) -> int:
+        """Queue a resolution and refresh rate change"""
+        self._check_device(device)
+        try:
+            self.config.set_mode(device, width, height, refresh_rate)
+        except ValueError as e:
+            raise IpcError(INVALID_PARAMS, str(e))
+        return self.config.version
+
+    def rpc_test(self) -> Dict[str, int]:
+        """Ask the driver whether it would accept the pending changes"""
+        return self.config.test_changes()
+
+    def rpc_apply(self) -> Dict[str, int]:
+        """Commit the pending changes"""
+        results = self.config.commit_changes()
+        if any(code != DISP_CHANGE_SUCCESSFUL for code in results.values()):
+            raise IpcError(APPLY_FAILED, "Failed to apply changes", results)
+        return results
+
+    def rpc_discard(self) -> None:
+        """Drop the pending changes"""
+        self.config.discard_changes()
+
+    def rpc_batch(self, operations: List[Dict], apply: bool = True) -> Dict:
+        """Run several operations atomically, committing them once
+
+        A batch with ``apply`` set commits only its own operations, so it
+        is refused while other changes are pending. If any operation is
+        invalid, or the driver rejects the changes, the pending changes
+        are restored to what they were before the batch. When the driver
+        passed the test but then rejected some devices after others were
+        committed, the enumerated layout is committed again.
+        """
+        if not isinstance(operations, list):
+            raise IpcError(INVALID_PARAMS, "operations must be a list")
+        if apply and self.config.pending_changes:
+            raise IpcError(
+                INVALID_REQUEST, "Apply or discard the pending changes first"
+            )
+
+        pending = copy.deepcopy(self.config.pending_changes)
+        # The live settings, without anything queued
+        before = {
+            device: {
+                "x": display.dmPositionX,
+                "y": display.dmPositionY,
+                "orientation": display.dmDisplayOrientation,
+                "width": display.dmPelsWidth,
+                "height": display.dmPelsHeight,
+                "refresh_rate": display.dmDisplayFrequency,
+                "bits_per_pixel": display.dmBitsPerPel,
+            }
+            for device, display in self.config.displays.items()
+        }
+
+        def rollback():
+            self.config.restore_pending(pending)
+
+        try:
+            for index, operation in enumerate(operations):
+                method = (
+                    operation.get("method") if isinstance(operation, dict) else None
+                )
+                if method not in BATCH_METHODS:
+                    raise IpcError(
+                        INVALID_PARAMS, f"Operation {index} cannot be batched"
+                    )
+                params = operation.get("params") or {}
+                if not isinstance(params, dict):
+                    raise IpcError(
+                        INVALID_PARAMS, f"Operation {index}: params must be an object"
+                    )
+                handler = self.methods[method]
+                self._check_params(handler, params, f"Operation {index}: ")
+                handler(**params)
+        except Exception:
+            rollback()
+            raise
+
+        if not apply:
+            return {"version": self.config.version, "results": {}}
+
+        verdicts = self.config.test_changes()
+        if any(code != DISP_CHANGE_SUCCESSFUL for code in verdicts.values()):
+            rollback()
+            raise IpcError(APPLY_FAILED, "Driver rejected the batch", verdicts)
+
+        # Already tested above
+        results = self.config.commit_changes(preflight=False)
+        if all(code == DISP_CHANGE_SUCCESSFUL for code in results.values()):
+            return {"version": self.config.version, "results": results}
+
+        if any(code == DISP_CHANGE_SUCCESSFUL for code in results.values()):
+            # Some devices changed, put them back the way they were
+            self.config.restore_pending(
+                {device: before[device] for device in results if device in before}
+            )
+            self.config.commit_changes()
+        rollback()
+        raise IpcError(APPLY_FAILED, "Failed to apply batch", results)
+
+
+class IpcClient:
+    """Connection to an IpcServer"""
+
+    def __init__(self, address: Optional[str] = None, authkey: Optional[bytes] = None):
+        self.connection = Client(address or default_address(), authkey=authkey)
+        self._next_id = 0
+
+    def __enter__(self) -> "IpcClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def call(self, method: str, **params):
+        """Call a method, raising IpcError if it fails"""
+        self._next_id += 1
+        request = {
+            "jsonrpc": "2.0",
+            "id": self._next_id,
+            "method": method,
+            "params": params,
+        }
+        self.connection.send_bytes(json.dumps(request).encode("utf-8"))
+        response = json.loads(self.connection.recv_bytes())
+
+        error = response.get("error")
+        if error is not None:
+            raise IpcError(error["code"], error["message"], error.get("data"))
+        return response["result"]
+
+    def batch(self, operations: List[Dict], apply: bool = True) -> Dict:
+        """Run ``{"method": ..., "params": {...}}`` operations atomically"""
+        return self.call("batch", operations=operations, apply=apply)
@@ -0,0 +1,193 @@
+# layout_model.py
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Rect = Tuple[int, int, int, int]
+
+# Keys of a display view, matching DisplayConfig.get_display_info
+DISPLAY_KEYS = (
+    "name",
+    "x",
+    "y",
+    "width",
+    "height",
+    "orientation",
+    "refresh_rate",
+    "is_primary",
+)
+
+_COLUMNS = (
+    ("x", "q"),
+    ("y", "q"),
+    ("width", "q"),
+    ("height", "q"),
+    ("orientation", "B"),
+    ("refresh_rate", "H"),
+    ("is_primary", "B"),
+)
+
+
+class DisplayView(Mapping):
+    """Read-only view of one display row in a LayoutModel
+
+    Behaves like the dictionary returned by
+    ``DisplayConfig.get_display_info`` without copying the row.
+    """
+
+    __slots__ = ("_model", "_row")
+
+    def __init__(self, model: "LayoutModel", row: int):
+        self._model = model
+        self._row = row
+
+    def __getitem__(self, key: str):
+        model = self._model
+        if key == "name":
+            return model.names[self._row]
+        if key == "is_primary":
+            return bool(model.is_primary[self._row])
+        if key not in DISPLAY_KEYS:
+            raise KeyError(key)
+        return getattr(model, key)[self._row]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(DISPLAY_KEYS)
+
+    def __len__(self) -> int:
+        return len(DISPLAY_KEYS)
+
+    def __repr__(self) -> str:
+        return f"DisplayView({dict(self)!r})"
+
+
+class LayoutModel(Mapping):
+    """Display geometry stored as one typed array per field
+
+    Maps display names to DisplayView records. Batch operations such as
+    translate, bounds and the arrangement passes work on whole columns.
+    A frozen copy made with ``freeze()`` rejects all changes and is what
+    ``DisplayConfig.snapshot()`` hands out.
+    """
+
+    __slots__ = ("names", "_rows", "_views", "_frozen") + tuple(
+        name for name, _ in _COLUMNS
+    )
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._views: List[Optional[DisplayView]] = []
+        self._frozen = False
+        for name, typecode in _COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __getitem__(self, name: str) -> DisplayView:
+        row = self._rows[name]
+        view = self._views[row]
+        if view is None:
+            view = self._views[row] = DisplayView(self, row)
+        return view
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name) -> bool:
+        return name in self._rows
+
+    def _check_mutable(self) -> None:
+        if self._frozen:
+            raise TypeError("Frozen layout models cannot be changed")
+
+    def set_display(
+        self,
+        name: str,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        orientation: int = 0,
+        refresh_rate: int = 0,
+        is_primary: bool = False,
+    ) -> None:
+        """Add a display or overwrite all of its fields"""
+        self._check_mutable()
+        values = (x, y, width, height, orientation, refresh_rate, int(is_primary))
+
+        row = self._rows.get(name)
+        if row is None:
+            self._rows[name] = len(self.names)
+            self.names.append(name)
+            self._views.append(None)
+            for (column, _), value in zip(_COLUMNS, values):
+                getattr(self, column).append(value)
+        else:
+            for (column, _), value in zip(_COLUMNS, values):
+                getattr(self, column)[row] = value
+
+    def set_position(self, name: str, x: int, y: int) -> None:
+        """Move a single display"""
+        self._check_mutable()
+        row = self._rows[name]
+        self.x[row] = x
+        self.y[row] = y
+
+    def clear(self) -> None:
+        """Remove all displays"""
+        self._check_mutable()
+        self.names.clear()
+        self._rows.clear()
+        self._views.clear()
+        for name, _ in _COLUMNS:
+            del getattr(self, name)[:]
+
+    def freeze(self) -> "LayoutModel":
+        """Get a read-only copy of the current layout"""
+        frozen = LayoutModel.__new__(LayoutModel)
+        frozen.names = list(self.names)
+        frozen._rows = self._rows.copy()
+        frozen._views = [None] * len(self.names)
+        frozen._frozen = True
+        for name, typecode in _COLUMNS:
+            setattr(frozen, name, array(typecode, getattr(self, name)))
+        return frozen
+
+    def translate(self, dx: int, dy: int) -> None:
+        """Move every display by the same offset"""
+        self._check_mutable()
+        self.x = array("q", [x + dx for x in self.x])
+        self.y = array("q", [y + dy for y in self.y])
+
+    def rects(self) -> Dict[str, Rect]:
+        """Get the ``(x0, y0, x1, y1)`` rectangle of every display"""
+        return {
+            name: (x, y, x + w, y + h)
+            for name, x, y, w, h in zip(
+                self.names, self.x, self.y, self.width, self.height
+            )
+        }
+
+    def bounds(self) -> Optional[Rect]:
+        """Get the rectangle enclosing every display"""
+        if not self.names:
+            return None
+        return (
+            min(self.x),
+            min(self.y),
+            max(map(int.__add__, self.x, self.width)),
+            max(map(int.__add__, self.y, self.height)),
+        )
+
+    def arrange_horizontal(self) -> Dict[str, Tuple[int, int]]:
+        """Get positions that put every display in one row, in order"""
+        offsets = accumulate(self.width[:-1], initial=0)
+        return {name: (x, 0) for name, x in zip(self.names, offsets)}
+
+    def arrange_vertical(self) -> Dict[str, Tuple[int, int]]:
+        """Get positions that stack every display in one column, in order"""
+        offsets = accumulate(self.height[:-1], initial=0)
+        return {name: (0, y) for name, y in zip(self.names, offsets)}
@@ -0,0 +1,164 @@
+# layout_validator.py
+import heapq
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+# Displays closer than this (in pixels) without touching are reported as gaps
+MAX_GAP = 64
+
+
+class _DisjointSet:
+    def __init__(self, names):
+        self.parent = {name: name for name in names}
+
+    def find(self, name: str) -> str:
+        parent = self.parent
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    def union(self, a: str, b: str) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def validate_layout(displays: Dict[str, Dict], max_gap: int = MAX_GAP) -> Dict:
+    """Check a layout for overlapping and disconnected displays
+
+    ``displays`` maps display names to dictionaries with ``x``, ``y``,
+    ``width`` and ``height`` as returned by
+    ``DisplayConfig.get_display_info``. A sweep line over the left edges
+    keeps the displays whose horizontal extent (plus ``max_gap``) it
+    reaches ordered by their top edge, and compares each display only
+    with those that are also within ``max_gap`` vertically. Tall columns
+    and stacks therefore cost O(n log n) plus the number of nearby pairs.
+
+    Returns a dictionary with:
+
+    - ``valid``: True if nothing overlaps and all displays are connected
+    - ``overlaps``: ``{"displays": (a, b), "rect": (x0, y0, x1, y1)}``
+    - ``gaps``: ``{"displays": (a, b), "axis": "x" | "y", "distance": d,
+      "rect": (x0, y0, x1, y1)}`` for near misses between displays that
+      end up in different islands
+    - ``islands``: groups of displays connected through shared edges
+    """
+    rects = {
+        name: (
+            info["x"],
+            info["y"],
+            info["x"] + info["width"],
+            info["y"] + info["height"],
+        )
+        for name, info in displays.items()
+    }
+    islands = _DisjointSet(rects)
+    overlaps: List[Dict] = []
+    near_misses: List[Dict] = []
+
+    # Any display ending below this reach starts at most this far above
+    max_height = max((rect[3] - rect[1] for rect in rects.values()), default=0)
+
+    expiry: List[Tuple[int, str]] = []  # heap of (right edge + max_gap, name)
+    active: List[Tuple[int, str]] = []  # (top edge, name), sorted
+    for name in sorted(rects, key=lambda n: rects[n][0]):
+        x0, y0, x1, y1 = rects[name]
+
+        # Drop displays that end too far to the left to interact
+        while expiry and expiry[0][0] < x0:
+            _, gone = heapq.heappop(expiry)
+            del active[bisect_left(active, (rects[gone][1], gone))]
+
+        start = bisect_left(active, (y0 - max_gap - max_height,))
+        for _, other in active[start:]:
+            ox0, oy0, ox1, oy1 = rects[other]
+            if oy0 > y1 + max_gap:
+                break  # This and every later display start too far below
+            if oy1 < y0 - max_gap:
+                continue
+            overlap_x = min(x1, ox1) - max(x0, ox0)
+            overlap_y = min(y1, oy1) - max(y0, oy0)
+
+            if overlap_x > 0 and overlap_y > 0:
+                overlaps.append(
+                    {
+                        "displays": (other, name),
+                        "rect": (
+                            max(x0, ox0),
+                            max(y0, oy0),
+                            min(x1, ox1),
+                            min(y1, oy1),
+                        ),
+                    }
+                )
+                islands.union(name, other)
+            elif (overlap_x == 0 and overlap_y > 0) or (
+                overlap_y == 0 and overlap_x > 0
+            ):
+                # Sharing part of an edge connects two displays
+                islands.union(name, other)
+            elif overlap_y > 0 and -max_gap <= overlap_x < 0:
+                near_misses.append(
+                    {
+                        "displays": (other, name),
+                        "axis": "x",
+                        "distance": -overlap_x,
+                        "rect": (
+                            min(x1, ox1),
+                            max(y0, oy0),
+                            max(x0, ox0),
+                            min(y1, oy1),
+                        ),
+                    }
+                )
+            elif overlap_x > 0 and -max_gap <= overlap_y < 0:
+                near_misses.append(
+                    {
+                        "displays": (other, name),
+                        "axis": "y",
+                        "distance": -overlap_y,
+                        "rect": (
+                            max(x0, ox0),
+                            min(y1, oy1),
+                            min(x1, ox1),
+                            max(y0, oy0),
+                        ),
+                    }
+                )
+
+        heapq.heappush(expiry, (x1 + max_gap, name))
+        insort(active, (y0, name))
+
+    groups: Dict[str, List[str]] = {}
+    for name in rects:
+        groups.setdefault(islands.find(name), []).append(name)
+
+    gaps = [
+        gap
+        for gap in near_misses
+        if islands.find(gap["displays"][0]) != islands.find(gap["displays"][1])
+    ]
+
+    return {
+        "valid": not overlaps and len(groups) <= 1,
+        "overlaps": overlaps,
+        "gaps": gaps,
+        "islands": list(groups.values()),
+    }
+
+
+def describe_problems(report: Dict) -> List[str]:
+    """Get human readable descriptions of a validation report's problems"""
+    problems = [
+        f"{a} overlaps {b}"
+        for a, b in (item["displays"] for item in report["overlaps"])
+    ]
+    problems += [
+        f"{gap['distance']}px gap between {gap['displays'][0]} and "
+        f"{gap['displays'][1]}"
+        for gap in report["gaps"]
+    ]
+    if len(report["islands"]) > 1:
+        problems.append(f"Displays form {len(report['islands'])} disconnected groups")
+    return problems
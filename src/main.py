@@ -1,94 +1,234 @@
+import time
+
+# Taken before tkinter and the UI modules load, so the startup probe
+# includes their import time
+IMPORT_START = time.perf_counter()
+
+import json
+import queue
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, filedialog, messagebox, simpledialog
 from src.display_config import DisplayConfig
 from src.display_canvas import DisplayCanvas
+from src.instrumentation import traced, tracer
+from src.layout_validator import describe_problems
+from src.profiles import ProfileStore
+from src.snapping import SnapEngine
+
+# Typed matrix positions within this many pixels of an edge are snapped to it
+MATRIX_SNAP_TOLERANCE = 8
+# Matrix edits are committed once typing pauses for this long
+EDIT_DEBOUNCE_MS = 300
+# How often the UI checks whether background enumeration has finished
+ENUMERATION_POLL_MS = 20
+# How often the UI picks up progress of a background apply
+APPLY_POLL_MS = 50
+# How often the debug overlay refreshes its span summary
+DEBUG_OVERLAY_MS = 500
+
+
+class StartupProbe:
+    """Record how long the window takes to appear and to become usable
+
+    ``first_paint`` is marked once the window skeleton has been drawn and
+    ``interactive`` once the displays are loaded into both editors, both
+    in seconds since ``start``, the probe's creation by default.
+    ``on_interactive`` is called with the probe once both are known, or
+    with ``error`` set if startup failed before that.
+    """
+
+    def __init__(self, on_interactive=None, start=None):
+        self.on_interactive = on_interactive
+        self.start = time.perf_counter() if start is None else start
+        self.marks = {}
+        self.error = None
+
+    def mark(self, name):
+        """Record the first time a startup milestone is reached"""
+        if name in self.marks:
+            return
+        self.marks[name] = time.perf_counter() - self.start
+        if (
+            self.on_interactive is not None
+            and "first_paint" in self.marks
+            and "interactive" in self.marks
+        ):
+            self.on_interactive(self)
+
+    def fail(self, error):
+        """Record that startup failed, so a waiting report still happens"""
+        self.error = str(error)
+        if self.on_interactive is not None:
+            self.on_interactive(self)
 
 
 class DisplayMatrixEditor:
-    """A widget for editing display positions in a table format"""
+    """A widget for editing display positions in a table format
+
+    Rows live in a ttk.Treeview, which only renders the visible rows, and
+    are updated in place. X and Y cells are edited through a single entry
+    placed over the cell, and an edit is committed once typing pauses, on
+    Enter or when the entry loses focus.
+    """
+
+    COLUMNS = ("display", "x", "y", "width", "height", "primary")
+    HEADERS = ("Display", "X Position", "Y Position", "Width", "Height", "Primary")
+    EDITABLE = ("x", "y")
     
     def __init__(self, parent, on_change_callback=None):
         self.parent = parent
         self.on_change_callback = on_change_callback
         self.displays_data = {}
-        self.entries = {}
+        self.rows = {}
+        self._editing = None
+        self._edit_job = None
+        self._committed_value = None
         
         # Create the matrix frame
         self.frame = ttk.LabelFrame(parent, text="Monitor Position Matrix", padding=10)
         
-        # Headers
+        # Table and headers
+        self.tree = ttk.Treeview(self.frame, columns=self.COLUMNS, show="headings", height=8)
         self.create_headers()
+        scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Double-1>", self.start_edit)
+
+        # Reusable in-place cell editor
+        self.edit_var = tk.StringVar()
+        self.editor = ttk.Entry(self.tree, textvariable=self.edit_var, width=10)
+        self.editor.bind("<KeyRelease>", self.on_edit_key)
+        self.editor.bind("<Return>", self.on_edit_return)
+        self.editor.bind("<FocusOut>", lambda e: self.finish_edit())
+        self.editor.bind("<Escape>", self.on_edit_escape)
         
     def create_headers(self):
         """Create table headers"""
-        headers = ["Display", "X Position", "Y Position", "Width", "Height", "Primary"]
-        for col, header in enumerate(headers):
-            label = ttk.Label(self.frame, text=header, font=("Arial", 9, "bold"))
-            label.grid(row=0, column=col, padx=5, pady=5, sticky="w")
+        for column, header in zip(self.COLUMNS, self.HEADERS):
+            self.tree.heading(column, text=header, anchor="w")
+            self.tree.column(column, width=140 if column == "display" else 90)
     
+    @traced("matrix.update_displays")
     def update_displays(self, displays_data):
-        """Update the matrix with current display data"""
+        """Update the matrix with current display data, touching only changed rows"""
         self.displays_data = displays_data
-        self.clear_entries()
-        self.create_entries()
-    
-    def clear_entries(self):
-        """Clear existing entry widgets"""
-        for widget in self.entries.values():
-            if hasattr(widget, 'destroy'):
-                widget.destroy()
-        self.entries.clear()
-        
-        # Clear all widgets except headers (row 0)
-        for widget in self.frame.winfo_children():
-            grid_info = widget.grid_info()
-            if grid_info and grid_info.get('row', 0) > 0:
-                widget.destroy()
+
+        for display_name in list(self.rows):
+            if display_name not in displays_data:
+                self.tree.delete(display_name)
+                del self.rows[display_name]
+
+        for index, (display_name, display_info) in enumerate(displays_data.items()):
+            values = self.row_values(display_name, display_info)
+            if display_name not in self.rows:
+                self.tree.insert("", index, iid=display_name, values=values)
+            elif self.rows[display_name] != values:
+                self.tree.item(display_name, values=values)
+            self.rows[display_name] = values
+
+    def row_values(self, display_name, display_info):
+        """Get the cell values of a display row"""
+        return (
+            self.format_display_name(display_name),
+            str(display_info.get('x', 0)),
+            str(display_info.get('y', 0)),
+            str(display_info.get('width', 0)),
+            str(display_info.get('height', 0)),
+            "Yes" if display_info.get('is_primary', False) else "No",
+        )
+
+    def set_position(self, display_name, x, y):
+        """Show a new position in a display row"""
+        values = self.rows.get(display_name)
+        if values is None:
+            return
+
+        values = values[:1] + (str(x), str(y)) + values[3:]
+        if values != self.rows[display_name]:
+            self.tree.item(display_name, values=values)
+            self.rows[display_name] = values
     
-    def create_entries(self):
-        """Create entry widgets for each display"""
-        row = 1
-        for display_name, display_info in self.displays_data.items():
-            # Display name (read-only)
-            display_label = ttk.Label(self.frame, text=self.format_display_name(display_name))
-            display_label.grid(row=row, column=0, padx=5, pady=2, sticky="w")
-            
-            # X Position entry
-            x_var = tk.StringVar(value=str(display_info.get('x', 0)))
-            x_entry = ttk.Entry(self.frame, textvariable=x_var, width=10)
-            x_entry.grid(row=row, column=1, padx=5, pady=2)
-            x_entry.bind('<KeyRelease>', lambda e, name=display_name, coord='x', var=x_var: 
-                        self.on_entry_change(name, coord, var.get()))
-            
-            # Y Position entry
-            y_var = tk.StringVar(value=str(display_info.get('y', 0)))
-            y_entry = ttk.Entry(self.frame, textvariable=y_var, width=10)
-            y_entry.grid(row=row, column=2, padx=5, pady=2)
-            y_entry.bind('<KeyRelease>', lambda e, name=display_name, coord='y', var=y_var: 
-                        self.on_entry_change(name, coord, var.get()))
-            
-            # Width (read-only)
-            width_label = ttk.Label(self.frame, text=str(display_info.get('width', 0)))
-            width_label.grid(row=row, column=3, padx=5, pady=2)
-            
-            # Height (read-only)
-            height_label = ttk.Label(self.frame, text=str(display_info.get('height', 0)))
-            height_label.grid(row=row, column=4, padx=5, pady=2)
-            
-            # Primary indicator (read-only)
-            primary_text = "Yes" if display_info.get('is_primary', False) else "No"
-            primary_label = ttk.Label(self.frame, text=primary_text)
-            primary_label.grid(row=row, column=5, padx=5, pady=2)
-            
-            # Store references
-            self.entries[display_name] = {
-                'x_var': x_var,
-                'y_var': y_var,
-                'x_entry': x_entry,
-                'y_entry': y_entry
-            }
-            
-            row += 1
+    def start_edit(self, event):
+        """Open the cell editor over an X or Y cell"""
+        display_name = self.tree.identify_row(event.y)
+        column_id = self.tree.identify_column(event.x)
+        if not display_name or not column_id:
+            return
+
+        column = self.COLUMNS[int(column_id[1:]) - 1]
+        if column not in self.EDITABLE:
+            return
+
+        bbox = self.tree.bbox(display_name, column_id)
+        if not bbox:
+            return
+
+        self.finish_edit()
+        self._editing = (display_name, column)
+        self._committed_value = self.tree.set(display_name, column)
+        x, y, width, height = bbox
+        self.edit_var.set(self._committed_value)
+        self.editor.place(x=x, y=y, width=width, height=height)
+        self.editor.focus_set()
+        self.editor.select_range(0, tk.END)
+
+    def on_edit_key(self, event=None):
+        """Commit the edited value once typing pauses"""
+        if not self._editing:
+            return
+
+        self._cancel_edit_job()
+        self._edit_job = self.tree.after(EDIT_DEBOUNCE_MS, self.commit_edit)
+
+    def _cancel_edit_job(self):
+        if self._edit_job is not None:
+            self.tree.after_cancel(self._edit_job)
+            self._edit_job = None
+
+    def commit_edit(self):
+        """Send the edited value to the callback if it changed"""
+        self._edit_job = None
+        if not self._editing:
+            return
+
+        value = self.edit_var.get()
+        if value == self._committed_value:
+            return
+
+        display_name, column = self._editing
+        self._committed_value = value
+        self.on_entry_change(display_name, column, value)
+
+    def finish_edit(self):
+        """Commit and close the cell editor"""
+        if not self._editing:
+            return
+
+        self._cancel_edit_job()
+        self.commit_edit()
+        self._editing = None
+        self.editor.place_forget()
+
+    def on_edit_return(self, event=None):
+        """Finish editing without triggering the window's Return binding"""
+        self.finish_edit()
+        return "break"
+
+    def on_edit_escape(self, event=None):
+        """Cancel editing without discarding the window's pending changes"""
+        self.cancel_edit()
+        return "break"
+
+    def cancel_edit(self):
+        """Close the cell editor without committing further changes"""
+        self._cancel_edit_job()
+        self._editing = None
+        self.editor.place_forget()
     
     def format_display_name(self, name):
         """Format display name for better readability"""
@@ -108,11 +248,9 @@ class DisplayMatrixEditor:
     def get_positions(self):
         """Get all positions from the matrix"""
         positions = {}
-        for display_name, entries in self.entries.items():
+        for display_name, values in self.rows.items():
             try:
-                x = int(entries['x_var'].get())
-                y = int(entries['y_var'].get())
-                positions[display_name] = {'x': x, 'y': y}
+                positions[display_name] = {'x': int(values[1]), 'y': int(values[2])}
             except ValueError:
                 continue
         return positions
@@ -126,19 +264,109 @@ class DisplayMatrixEditor:
         self.frame.grid(**kwargs)
 
 
+class DebugOverlay:
+    """Window showing live timing percentiles of the instrumented hot paths"""
+
+    def __init__(self, root, on_close=None):
+        self.on_close = on_close
+        self._job = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Performance")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.text = tk.Text(self.window, width=72, height=20, font=("Courier", 9))
+        self.text.pack(fill=tk.BOTH, expand=True)
+        buttons = ttk.Frame(self.window)
+        buttons.pack(fill=tk.X, pady=5)
+        ttk.Button(buttons, text="Export Trace", command=self.export).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Clear", command=tracer.clear).pack(side=tk.LEFT)
+
+        self.refresh()
+
+    def format_summary(self):
+        """Get the span summary as a text table"""
+        lines = [f"{'span':<28}{'count':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  ms"]
+        for name, stats in tracer.summary().items():
+            lines.append(
+                f"{name:<28}{stats['count']:>7}{stats['p50']:>9.2f}"
+                f"{stats['p90']:>9.2f}{stats['p99']:>9.2f}{stats['max']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def refresh(self):
+        """Redraw the summary and schedule the next refresh"""
+        self.text.delete(1.0, tk.END)
+        self.text.insert(1.0, self.format_summary())
+        self._job = self.window.after(DEBUG_OVERLAY_MS, self.refresh)
+
+    def export(self):
+        """Save the recorded spans as a Chrome trace"""
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(tracer.export_chrome_trace())
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to export trace: {e}")
+
+    def close(self):
+        """Close the overlay"""
+        if self._job is not None:
+            self.window.after_cancel(self._job)
+            self._job = None
+        self.window.destroy()
+        if self.on_close is not None:
+            self.on_close()
+
+
 class DisplayManager:
-    def __init__(self):
+    def __init__(self, backend=None, profile_store=None, background=False, startup_probe=None):
+        self.startup = startup_probe if startup_probe is not None else StartupProbe()
         self.root = tk.Tk()
         self.root.title("Monitor Layout Manager - Enhanced")
         self.root.geometry("1200x800")
 
-        self.display_config = DisplayConfig()
+        # With background set, the window comes up empty, displays are
+        # enumerated and changes applied on worker threads, see
+        # start_enumeration and start_apply
+        self.background = background
+        self.display_config = DisplayConfig(backend, auto_enumerate=not background)
+        self.profile_store = profile_store if profile_store is not None else ProfileStore()
+        self.snap_engine = SnapEngine(tolerance=MATRIX_SNAP_TOLERANCE)
+        self.snap_engine_rects = {}
+        # DisplayConfig versions last shown in the previews and the matrix
+        self.preview_version = -1
+        self.matrix_version = -1
         self.setup_ui()
+        if self.profile_store.load_error:
+            messagebox.showwarning("Profiles", self.profile_store.load_error)
+
+        self.enumeration_thread = None
+        self.apply_executor = None
+        self.apply_future = None
+        self.debug_overlay = None
+        if background:
+            self.start_enumeration()
 
     def setup_ui(self):
+        # Status bar, packed first so the notebook cannot squeeze it out
+        self.status_var = tk.StringVar()
+        ttk.Label(self.root, textvariable=self.status_var, anchor="w").pack(
+            side=tk.BOTTOM, fill=tk.X, padx=10
+        )
+        # Disabled while a background apply is running
+        self.apply_buttons = []
+
         # Create notebook for tabs
         notebook = ttk.Notebook(self.root)
         notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.notebook = notebook
         
         # Tab 1: Visual Editor
         visual_frame = ttk.Frame(notebook)
@@ -150,6 +378,14 @@ class DisplayManager:
         notebook.add(matrix_frame, text="Matrix Editor")
         self.setup_matrix_tab(matrix_frame)
 
+        # Only the canvas on the visible tab is kept up to date, the other
+        # one is marked dirty and redrawn when its tab is shown
+        self.preview_canvases = [self.canvas, self.matrix_canvas]
+        self.active_tab = 0
+        self.dirty_canvases = set()
+        self.preview_displays = {}
+        notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
     def setup_visual_tab(self, parent):
         """Setup the original visual editor tab"""
         # Main container
@@ -199,17 +435,61 @@ class DisplayManager:
         rotation.grid(row=1, column=1, padx=5, pady=5)
         rotation.bind("<<ComboboxSelected>>", self.update_rotation)
 
+        # Resolution and refresh rate, the choices are read when a list opens
+        mode_frame = ttk.LabelFrame(controls, text="Mode", padding=5)
+        mode_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(mode_frame, text="Resolution:").grid(row=0, column=0, padx=5)
+        self.resolution_var = tk.StringVar()
+        self.resolution_list = ttk.Combobox(
+            mode_frame,
+            textvariable=self.resolution_var,
+            state="readonly",
+            width=10,
+            postcommand=self.update_mode_choices,
+        )
+        self.resolution_list.grid(row=0, column=1, padx=5)
+        self.resolution_list.bind("<<ComboboxSelected>>", self.update_resolution)
+
+        ttk.Label(mode_frame, text="Hz:").grid(row=0, column=2, padx=5)
+        self.refresh_var = tk.StringVar()
+        self.refresh_list = ttk.Combobox(
+            mode_frame,
+            textvariable=self.refresh_var,
+            state="readonly",
+            width=5,
+            postcommand=self.update_mode_choices,
+        )
+        self.refresh_list.grid(row=0, column=3, padx=5)
+        self.refresh_list.bind("<<ComboboxSelected>>", self.update_refresh_rate)
+
         # Action buttons
         btn_frame = ttk.Frame(controls)
         btn_frame.pack(fill=tk.X, pady=10)
 
-        ttk.Button(btn_frame, text="Apply Changes", command=self.apply_changes).pack(
-            side=tk.LEFT, padx=5
-        )
+        apply_button = ttk.Button(btn_frame, text="Apply Changes", command=self.apply_changes)
+        apply_button.pack(side=tk.LEFT, padx=5)
+        self.apply_buttons.append(apply_button)
         ttk.Button(
             btn_frame, text="Discard Changes", command=self.discard_changes
         ).pack(side=tk.LEFT)
 
+        # Profiles saved for the connected monitors
+        profile_frame = ttk.LabelFrame(controls, text="Profiles", padding=5)
+        profile_frame.pack(fill=tk.X, pady=5)
+
+        self.profile_list = ttk.Combobox(profile_frame, state="readonly")
+        self.profile_list.pack(fill=tk.X)
+        apply_profile_button = ttk.Button(
+            profile_frame, text="Apply Profile", command=self.apply_profile
+        )
+        apply_profile_button.pack(side=tk.LEFT, padx=5, pady=5)
+        self.apply_buttons.append(apply_profile_button)
+        ttk.Button(profile_frame, text="Save Profile", command=self.save_profile).pack(
+            side=tk.LEFT, pady=5
+        )
+        self.update_profile_list()
+
         # Display information
         info_frame = ttk.LabelFrame(controls, text="Display Information", padding=5)
         info_frame.pack(fill=tk.X, pady=5)
@@ -275,70 +555,84 @@ class DisplayManager:
         matrix_btn_frame = ttk.Frame(main_frame)
         matrix_btn_frame.pack(fill=tk.X, pady=10)
         
-        ttk.Button(matrix_btn_frame, text="Apply All Changes", command=self.apply_changes).pack(side=tk.LEFT, padx=5)
+        apply_all_button = ttk.Button(matrix_btn_frame, text="Apply All Changes", command=self.apply_changes)
+        apply_all_button.pack(side=tk.LEFT, padx=5)
+        self.apply_buttons.append(apply_all_button)
         ttk.Button(matrix_btn_frame, text="Discard All Changes", command=self.discard_changes).pack(side=tk.LEFT, padx=5)
         ttk.Button(matrix_btn_frame, text="Refresh Matrix", command=self.refresh_matrix).pack(side=tk.LEFT, padx=5)
 
         # Keyboard shortcuts
         self.root.bind("<Control-a>", lambda e: self.apply_changes())
         self.root.bind("<Escape>", lambda e: self.discard_changes())
+        self.root.bind("<F12>", lambda e: self.toggle_debug_overlay())
 
         # Initialize display list
         self.update_display_list()
 
     def on_matrix_change(self, display_name, coordinate, value):
         """Handle changes from the matrix editor"""
+        info = self.display_config.get_display_info(display_name)
+        if not info:
+            return
+
         if coordinate == 'x':
-            current_y = self.display_config.get_display_info(display_name).get('y', 0)
-            self.display_config.set_position(display_name, value, current_y)
+            info['x'] = self.snap_engine.snap_x(display_name, value, info['width'])
         elif coordinate == 'y':
-            current_x = self.display_config.get_display_info(display_name).get('x', 0)
-            self.display_config.set_position(display_name, current_x, value)
-        
-        self.refresh_preview()
+            info['y'] = self.snap_engine.snap_y(display_name, value, info['height'])
+        self.display_config.set_position(display_name, info['x'], info['y'])
+
+        self.refresh_display(display_name, info)
     
+    def refresh_display(self, display_name, info):
+        """Update the previews and matrix row of a single display"""
+        old = self.snap_engine_rects.get(display_name)
+        rect = (info['x'], info['y'], info['x'] + info['width'], info['y'] + info['height'])
+        if old is not None and old != rect:
+            self.snap_engine.move(display_name, old, rect)
+            self.snap_engine_rects[display_name] = rect
+
+        self.preview_displays = {**self.preview_displays, display_name: info}
+        for canvas in getattr(self, 'preview_canvases', []):
+            if canvas is self.active_canvas():
+                canvas.update_display(display_name, info)
+            else:
+                self.dirty_canvases.add(canvas)
+        if hasattr(self, 'matrix_editor'):
+            self.matrix_editor.set_position(display_name, info['x'], info['y'])
+        if hasattr(self, 'display_list') and display_name == self.display_list.get():
+            self.x_var.set(str(info['x']))
+            self.y_var.set(str(info['y']))
+
     def on_matrix_display_moved(self, display_name, x, y):
         """Handle display being moved in the matrix canvas"""
         self.display_config.set_position(display_name, x, y)
-        # Update matrix entries
-        if hasattr(self, 'matrix_editor') and display_name in self.matrix_editor.entries:
-            self.matrix_editor.entries[display_name]['x_var'].set(str(x))
-            self.matrix_editor.entries[display_name]['y_var'].set(str(y))
+        # Update matrix row
+        if hasattr(self, 'matrix_editor'):
+            self.matrix_editor.set_position(display_name, x, y)
         self.refresh_preview()
     
     def arrange_horizontal(self):
         """Arrange all monitors in a horizontal line"""
-        displays = list(self.display_config.displays.keys())
-        x_offset = 0
-        
-        for display_name in displays:
-            info = self.display_config.get_display_info(display_name)
-            if info:
-                self.display_config.set_position(display_name, x_offset, 0)
-                x_offset += info['width']
-        
+        layout = self.display_config.snapshot()
+        self.display_config.set_positions(layout.arrange_horizontal())
+
         self.refresh_matrix()
         self.refresh_preview()
-    
+
     def arrange_vertical(self):
         """Arrange all monitors in a vertical stack"""
-        displays = list(self.display_config.displays.keys())
-        y_offset = 0
-        
-        for display_name in displays:
-            info = self.display_config.get_display_info(display_name)
-            if info:
-                self.display_config.set_position(display_name, 0, y_offset)
-                y_offset += info['height']
-        
+        layout = self.display_config.snapshot()
+        self.display_config.set_positions(layout.arrange_vertical())
+
         self.refresh_matrix()
         self.refresh_preview()
-    
+
     def reset_to_origin(self):
         """Reset all monitors to origin (0,0)"""
-        for display_name in self.display_config.displays.keys():
-            self.display_config.set_position(display_name, 0, 0)
-        
+        self.display_config.set_positions(
+            {name: (0, 0) for name in self.display_config.displays}
+        )
+
         self.refresh_matrix()
         self.refresh_preview()
 
@@ -362,6 +656,8 @@ class DisplayManager:
             self.x_var.set(str(info["x"]))
             self.y_var.set(str(info["y"]))
             self.rotation_var.set(str(info["orientation"] * 90))
+            self.resolution_var.set(f"{info['width']}x{info['height']}")
+            self.refresh_var.set(str(info["refresh_rate"]))
 
             # Update info text
             self.info_text.delete(1.0, tk.END)
@@ -405,6 +701,49 @@ class DisplayManager:
         except ValueError:
             messagebox.showerror("Error", "Invalid rotation value")
 
+    def update_mode_choices(self):
+        """Fill the mode lists from the selected display's supported modes"""
+        selected = self.display_list.get()
+        catalogue = self.display_config.modes(selected) if selected else None
+        if catalogue is None:
+            return
+
+        info = self.display_config.get_display_info(selected)
+        self.resolution_list["values"] = [
+            f"{width}x{height}" for width, height in catalogue.resolutions()
+        ]
+        self.refresh_list["values"] = [
+            str(rate) for rate in catalogue.refresh_rates(info["width"], info["height"])
+        ]
+
+    def update_resolution(self, event=None):
+        """Queue the chosen resolution at its highest refresh rate"""
+        selected = self.display_list.get()
+        if not selected:
+            return
+
+        try:
+            width, height = (int(v) for v in self.resolution_var.get().split("x"))
+            self.display_config.set_mode(selected, width, height)
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid resolution: {e}")
+            return
+        info = self.display_config.get_display_info(selected)
+        self.refresh_var.set(str(info["refresh_rate"]))
+        self.refresh_preview()
+
+    def update_refresh_rate(self, event=None):
+        """Queue the chosen refresh rate"""
+        selected = self.display_list.get()
+        if not selected:
+            return
+
+        try:
+            self.display_config.set_refresh_rate(selected, int(self.refresh_var.get()))
+            self.refresh_preview()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid refresh rate: {e}")
+
     def on_display_moved(self, display_name: str, x: int, y: int):
         """Handle display being moved in the canvas"""
         self.display_config.set_position(display_name, x, y)
@@ -413,29 +752,71 @@ class DisplayManager:
             self.y_var.set(str(y))
         self.refresh_preview()
 
+    @traced("manager.refresh_preview")
     def refresh_preview(self):
         """Update the canvas preview with current display information"""
-        displays = {
-            name: self.display_config.get_display_info(name)
-            for name in self.display_config.displays.keys()
-        }
-        
-        if hasattr(self, 'canvas'):
-            self.canvas.update_displays(displays)
-        if hasattr(self, 'matrix_canvas'):
-            self.matrix_canvas.update_displays(displays)
+        version = self.display_config.version
+        if version == self.preview_version:
+            return
+        self.preview_version = version
+
+        layout = self.display_config.snapshot()
+        displays = dict(layout)
+        self.snap_engine_rects = layout.rects()
+        self.snap_engine.update(self.snap_engine_rects)
+
+        self.preview_displays = displays
+        for canvas in getattr(self, 'preview_canvases', []):
+            if canvas is self.active_canvas():
+                canvas.update_displays(displays)
+            else:
+                self.dirty_canvases.add(canvas)
+
+    def active_canvas(self):
+        """Get the preview canvas on the visible tab"""
+        return self.preview_canvases[self.active_tab]
+
+    def sync_canvas(self, canvas):
+        """Bring a preview canvas up to date if it missed updates"""
+        if canvas in self.dirty_canvases:
+            self.dirty_canvases.discard(canvas)
+            canvas.update_displays(self.preview_displays)
+
+    def on_tab_changed(self, event=None):
+        """Redraw the preview of the newly visible tab if it is outdated"""
+        self.active_tab = self.notebook.index("current")
+        self.sync_canvas(self.active_canvas())
     
     def refresh_matrix(self):
         """Refresh the matrix editor with current display data"""
-        if hasattr(self, 'matrix_editor'):
-            displays = {
-                name: self.display_config.get_display_info(name)
-                for name in self.display_config.displays.keys()
-            }
-            self.matrix_editor.update_displays(displays)
+        version = self.display_config.version
+        if hasattr(self, 'matrix_editor') and version != self.matrix_version:
+            self.matrix_version = version
+            self.matrix_editor.update_displays(self.display_config.snapshot())
 
     def apply_changes(self):
         """Apply all pending changes"""
+        if self.display_config.committing:
+            return
+        if not self.display_config.plan_changes():
+            self.display_config.discard_changes()
+            messagebox.showinfo("No Changes", "Nothing to apply")
+            return
+
+        report = self.display_config.validate_changes()
+        if not report["valid"]:
+            for canvas in self.preview_canvases:
+                self.sync_canvas(canvas)
+                canvas.show_diagnostics(report)
+            messagebox.showerror(
+                "Invalid Layout", "\n".join(describe_problems(report))
+            )
+            return
+
+        if self.background:
+            self.start_apply()
+            return
+
         if self.display_config.apply_changes():
             messagebox.showinfo("Success", "Display settings updated successfully")
             self.refresh_preview()
@@ -443,6 +824,101 @@ class DisplayManager:
         else:
             messagebox.showerror("Error", "Failed to update display settings")
 
+    def start_apply(self):
+        """Commit pending changes on a worker thread
+
+        Edits made meanwhile are queued as pending changes, the apply
+        buttons are disabled until the commit has finished.
+        """
+        if self.apply_executor is None:
+            self.apply_executor = ThreadPoolExecutor(max_workers=1)
+        self.apply_progress = queue.Queue()
+        self.apply_future = self.display_config.commit_changes_async(
+            self.apply_executor, lambda *args: self.apply_progress.put(args)
+        )
+
+        for button in self.apply_buttons:
+            button.state(["disabled"])
+        self.status_var.set("Applying changes...")
+        self.root.after(APPLY_POLL_MS, self.poll_apply)
+
+    def poll_apply(self):
+        """Show apply progress and finish once the worker is done"""
+        while True:
+            try:
+                device_name, _, done, total = self.apply_progress.get_nowait()
+            except queue.Empty:
+                break
+            self.status_var.set(f"Applying changes... {done}/{total} ({device_name})")
+
+        if not self.apply_future.done():
+            self.root.after(APPLY_POLL_MS, self.poll_apply)
+            return
+
+        future = self.apply_future
+        self.apply_future = None
+        if self.display_config.committing:
+            self.display_config.finish_commit(future)
+        for button in self.apply_buttons:
+            button.state(["!disabled"])
+        self.refresh_preview()
+        self.refresh_matrix()
+
+        error = future.exception()
+        if error is None and all(code == 0 for code in future.result().values()):
+            self.status_var.set("Display settings updated")
+        else:
+            self.status_var.set("")
+            messagebox.showerror("Error", "Failed to update display settings")
+
+    def update_profile_list(self):
+        """Offer the profiles saved for the connected monitors"""
+        profiles = self.profile_store.profiles_for(self.display_config)
+        self.profile_list["values"] = profiles
+        if self.profile_list.get() not in profiles:
+            self.profile_list.set(profiles[0] if profiles else "")
+
+    def save_profile(self):
+        """Save the current layout, including pending changes, as a profile"""
+        name = simpledialog.askstring("Save Profile", "Profile name:", parent=self.root)
+        if not name:
+            return
+
+        try:
+            self.profile_store.save_profile(name, self.display_config)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save profile: {e}")
+            return
+        self.update_profile_list()
+        self.profile_list.set(name)
+
+    def apply_profile(self):
+        """Switch to the selected profile with a single commit"""
+        name = self.profile_list.get()
+        if not name or self.display_config.committing:
+            return
+
+        try:
+            if self.background:
+                self.profile_store.queue_profile(name, self.display_config)
+            else:
+                results = self.profile_store.apply_profile(name, self.display_config)
+        except (KeyError, ValueError):
+            messagebox.showerror("Error", f"Profile {name} does not match the connected displays")
+            self.update_profile_list()
+            return
+
+        if self.background:
+            # poll_apply refreshes the views and reports the outcome
+            self.start_apply()
+            return
+
+        self.refresh_preview()
+        self.refresh_matrix()
+        self.on_display_selected(None)
+        if not all(code == 0 for code in results.values()):
+            messagebox.showerror("Error", f"Failed to apply profile {name}")
+
     def discard_changes(self):
         """Discard all pending changes"""
         self.display_config.discard_changes()
@@ -452,14 +928,98 @@ class DisplayManager:
         if hasattr(self, 'display_list'):
             self.on_display_selected(None)
 
+    def toggle_debug_overlay(self):
+        """Show or hide the performance overlay, tracing while it is open"""
+        if self.debug_overlay is not None:
+            self.debug_overlay.close()
+            return
+
+        was_enabled = tracer.enabled
+        tracer.enable()
+
+        def on_close():
+            self.debug_overlay = None
+            if not was_enabled:
+                tracer.disable()
+
+        self.debug_overlay = DebugOverlay(self.root, on_close)
+
+    def start_enumeration(self):
+        """Enumerate displays on a worker thread, then load them into the UI"""
+        self.enumeration_results = queue.Queue()
+        self.enumeration_thread = threading.Thread(
+            target=self._enumerate_worker, daemon=True
+        )
+        self.enumeration_thread.start()
+        self.root.after(ENUMERATION_POLL_MS, self.poll_enumeration)
+
+    def _enumerate_worker(self):
+        try:
+            self.enumeration_results.put(self.display_config.read_displays())
+        except Exception as e:  # Reported on the UI thread
+            self.enumeration_results.put(e)
+
+    def poll_enumeration(self):
+        """Load enumerated displays once the worker has finished"""
+        try:
+            result = self.enumeration_results.get_nowait()
+        except queue.Empty:
+            self.root.after(ENUMERATION_POLL_MS, self.poll_enumeration)
+            return
+
+        if isinstance(result, Exception):
+            reported = self.startup.on_interactive is not None
+            self.startup.fail(result)
+            # A startup report quits the app, no one would see the dialog
+            if not reported:
+                messagebox.showerror("Error", f"Failed to enumerate displays: {result}")
+            return
+        self.display_config.set_displays(result)
+        self.on_displays_loaded()
+
+    def on_displays_loaded(self):
+        """Fill both editors once the displays are known"""
+        self.update_display_list()
+        self.update_profile_list()
+        self.refresh_matrix()
+        self.refresh_preview()
+        self.startup.mark("interactive")
+
+    def on_first_paint(self):
+        """Record that the window skeleton is on screen"""
+        self.startup.mark("first_paint")
+        if self.enumeration_thread is None:
+            self.startup.mark("interactive")
+
     def run(self):
         """Start the application"""
         # Initialize both editors
         self.refresh_matrix()
         self.refresh_preview()
+        self.root.after_idle(self.on_first_paint)
         self.root.mainloop()
 
 
+def main():
+    probe = StartupProbe(start=IMPORT_START)
+    app = DisplayManager(background=True, startup_probe=probe)
+
+    probing = "--startup-probe" in sys.argv
+    if probing:
+        # Report time to first paint and time to interactive, then quit
+        def report(probe):
+            marks = dict(probe.marks)
+            if probe.error is not None:
+                marks["error"] = probe.error
+            json.dump(marks, sys.stdout)
+            sys.stdout.write("\n")
+            app.root.after_idle(app.root.destroy)
+
+        probe.on_interactive = report
+    app.run()
+    if probing and probe.error is not None:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
-    app = DisplayManager()
-    app.run()
\ No newline at end of file
+    main()
\ No newline at end of file
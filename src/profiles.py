@@ -0,0 +1,142 @@
+# profiles.py
+import hashlib
+import json
+import os
+from typing import Dict, List, Mapping, Optional
+
+from src.display_config import DisplayConfig
+
+# Where profiles are kept unless ProfileStore is given a path
+DEFAULT_PROFILE_PATH = os.path.join(
+    os.path.expanduser("~"), ".monitor_layout_profiles.json"
+)
+
+
+def fingerprint(layout: Mapping[str, Mapping]) -> str:
+    """Identify a monitor set by device names, resolutions and refresh rates
+
+    Positions and orientations are left out, so every arrangement of the
+    same monitors shares a fingerprint.
+    """
+    key = sorted(
+        (name, info["width"], info["height"], info["refresh_rate"])
+        for name, info in layout.items()
+    )
+    return hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+
+
+def config_fingerprint(config: DisplayConfig) -> str:
+    """Fingerprint the connected monitors as enumerated
+
+    Pending changes are ignored, so queueing a new resolution does not
+    make the monitor set look different.
+    """
+    return fingerprint(
+        {
+            name: {
+                "width": display.dmPelsWidth,
+                "height": display.dmPelsHeight,
+                "refresh_rate": display.dmDisplayFrequency,
+            }
+            for name, display in config.displays.items()
+        }
+    )
+
+
+class ProfileStore:
+    """Named display layouts, indexed by the monitor set they were saved for
+
+    Profiles are kept in a JSON file as
+    ``{name: {"fingerprint": ..., "displays": {device: {"x", "y",
+    "orientation"}}}}``. The stored targets are the change plan: applying a
+    profile queues them all and commits them with a single mode reset.
+
+    A profiles file that cannot be read or parsed leaves the store empty
+    and is described in ``load_error``.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or DEFAULT_PROFILE_PATH
+        self.profiles: Dict[str, Dict] = {}
+        self._by_fingerprint: Dict[str, List[str]] = {}
+        self.load_error: Optional[str] = None
+        self.load()
+
+    def _index(self) -> None:
+        self._by_fingerprint = {}
+        for name, profile in self.profiles.items():
+            self._by_fingerprint.setdefault(profile["fingerprint"], []).append(name)
+
+    def load(self) -> None:
+        """Read the profiles file, starting empty if there is none"""
+        self.load_error = None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                profiles = json.load(f)
+            if not isinstance(profiles, dict):
+                raise ValueError("expected a JSON object")
+            self.profiles = profiles
+            self._index()
+        except FileNotFoundError:
+            self.profiles = {}
+            self._index()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # A corrupt or half-written file, keep going without profiles
+            self.load_error = f"Cannot read profiles from {self.path}: {e}"
+            self.profiles = {}
+            self._index()
+
+    def save(self) -> None:
+        """Write the profiles file, replacing it atomically"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.profiles, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def save_profile(self, name: str, config: DisplayConfig) -> Dict:
+        """Store the current layout, including pending changes, as a profile"""
+        profile = {
+            "fingerprint": config_fingerprint(config),
+            "displays": config.export_layout(),
+        }
+
+        self.profiles[name] = profile
+        self._index()
+        self.save()
+        return profile
+
+    def delete_profile(self, name: str) -> None:
+        """Remove a profile if present"""
+        if self.profiles.pop(name, None) is not None:
+            self._index()
+            self.save()
+
+    def profiles_for(self, config: DisplayConfig) -> List[str]:
+        """Get the names of the profiles saved for the connected monitors"""
+        return list(self._by_fingerprint.get(config_fingerprint(config), []))
+
+    def queue_profile(self, name: str, config: DisplayConfig) -> None:
+        """Replace any pending changes with a profile's targets
+
+        Raises KeyError for unknown profiles and ValueError if the profile
+        was saved for a different set of monitors.
+        """
+        profile = self.profiles[name]
+        if profile["fingerprint"] != config_fingerprint(config):
+            raise ValueError(f"Profile {name!r} was saved for other monitors")
+
+        config.discard_changes()
+        config.queue_layout(profile["displays"])
+
+    def apply_profile(self, name: str, config: DisplayConfig) -> Dict[str, int]:
+        """Switch to a profile with a single commit
+
+        Queues the profile as ``queue_profile`` does, then commits it.
+        Returns the result code of every device that needed a change, see
+        ``DisplayConfig.commit_changes``.
+        """
+        self.queue_profile(name, config)
+        return config.commit_changes()
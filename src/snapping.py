@@ -0,0 +1,116 @@
+# snapping.py
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+Rect = Tuple[int, int, int, int]
+
+
+class SnapEngine:
+    """Snap display positions to the edges of other displays
+
+    Left/right and top/bottom edges of every display are kept in sorted
+    lists, so the nearest edge to a moving display is found with a binary
+    search instead of a scan over all displays.
+    """
+
+    def __init__(self, tolerance: float = 10):
+        self.tolerance = tolerance
+        self._x_edges: List[Tuple[int, str]] = []
+        self._y_edges: List[Tuple[int, str]] = []
+
+    def update(self, rects: Dict[str, Rect]) -> None:
+        """Rebuild the edge indexes from ``(x0, y0, x1, y1)`` rectangles"""
+        x_edges = []
+        y_edges = []
+        for name, (x0, y0, x1, y1) in rects.items():
+            x_edges += [(x0, name), (x1, name)]
+            y_edges += [(y0, name), (y1, name)]
+        x_edges.sort()
+        y_edges.sort()
+        self._x_edges = x_edges
+        self._y_edges = y_edges
+
+    def move(self, name: str, old: Rect, new: Rect) -> None:
+        """Update the edges of a single display"""
+        for edges, old_values, new_values in (
+            (self._x_edges, (old[0], old[2]), (new[0], new[2])),
+            (self._y_edges, (old[1], old[3]), (new[1], new[3])),
+        ):
+            for value in old_values:
+                i = bisect_left(edges, (value, name))
+                if i < len(edges) and edges[i] == (value, name):
+                    del edges[i]
+            for value in new_values:
+                insort(edges, (value, name))
+
+    @staticmethod
+    def _nearest(
+        edges: List[Tuple[int, str]], value: float, exclude: str
+    ) -> Optional[int]:
+        """Get the edge closest to value, ignoring the edges of exclude"""
+        i = bisect_left(edges, (value, ""))
+        best = None
+
+        # Walk outwards, a display has at most two edges per axis to skip
+        for j in range(i - 1, -1, -1):
+            if edges[j][1] != exclude:
+                best = edges[j][0]
+                break
+        for j in range(i, len(edges)):
+            if edges[j][1] != exclude:
+                if best is None or abs(edges[j][0] - value) < abs(best - value):
+                    best = edges[j][0]
+                break
+
+        return best
+
+    def _snap_axis(
+        self,
+        edges: List[Tuple[int, str]],
+        name: str,
+        start: int,
+        size: int,
+        tolerance: float,
+    ) -> int:
+        best_delta = None
+        for edge_value in (start, start + size):
+            target = self._nearest(edges, edge_value, name)
+            if target is None:
+                continue
+            delta = target - edge_value
+            if abs(delta) <= tolerance and (
+                best_delta is None or abs(delta) < abs(best_delta)
+            ):
+                best_delta = delta
+        return start + best_delta if best_delta is not None else start
+
+    def snap_x(
+        self, name: str, x: int, width: int, tolerance: Optional[float] = None
+    ) -> int:
+        """Snap the left or right edge of a display to the nearest edge"""
+        if tolerance is None:
+            tolerance = self.tolerance
+        return self._snap_axis(self._x_edges, name, x, width, tolerance)
+
+    def snap_y(
+        self, name: str, y: int, height: int, tolerance: Optional[float] = None
+    ) -> int:
+        """Snap the top or bottom edge of a display to the nearest edge"""
+        if tolerance is None:
+            tolerance = self.tolerance
+        return self._snap_axis(self._y_edges, name, y, height, tolerance)
+
+    def snap(
+        self,
+        name: str,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        tolerance: Optional[float] = None,
+    ) -> Tuple[int, int]:
+        """Snap a display position to the nearest edges on both axes"""
+        return (
+            self.snap_x(name, x, width, tolerance),
+            self.snap_y(name, y, height, tolerance),
+        )
@@ -0,0 +1,112 @@
+# spatial_index.py
+from typing import Dict, Iterable, List, Set, Tuple
+
+Rect = Tuple[float, float, float, float]
+
+
+class SpatialIndex:
+    """Uniform grid index of named rectangles
+
+    Rectangles are half-open ``(x0, y0, x1, y1)`` boxes. Each one is stored
+    in every grid cell it covers, so point and rectangle queries only look
+    at the rectangles in the cells they touch.
+    """
+
+    def __init__(self, cell_size: int = 2048):
+        self.cell_size = cell_size
+        self.rects: Dict[str, Rect] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._order: Dict[str, int] = {}
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self.rects)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.rects
+
+    def _cell_range(self, rect: Rect) -> Iterable[Tuple[int, int]]:
+        x0, y0, x1, y1 = rect
+        size = self.cell_size
+        # Half-open bounds, so a right or bottom edge on a cell boundary
+        # does not spill into the next cell
+        cx1 = int((x1 - 1) // size) if x1 > x0 else int(x0 // size)
+        cy1 = int((y1 - 1) // size) if y1 > y0 else int(y0 // size)
+        for cx in range(int(x0 // size), cx1 + 1):
+            for cy in range(int(y0 // size), cy1 + 1):
+                yield cx, cy
+
+    def clear(self) -> None:
+        """Remove all rectangles"""
+        self.rects.clear()
+        self._cells.clear()
+        self._order.clear()
+
+    def insert(self, name: str, rect: Rect) -> None:
+        """Add or replace a rectangle"""
+        if name in self.rects:
+            self.remove(name)
+
+        self.rects[name] = rect
+        self._order[name] = self._counter
+        self._counter += 1
+        for cell in self._cell_range(rect):
+            self._cells.setdefault(cell, set()).add(name)
+
+    def remove(self, name: str) -> None:
+        """Remove a rectangle if present"""
+        rect = self.rects.pop(name, None)
+        if rect is None:
+            return
+
+        del self._order[name]
+        for cell in self._cell_range(rect):
+            names = self._cells.get(cell)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._cells[cell]
+
+    def rebuild(self, rects: Dict[str, Rect]) -> None:
+        """Replace the indexed rectangles, keeping the given order"""
+        self.clear()
+        for name, rect in rects.items():
+            self.insert(name, rect)
+
+    def query_point(self, x: float, y: float) -> List[str]:
+        """Get the rectangles containing a point, in insertion order"""
+        size = self.cell_size
+        names = self._cells.get((int(x // size), int(y // size)), ())
+        hits = [
+            name
+            for name in names
+            if self.rects[name][0] <= x < self.rects[name][2]
+            and self.rects[name][1] <= y < self.rects[name][3]
+        ]
+        return sorted(hits, key=self._order.__getitem__)
+
+    def query_rect(self, rect: Rect) -> List[str]:
+        """Get the rectangles intersecting a rectangle, in insertion order"""
+        x0, y0, x1, y1 = rect
+        size = self.cell_size
+        candidates: Set[str] = set()
+        cx0, cy0 = int(x0 // size), int(y0 // size)
+        cx1, cy1 = int(x1 // size), int(y1 // size)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # Sparse index, scanning the occupied cells is cheaper
+            for (cx, cy), names in self._cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    candidates.update(names)
+        else:
+            for cell in self._cell_range(rect):
+                candidates.update(self._cells.get(cell, ()))
+
+        hits = [
+            name
+            for name in candidates
+            if self.rects[name][0] < x1
+            and x0 < self.rects[name][2]
+            and self.rects[name][1] < y1
+            and y0 < self.rects[name][3]
+        ]
+        return sorted(hits, key=self._order.__getitem__)
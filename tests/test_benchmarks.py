@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import patch
+from benchmarks.run_benchmarks import compare, measure, run
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_compare_flags_regressions(self):
+        """Test that only benchmarks slower than the threshold are flagged"""
+        results = {
+            "fast": {"median": 1.0, "best": 1.0},
+            "slow": {"median": 2.0, "best": 2.0},
+            "new": {"median": 9.0, "best": 9.0},
+        }
+        baseline = {"fast": 1.0, "slow": 1.0}
+
+        self.assertEqual(compare(results, baseline, threshold=1.5), ["slow"])
+
+    def test_measure(self):
+        """Test that timings are per call"""
+        result = measure(lambda: None, repeat=3)
+        self.assertLessEqual(result["best"], result["median"])
+        self.assertLess(result["median"], 0.01)
+
+    def test_run_filter(self):
+        """Test running a subset of the suite"""
+        results = run("config.move_and_snapshot[2]", repeat=1)
+        self.assertEqual(list(results), ["config.move_and_snapshot[2]"])
+
+
+    def test_run_closes_generator_setups(self):
+        """Test that a setup's cleanup runs once it has been timed"""
+        closed = []
+
+        def setup():
+            try:
+                yield lambda: None
+            finally:
+                closed.append(True)
+
+        with patch(
+            "benchmarks.run_benchmarks.config_cases",
+            return_value=iter([("generator", setup)]),
+        ):
+            results = run("generator", repeat=1)
+
+        self.assertEqual(list(results), ["generator"])
+        self.assertEqual(closed, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+from src.cli import main
+from src.hotplug import ScriptedChangeSource
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous wall clock limit for a cold `list`, far below GUI startup
+COLD_START_BUDGET = 2.0
+
+
+class TestCli(unittest.TestCase):
+    def run_cli(self, *argv):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = main(["--simulate", "2", *argv])
+        return code, json.loads(out.getvalue())
+
+    def test_list(self):
+        """Test that every display is printed"""
+        code, displays = self.run_cli("list")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(len(displays), 2)
+        self.assertEqual(displays[1]["x"], 1920)
+        self.assertTrue(displays[0]["is_primary"])
+
+    def test_set_position(self):
+        """Test moving a display"""
+        code, output = self.run_cli("set-position", "\\\\.\\DISPLAY2", "1920", "-100")
+
+        self.assertEqual(code, 0)
+        self.assertEqual(output, {"ok": True, "results": {"\\\\.\\DISPLAY2": 0}})
+
+    def test_invalid_layout_fails(self):
+        """Test that an overlapping position is reported as a failure"""
+        code, output = self.run_cli("set-position", "\\\\.\\DISPLAY2", "100", "0")
+
+        self.assertEqual(code, 1)
+        self.assertFalse(output["ok"])
+        self.assertEqual(
+            output["problems"], ["\\\\.\\DISPLAY1 overlaps \\\\.\\DISPLAY2"]
+        )
+
+    def test_simulate_range(self):
+        """Test that simulated display counts outside 1 to 256 are refused"""
+        for count in ("0", "300", "two"):
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                main(["--simulate", count, "list"])
+
+    def test_unknown_display(self):
+        """Test that unknown displays are rejected"""
+        code, output = self.run_cli("set-orientation", "\\\\.\\DISPLAY9", "90")
+
+        self.assertEqual(code, 1)
+        self.assertIn("error", output)
+
+    def test_export_and_apply(self):
+        """Test that an exported layout can be applied"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "layout.json")
+            code, _ = self.run_cli("export", path)
+            self.assertEqual(code, 0)
+
+            with open(path, "r", encoding="utf-8") as f:
+                layout = json.load(f)
+            layout["\\\\.\\DISPLAY2"]["x"] = -1920
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(layout, f)
+
+            code, output = self.run_cli("apply", path)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(output["results"], {"\\\\.\\DISPLAY2": 0})
+
+    def test_apply_malformed_layout(self):
+        """Test that layout files of the wrong shape are reported"""
+        layouts = (
+            [1, 2],
+            {"\\\\.\\DISPLAY1": 5},
+            {"\\\\.\\DISPLAY1": {"x": "0", "y": 0}},
+            {"\\\\.\\DISPLAY1": {"x": 0, "y": 0, "orientation": 7}},
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "layout.json")
+            for layout in layouts:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(layout, f)
+
+                code, output = self.run_cli("apply", path)
+
+                self.assertEqual(code, 1)
+                self.assertIn("Invalid layout", output["error"])
+
+    def test_export_unwritable(self):
+        """Test that a bad export path is reported"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "missing", "layout.json")
+            code, output = self.run_cli("export", path)
+
+        self.assertEqual(code, 1)
+        self.assertIn("Cannot write", output["error"])
+
+    def test_apply_corrupt_profiles(self):
+        """Test that a corrupt profiles file is reported"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "profiles.json")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("{")
+
+            code, output = self.run_cli(
+                "apply", "--profile", "docked", "--profiles-file", path
+            )
+
+        self.assertEqual(code, 1)
+        self.assertIn("Cannot read profiles", output["error"])
+
+    def test_modes_and_set_mode(self):
+        """Test listing modes and changing the resolution"""
+        code, modes = self.run_cli("modes", "\\\\.\\DISPLAY2")
+        self.assertEqual(code, 0)
+        self.assertIn(
+            {"width": 1280, "height": 720, "refresh_rate": 60, "bits_per_pixel": 32},
+            modes,
+        )
+
+        code, output = self.run_cli("set-mode", "\\\\.\\DISPLAY2", "1280x720")
+        self.assertEqual(code, 0)
+        self.assertEqual(output["results"], {"\\\\.\\DISPLAY2": 0})
+
+        code, output = self.run_cli(
+            "set-mode", "\\\\.\\DISPLAY2", "1280x720", "--refresh", "75"
+        )
+        self.assertEqual(code, 1)
+        self.assertIn("error", output)
+
+    def test_watch_stopped_by_interrupt(self):
+        """Test that Ctrl+C stops watch cleanly"""
+        interrupt = [KeyboardInterrupt, None]
+        with patch("src.cli.threading.Thread.join", side_effect=interrupt):
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = main(["--simulate", "2", "watch"])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(out.getvalue(), "")
+
+    def test_watch_fails_when_watcher_dies(self):
+        """Test that watch fails if the watcher ends without being stopped"""
+        source = ScriptedChangeSource()
+        source.close()
+
+        with patch("src.cli.ScriptedChangeSource", return_value=source):
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = main(["--simulate", "2", "watch"])
+
+        self.assertEqual(code, 1)
+        self.assertFalse(json.loads(out.getvalue())["ok"])
+
+    def test_cold_start_without_tkinter(self):
+        """Test that the CLI starts quickly and never loads tkinter"""
+        script = (
+            "import sys\n"
+            "from src.cli import main\n"
+            "code = main(['--simulate', '2', 'list'])\n"
+            "assert 'tkinter' not in sys.modules, 'tkinter was imported'\n"
+            "assert 'win32api' not in sys.modules, 'win32api was imported'\n"
+            "sys.exit(code)\n"
+        )
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertLess(elapsed, COLD_START_BUDGET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+import unittest
+from src.display_backend import (
+    CDS_UPDATEREGISTRY,
+    DEVMODE,
+    DISP_CHANGE_BADMODE,
+    DISP_CHANGE_BADPARAM,
+    DM_DISPLAYFREQUENCY,
+    DM_PELSHEIGHT,
+    DM_PELSWIDTH,
+    DM_POSITION,
+    SimulatedBackend,
+)
+from src.display_config import DisplayConfig
+
+
+class TestSimulatedBackend(unittest.TestCase):
+    def test_enumerate_devices_grid(self):
+        """Test that outputs are laid out in a grid"""
+        backend = SimulatedBackend(count=4)
+
+        names = backend.enumerate_devices()
+        self.assertEqual(len(names), 4)
+
+        positions = [
+            (backend.devices[name].dmPositionX, backend.devices[name].dmPositionY)
+            for name in names
+        ]
+        self.assertEqual(positions, [(0, 0), (1920, 0), (0, 1080), (1920, 1080)])
+
+    def test_count_limits(self):
+        """Test the supported range of outputs"""
+        self.assertEqual(len(SimulatedBackend(count=256).devices), 256)
+        with self.assertRaises(ValueError):
+            SimulatedBackend(count=0)
+        with self.assertRaises(ValueError):
+            SimulatedBackend(count=257)
+
+    def test_read_settings_returns_copy(self):
+        """Test that reading settings does not expose internal state"""
+        backend = SimulatedBackend(count=2)
+        name = backend.enumerate_devices()[0]
+
+        settings = backend.read_settings(name)
+        settings.dmPositionX = 500
+
+        self.assertEqual(backend.devices[name].dmPositionX, 0)
+        self.assertIsNone(backend.read_settings("MISSING"))
+
+    def test_stage_and_commit(self):
+        """Test that staged settings only take effect on commit"""
+        backend = SimulatedBackend(count=2)
+        name = backend.enumerate_devices()[1]
+        devmode = DEVMODE()
+        devmode.dmFields = DM_POSITION
+        devmode.dmPositionX = 100
+        devmode.dmPositionY = 200
+
+        backend.stage(name, devmode, CDS_UPDATEREGISTRY)
+        self.assertEqual(backend.devices[name].dmPositionX, 1920)
+
+        backend.commit()
+        self.assertEqual(backend.devices[name].dmPositionX, 100)
+        self.assertEqual(backend.devices[name].dmPositionY, 200)
+        self.assertEqual(backend.reset_count, 1)
+
+    def test_modes(self):
+        """Test that only listed modes can be staged"""
+        backend = SimulatedBackend(count=1, resolution=(2560, 1440), refresh_rate=144)
+        name = backend.enumerate_devices()[0]
+
+        modes = {
+            (mode.dmPelsWidth, mode.dmPelsHeight, mode.dmDisplayFrequency)
+            for mode in backend.list_modes(name)
+        }
+        self.assertIn((2560, 1440, 144), modes)
+        self.assertIn((1280, 720, 60), modes)
+        self.assertNotIn((3840, 2160, 60), modes)
+
+        devmode = DEVMODE()
+        devmode.dmFields = DM_PELSWIDTH | DM_PELSHEIGHT
+        devmode.dmPelsWidth, devmode.dmPelsHeight = 3840, 2160
+        self.assertEqual(backend.stage(name, devmode, 0), DISP_CHANGE_BADMODE)
+
+        devmode.dmFields |= DM_DISPLAYFREQUENCY
+        devmode.dmPelsWidth, devmode.dmPelsHeight = 1920, 1080
+        devmode.dmDisplayFrequency = 60
+        self.assertEqual(backend.stage(name, devmode, 0), 0)
+        backend.commit()
+        self.assertEqual(backend.devices[name].dmPelsWidth, 1920)
+        self.assertEqual(backend.devices[name].dmDisplayFrequency, 60)
+
+    def test_latency_and_call_counts(self):
+        """Test simulated latency accounting"""
+        backend = SimulatedBackend(count=2, latency=0.001, reset_latency=0.01)
+        backend.enumerate_devices()
+        backend.commit()
+
+        self.assertEqual(backend.calls["enumerate_devices"], 1)
+        self.assertEqual(backend.calls["commit"], 1)
+        self.assertAlmostEqual(backend.elapsed, 0.012)
+
+
+class TestDisplayConfigSimulated(unittest.TestCase):
+    def test_video_wall_apply(self):
+        """Test applying a layout change across a large wall"""
+        backend = SimulatedBackend(count=256, columns=16)
+        config = DisplayConfig(backend)
+        self.assertEqual(len(config.displays), 256)
+
+        names = list(config.displays)
+        for name in names[:8]:
+            info = config.get_display_info(name)
+            config.set_position(name, info["x"], info["y"] - 10)
+
+        self.assertTrue(config.apply_changes())
+        self.assertEqual(backend.calls["stage"], 8)
+        self.assertEqual(backend.reset_count, 1)
+        self.assertEqual(config.get_display_info(names[0])["y"], -10)
+        # Only the changed displays are re-read after the apply
+        self.assertEqual(backend.calls["enumerate_devices"], 1)
+        self.assertEqual(backend.calls["read_settings"], 256 + 8)
+
+    def test_failure_codes(self):
+        """Test that a device rejected while staging fails the apply"""
+        backend = SimulatedBackend(count=2)
+        names = backend.enumerate_devices()
+        backend.result_codes[names[1]] = DISP_CHANGE_BADMODE
+        backend.test_codes[names[1]] = 0  # Passes the preflight check
+        config = DisplayConfig(backend)
+
+        config.set_position(names[0], 0, 1080)
+        config.set_position(names[1], 1920, 1080)
+
+        self.assertEqual(
+            config.commit_changes(), {names[0]: 0, names[1]: DISP_CHANGE_BADMODE}
+        )
+        self.assertEqual(config.get_display_info(names[0])["y"], 1080)
+        self.assertEqual(config.get_display_info(names[1])["y"], 0)
+
+    def test_preflight(self):
+        """Test that nothing is applied when the driver test rejects a device"""
+        backend = SimulatedBackend(count=2)
+        names = backend.enumerate_devices()
+        backend.test_codes[names[1]] = DISP_CHANGE_BADMODE
+        config = DisplayConfig(backend)
+        config.set_position(names[0], 0, 1080)
+        config.set_position(names[1], 1920, 1080)
+        pending = {
+            name: dict(changes) for name, changes in config.pending_changes.items()
+        }
+
+        verdicts = {names[0]: 0, names[1]: DISP_CHANGE_BADMODE}
+        self.assertEqual(config.test_changes(), verdicts)
+        self.assertEqual(config.commit_changes(), verdicts)
+
+        self.assertEqual(backend.calls["test"], 4)
+        self.assertEqual(backend.calls["stage"], 0)
+        self.assertEqual(backend.reset_count, 0)
+        self.assertEqual(backend.devices[names[0]].dmPositionY, 0)
+        self.assertEqual(config.pending_changes, pending)
+
+        backend.test_codes.clear()
+        self.assertEqual(config.test_changes(), {names[0]: 0, names[1]: 0})
+        self.assertEqual(config.commit_changes(), {names[0]: 0, names[1]: 0})
+        self.assertEqual(backend.devices[names[0]].dmPositionY, 1080)
+        self.assertEqual(config.pending_changes, {})
+
+    def test_set_mode(self):
+        """Test queueing and applying a resolution change"""
+        backend = SimulatedBackend(count=2, refresh_rate=144)
+        config = DisplayConfig(backend)
+        names = list(config.displays)
+
+        config.set_mode(names[1], 1280, 720)
+        config.set_refresh_rate(names[1], 60)
+        self.assertEqual(config.snapshot()[names[1]]["width"], 1280)
+        self.assertEqual(config.snapshot()[names[1]]["refresh_rate"], 60)
+        with self.assertRaises(ValueError):
+            config.set_mode(names[1], 1280, 720, 75)
+
+        self.assertEqual(config.commit_changes(), {names[1]: 0})
+        self.assertEqual(backend.devices[names[1]].dmPelsHeight, 720)
+        self.assertEqual(config.get_display_info(names[1])["refresh_rate"], 60)
+        self.assertEqual(config.pending_changes, {})
+        self.assertEqual(backend.calls["list_modes"], 1)
+
+    def test_modes_reread_after_enumeration(self):
+        """Test that enumerating again drops the cached modes"""
+        backend = SimulatedBackend(count=1)
+        config = DisplayConfig(backend)
+        name = list(config.displays)[0]
+        config.modes(name)
+
+        backend.modes[name] = [(1920, 1080, 60, 32), (1920, 1080, 75, 32)]
+        self.assertEqual(config.modes(name).refresh_rates(1920, 1080), [60])
+        config.enumerate_displays()
+        self.assertEqual(config.modes(name).refresh_rates(1920, 1080), [75, 60])
+        self.assertIsNone(config.modes("MISSING"))
+
+    def test_invalid_layout_rejected_before_driver(self):
+        """Test that an overlapping layout makes no driver calls"""
+        backend = SimulatedBackend(count=2)
+        config = DisplayConfig(backend)
+        names = list(config.displays)
+        config.set_position(names[1], 1000, 0)
+
+        self.assertFalse(config.validate_changes()["valid"])
+        self.assertEqual(config.commit_changes(), {names[1]: DISP_CHANGE_BADPARAM})
+        self.assertEqual(backend.calls["stage"], 0)
+        self.assertEqual(backend.reset_count, 0)
+        self.assertEqual(config.pending_changes, {names[1]: {"x": 1000, "y": 0}})
+
+    def test_disconnect_triggers_full_scan(self):
+        """Test re-enumeration when a changed display disappears"""
+        backend = SimulatedBackend(count=3)
+        config = DisplayConfig(backend)
+        name = list(config.displays)[2]
+        backend.disconnect(name)
+
+        config.refresh_displays([name])
+
+        self.assertNotIn(name, config.displays)
+        self.assertEqual(backend.calls["enumerate_devices"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import tkinter as tk
-from src.display_canvas import DisplayCanvas
+from src.display_canvas import GRID_LINE_BUDGET, DisplayCanvas
 
 
 class TestDisplayCanvas(unittest.TestCase):
@@ -9,6 +9,8 @@ class TestDisplayCanvas(unittest.TestCase):
         self.root = tk.Tk()
         self.on_display_moved = MagicMock()
         self.canvas = DisplayCanvas(self.root, self.on_display_moved)
+        self.canvas.pack()
+        self.root.update()
         self.test_displays = {
             "DISPLAY1": {
                 "x": 0,
@@ -97,11 +99,141 @@ class TestDisplayCanvas(unittest.TestCase):
         drag_event.y = 150  # Moved 50px down
 
         self.canvas.drag(drag_event)
+        self.canvas.flush()
 
         # Verify on_display_moved was called with correct coordinates
         screen_x, screen_y = self.canvas.canvas_to_screen(drag_event.x, drag_event.y)
         self.on_display_moved.assert_called_with("DISPLAY1", screen_x, screen_y)
 
+    def test_drag_coalesces_motion_events(self):
+        """Test that many motion events produce one move per frame"""
+        self.canvas.update_displays(self.test_displays)
+        self.canvas._drag_data = {"x": 100, "y": 100, "display": "DISPLAY1"}
+
+        for offset in range(1, 21):
+            self.canvas.drag(MagicMock(x=100 + offset, y=100))
+        self.on_display_moved.assert_not_called()
+
+        self.canvas.flush()
+        screen_x, screen_y = self.canvas.canvas_to_screen(120, 100)
+        self.on_display_moved.assert_called_once_with("DISPLAY1", screen_x, screen_y)
+
+    def test_pan_coalesces_redraws(self):
+        """Test that pan events redraw once per frame"""
+        self.canvas.start_pan(MagicMock(x=0, y=0))
+
+        with patch.object(self.canvas, "redraw") as mock_redraw:
+            for offset in range(1, 11):
+                self.canvas.pan(MagicMock(x=offset, y=offset))
+            mock_redraw.assert_not_called()
+
+            self.canvas.flush()
+            mock_redraw.assert_called_once()
+
+        self.assertEqual(self.canvas.offset_x, 110)
+
+    def test_end_drag_flushes_pending_move(self):
+        """Test that releasing the mouse delivers the last position"""
+        self.canvas._drag_data = {"x": 100, "y": 100, "display": "DISPLAY1"}
+        self.canvas.drag(MagicMock(x=150, y=150))
+
+        self.canvas.end_drag(None)
+
+        self.on_display_moved.assert_called_once()
+
+    def test_display_at(self):
+        """Test hit-testing displays and empty space"""
+        self.canvas.update_displays(self.test_displays)
+
+        self.assertEqual(self.canvas.display_at(150, 150), "DISPLAY1")
+        self.assertIsNone(self.canvas.display_at(50, 50))
+
+    def test_start_drag_on_empty_space(self):
+        """Test that clicking empty space does not pick the nearest display"""
+        self.canvas.update_displays(self.test_displays)
+
+        self.canvas.start_drag(MagicMock(x=50, y=50))
+
+        self.assertIsNone(self.canvas._drag_data["display"])
+        self.assertIsNone(self.canvas.selected)
+
+    def test_rubber_band_selection(self):
+        """Test selecting displays by dragging a rectangle"""
+        displays = dict(self.test_displays)
+        displays["DISPLAY2"] = dict(self.test_displays["DISPLAY1"], x=1920)
+        displays["DISPLAY3"] = dict(self.test_displays["DISPLAY1"], x=3840)
+        self.canvas.update_displays(displays)
+
+        self.canvas.start_drag(MagicMock(x=50, y=50))
+        self.canvas.drag(MagicMock(x=350, y=150))
+        self.canvas.end_drag(MagicMock(x=350, y=150))
+
+        self.assertEqual(self.canvas.selected_group, {"DISPLAY1", "DISPLAY2"})
+        self.assertEqual(self.canvas.find_withtag("rubber_band"), ())
+
+    def test_hover_highlight(self):
+        """Test that hovering a display highlights its outline"""
+        self.canvas.update_displays(self.test_displays)
+        rect, _ = self.canvas._display_items["DISPLAY1"]
+
+        self.canvas.on_hover(MagicMock(x=150, y=150))
+        self.assertEqual(self.canvas.hovered, "DISPLAY1")
+        self.assertEqual(self.canvas.itemcget(rect, "outline"), "#0D47A1")
+
+        self.canvas.on_hover(MagicMock(x=50, y=50))
+        self.assertIsNone(self.canvas.hovered)
+        self.assertEqual(self.canvas.itemcget(rect, "outline"), "#2196F3")
+
+    def test_drag_snaps_to_neighbour_edge(self):
+        """Test that dragging near another display snaps to its edge"""
+        displays = dict(self.test_displays)
+        displays["DISPLAY2"] = dict(self.test_displays["DISPLAY1"], x=4000)
+        self.canvas.update_displays(displays)
+        self.canvas._drag_data = {"x": 500, "y": 100, "display": "DISPLAY2"}
+
+        # 1950 on screen, within snapping distance of DISPLAY1's right edge
+        self.canvas.drag(MagicMock(x=295, y=101))
+        self.canvas.flush()
+
+        self.on_display_moved.assert_called_with("DISPLAY2", 1920, 0)
+
+    def test_show_diagnostics(self):
+        """Test drawing and clearing layout diagnostics"""
+        self.canvas.update_displays(self.test_displays)
+        report = {
+            "valid": False,
+            "overlaps": [{"displays": ("A", "B"), "rect": (0, 0, 100, 100)}],
+            "gaps": [],
+            "islands": [["A", "B"]],
+        }
+
+        self.canvas.show_diagnostics(report)
+        self.assertEqual(len(self.canvas.find_withtag("diagnostic")), 1)
+
+        # Moving a display clears the outdated markers
+        moved = {"DISPLAY1": dict(self.test_displays["DISPLAY1"], x=100)}
+        self.canvas.update_displays(moved)
+        self.assertEqual(self.canvas.find_withtag("diagnostic"), ())
+
+    def test_diagnostics_stay_on_top_after_zoom(self):
+        """Test that markers are not hidden by displays when the grid grows"""
+        self.canvas.update_displays(self.test_displays)
+        report = {
+            "valid": False,
+            "overlaps": [{"displays": ("A", "B"), "rect": (0, 0, 100, 100)}],
+            "gaps": [],
+            "islands": [["A", "B"]],
+        }
+        self.canvas.show_diagnostics(report)
+
+        self.canvas.scale *= 2  # New grid items are created
+        self.canvas.redraw()
+
+        stacking = self.canvas.find_all()
+        marker = stacking.index(self.canvas.find_withtag("diagnostic")[0])
+        for item in self.canvas.find_withtag("display"):
+            self.assertLess(stacking.index(item), marker)
+
     def test_end_drag(self):
         """Test ending drag operation"""
         # Setup drag
@@ -143,6 +275,79 @@ class TestDisplayCanvas(unittest.TestCase):
         mock_create_rectangle.assert_called()  # Display rectangles
         mock_create_text.assert_called()  # Display labels
 
+    def test_redraw_reuses_items(self):
+        """Test that redraws update existing items instead of recreating them"""
+        self.canvas.update_displays(self.test_displays)
+        items = set(self.canvas.find_all())
+        rect, _ = self.canvas._display_items["DISPLAY1"]
+
+        # Move the display and redraw
+        moved = {"DISPLAY1": dict(self.test_displays["DISPLAY1"], x=1920)}
+        self.canvas.update_displays(moved)
+        self.canvas.redraw()
+
+        self.assertEqual(set(self.canvas.find_all()), items)
+        x, y = self.canvas.screen_to_canvas(1920, 0)
+        self.assertEqual(self.canvas.coords(rect)[:2], [x, y])
+
+    def test_select_display_restyles_item(self):
+        """Test that selection only changes the display fill"""
+        self.canvas.update_displays(self.test_displays)
+        rect, _ = self.canvas._display_items["DISPLAY1"]
+
+        self.canvas.select_display("DISPLAY1")
+        self.assertEqual(self.canvas.itemcget(rect, "fill"), "#E3F2FD")
+
+        self.canvas.select_display(None)
+        self.assertEqual(self.canvas.itemcget(rect, "fill"), "white")
+
+    def test_removed_display_items_deleted(self):
+        """Test that items of removed displays are deleted"""
+        self.canvas.update_displays(self.test_displays)
+        self.canvas.update_displays({})
+
+        self.assertEqual(self.canvas.find_withtag("display"), ())
+
+    def test_grid_step_within_budget(self):
+        """Test that the grid step keeps the line count within budget"""
+        for scale in (0.01, 0.05, 0.1, 0.5, 1.0):
+            self.canvas.scale = scale
+            step = self.canvas.grid_step(1920, 1080)
+            lines = (1920 + 1080) * 1.5 / (step * scale)
+            self.assertLessEqual(lines, GRID_LINE_BUDGET, scale)
+
+    def test_min_zoom_grid_line_count(self):
+        """Test that zooming out does not create thousands of grid lines"""
+        self.canvas.scale = 0.01
+        self.canvas.update_displays(self.test_displays)
+
+        visible = [
+            item
+            for item in self.canvas.find_withtag("grid_line")
+            if self.canvas.itemcget(item, "state") != "hidden"
+        ]
+        self.assertLessEqual(len(visible), GRID_LINE_BUDGET)
+
+    def test_pan_reuses_grid_layer(self):
+        """Test that a small pan moves the grid instead of rebuilding it"""
+        self.canvas.update_displays(self.test_displays)
+        items = self.canvas.find_withtag("grid")
+
+        with patch.object(self.canvas, "coords") as mock_coords:
+            self.canvas.offset_x += 1
+            self.canvas.redraw()
+            mock_coords.assert_not_called()
+
+        self.assertEqual(self.canvas.find_withtag("grid"), items)
+
+    def test_redraw_skipped_without_size(self):
+        """Test that an unsized canvas does not create any items"""
+        canvas = DisplayCanvas(self.root, MagicMock())
+        canvas.update_displays(self.test_displays)
+
+        self.assertEqual(canvas.displays, self.test_displays)
+        self.assertEqual(canvas.find_all(), ())
+
     def test_on_mousewheel(self):
         """Test mousewheel scrolling"""
         event = MagicMock()
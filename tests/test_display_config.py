@@ -3,7 +3,10 @@ from unittest.mock import patch, MagicMock
 import win32api
 import win32con
 import ctypes
+from concurrent.futures import ThreadPoolExecutor
+from src.display_backend import SimulatedBackend
 from src.display_config import DisplayConfig, DEVMODE
+from tests.test_helpers import FakeUser32
 
 
 class TestDisplayConfig(unittest.TestCase):
@@ -85,3 +88,266 @@ class TestDisplayConfig(unittest.TestCase):
         # Verify
         self.assertTrue(result)
         self.assertEqual(self.display_config.pending_changes, {})
+
+    @patch("win32api.EnumDisplayDevices", side_effect=win32api.error)
+    def test_commit_changes_single_reset(self, mock_enum_devices):
+        """Test that all devices are staged before one global reset"""
+        names = [f"\\\\.\\DISPLAY{i}" for i in range(1, 7)]
+        for i, name in enumerate(names):
+            self.display_config.displays[name] = self.create_mock_devmode()
+            self.display_config.set_position(name, (i + 1) * 1920, 0)
+
+        user32 = FakeUser32(reset_latency=0.001)
+        with patch("ctypes.windll.user32", user32):
+            results = self.display_config.commit_changes()
+
+        self.assertEqual(user32.staged, names)
+        self.assertEqual(user32.reset_count, 1)
+        self.assertAlmostEqual(user32.elapsed, 0.001)
+        self.assertEqual(results, {name: 0 for name in names})
+
+    @patch("win32api.EnumDisplayDevices", side_effect=win32api.error)
+    def test_apply_changes_reports_failed_device(self, mock_enum_devices):
+        """Test per-device result codes when one device is rejected"""
+        other_name = "\\\\.\\DISPLAY2"
+        self.display_config.displays[self.display_name] = self.create_mock_devmode()
+        self.display_config.displays[other_name] = self.create_mock_devmode()
+        self.display_config.set_position(self.display_name, 0, 0)
+        self.display_config.set_position(other_name, 1920, 0)
+
+        user32 = FakeUser32(
+            result_codes={other_name: -2},  # DISP_CHANGE_BADMODE
+            test_codes={other_name: 0},  # Passes the preflight check
+        )
+        with patch("ctypes.windll.user32", user32):
+            self.assertFalse(self.display_config.apply_changes())
+
+        self.assertEqual(user32.reset_count, 1)
+        self.assertEqual(self.display_config.pending_changes, {})
+
+    def test_apply_changes_rejected_by_preflight(self):
+        """Test that nothing is staged when the driver test fails"""
+        other_name = "\\\\.\\DISPLAY2"
+        self.display_config.displays[self.display_name] = self.create_mock_devmode()
+        self.display_config.displays[other_name] = self.create_mock_devmode()
+        self.display_config.set_position(self.display_name, 0, 0)
+        self.display_config.set_position(other_name, 1920, 0)
+
+        user32 = FakeUser32(result_codes={other_name: -2})  # DISP_CHANGE_BADMODE
+        with patch("ctypes.windll.user32", user32):
+            self.assertFalse(self.display_config.apply_changes())
+
+        self.assertEqual(user32.tested, [other_name])
+        self.assertEqual(user32.staged, [])
+        self.assertEqual(user32.reset_count, 0)
+        self.assertEqual(
+            self.display_config.pending_changes[other_name], {"x": 1920, "y": 0}
+        )
+
+    def test_plan_changes_drops_noop_devices(self):
+        """Test that changes matching the current settings are dropped"""
+        other_name = "\\\\.\\DISPLAY2"
+        self.display_config.displays[self.display_name] = self.create_mock_devmode()
+        self.display_config.displays[other_name] = self.create_mock_devmode()
+        self.display_config.set_position(self.display_name, 0, 0)
+        self.display_config.set_position(other_name, 1920, 0)
+        self.display_config.set_orientation(other_name, 0)
+
+        plan = self.display_config.plan_changes()
+
+        self.assertEqual(plan, {other_name: {"x": 1920}})
+
+    def test_apply_changes_noop_skips_driver(self):
+        """Test that reapplying the current layout makes no driver calls"""
+        self.display_config.displays[self.display_name] = self.create_mock_devmode()
+        self.display_config.set_position(self.display_name, 0, 0)
+
+        user32 = FakeUser32()
+        with patch("ctypes.windll.user32", user32):
+            self.assertTrue(self.display_config.apply_changes())
+
+        self.assertEqual(user32.staged, [])
+        self.assertEqual(user32.reset_count, 0)
+        self.assertEqual(self.display_config.pending_changes, {})
+
+    def test_modes_read_once(self):
+        """Test that supported modes are read from the driver once"""
+        self.display_config.displays[self.display_name] = self.create_mock_devmode()
+        user32 = FakeUser32(
+            modes=[
+                (1920, 1080, 60, 32),
+                (1920, 1080, 144, 32),
+                (2560, 1440, 60, 32),
+                (1920, 1080, 144, 32),  # Drivers repeat modes
+            ]
+        )
+
+        with patch("ctypes.windll.user32", user32):
+            catalogue = self.display_config.modes(self.display_name)
+            self.assertIs(self.display_config.modes(self.display_name), catalogue)
+            self.display_config.set_mode(self.display_name, 1920, 1080)
+
+        self.assertEqual(user32.mode_reads, 5)
+        self.assertEqual(len(catalogue), 3)
+        self.assertEqual(
+            self.display_config.plan_changes(),
+            {self.display_name: {"refresh_rate": 144, "bits_per_pixel": 32}},
+        )
+
+    @patch("win32api.EnumDisplayDevices")
+    @patch("ctypes.windll.user32.EnumDisplaySettingsW", return_value=1)
+    def test_refresh_displays_targeted(self, mock_enum_settings, mock_enum_devices):
+        """Test that only the given displays are re-read"""
+        other_name = "\\\\.\\DISPLAY2"
+        other = self.create_mock_devmode()
+        self.display_config.displays[self.display_name] = self.create_mock_devmode()
+        self.display_config.displays[other_name] = other
+
+        self.display_config.refresh_displays([self.display_name])
+
+        mock_enum_devices.assert_not_called()
+        self.assertEqual(mock_enum_settings.call_count, 1)
+        self.assertEqual(mock_enum_settings.call_args[0][0], self.display_name)
+        self.assertIs(self.display_config.displays[other_name], other)
+
+    @patch("win32api.EnumDisplayDevices", side_effect=win32api.error)
+    @patch("ctypes.windll.user32.EnumDisplaySettingsW", return_value=0)
+    def test_refresh_displays_falls_back_to_full_scan(
+        self, mock_enum_settings, mock_enum_devices
+    ):
+        """Test full enumeration when a display has been disconnected"""
+        self.display_config.displays[self.display_name] = self.create_mock_devmode()
+
+        self.display_config.refresh_displays([self.display_name])
+
+        mock_enum_devices.assert_called()
+        self.assertEqual(self.display_config.displays, {})
+
+
+class TestDisplayConfigVersioning(unittest.TestCase):
+    def setUp(self):
+        self.backend = SimulatedBackend(count=3)
+        self.config = DisplayConfig(self.backend)
+        self.names = list(self.config.displays)
+
+    def test_snapshot_cached_per_version(self):
+        """Test that the snapshot is reused until something changes"""
+        snapshot = self.config.snapshot()
+        self.assertIs(self.config.snapshot(), snapshot)
+        with self.assertRaises(TypeError):
+            snapshot[self.names[0]]["x"] = 5
+
+        self.config.set_position(self.names[0], 0, 0)  # Same position
+        self.assertIs(self.config.snapshot(), snapshot)
+
+        self.config.set_position(self.names[0], 100, 0)
+        updated = self.config.snapshot()
+        self.assertIsNot(updated, snapshot)
+        self.assertEqual(updated[self.names[0]]["x"], 100)
+        self.assertEqual(updated[self.names[1]], snapshot[self.names[1]])
+
+    def test_changes_since(self):
+        """Test that only the touched displays are reported as changed"""
+        version = self.config.version
+
+        self.config.set_position(self.names[1], 1920, 100)
+        self.config.set_orientation(self.names[2], 1)
+
+        self.assertGreater(self.config.version, version)
+        self.assertEqual(
+            self.config.changes_since(version), {self.names[1], self.names[2]}
+        )
+
+        version = self.config.version
+        self.config.discard_changes()
+        self.assertEqual(
+            self.config.changes_since(version), {self.names[1], self.names[2]}
+        )
+        self.assertEqual(self.config.snapshot()[self.names[1]]["y"], 0)
+
+    def test_restore_pending(self):
+        """Test that restoring replaces the pending changes in a new version"""
+        self.config.set_position(self.names[1], 1920, 100)
+        saved = {self.names[2]: {"x": 10, "y": 1080}}
+        version = self.config.version
+
+        self.config.restore_pending(saved)
+        saved[self.names[2]]["x"] = 20
+
+        self.assertEqual(
+            self.config.pending_changes, {self.names[2]: {"x": 10, "y": 1080}}
+        )
+        self.assertEqual(
+            self.config.changes_since(version), {self.names[1], self.names[2]}
+        )
+
+    def test_apply_and_enumerate_bump_version(self):
+        """Test that applying and re-enumerating start new versions"""
+        self.config.set_position(self.names[1], 1920, -10)
+        version = self.config.version
+
+        self.assertTrue(self.config.apply_changes())
+        self.assertEqual(self.config.changes_since(version), {self.names[1]})
+
+        version = self.config.version
+        self.backend.disconnect(self.names[2])
+        self.config.enumerate_displays()
+        self.assertEqual(self.config.changes_since(version), set(self.names))
+        self.assertNotIn(self.names[2], self.config.snapshot())
+
+
+class TestDisplayConfigAsyncCommit(unittest.TestCase):
+    def setUp(self):
+        self.backend = SimulatedBackend(count=3, reset_latency=0.05)
+        self.config = DisplayConfig(self.backend)
+        self.names = list(self.config.displays)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_progress_and_results(self):
+        """Test that every staged device is reported"""
+        progress = []
+        self.config.set_position(self.names[1], 1920, -10)
+        self.config.set_position(self.names[2], 10, 1080)
+
+        future = self.config.commit_changes_async(
+            self.executor, lambda *args: progress.append(args)
+        )
+        self.assertTrue(self.config.committing)
+        results = future.result()
+        self.config.finish_commit(future)
+
+        self.assertEqual(results, {self.names[1]: 0, self.names[2]: 0})
+        self.assertEqual(progress, [(self.names[1], 0, 1, 2), (self.names[2], 0, 2, 2)])
+        self.assertFalse(self.config.committing)
+        self.assertEqual(self.config.pending_changes, {})
+        self.assertEqual(self.config.snapshot()[self.names[2]]["x"], 10)
+        self.assertEqual(self.backend.reset_count, 1)
+
+    def test_edits_during_commit_are_queued(self):
+        """Test that changes made while committing stay pending"""
+        self.config.set_position(self.names[1], 1920, -10)
+        future = self.config.commit_changes_async(self.executor)
+
+        self.config.set_position(self.names[2], 10, 1080)
+        with self.assertRaises(RuntimeError):
+            self.config.commit_changes_async(self.executor)
+
+        future.result()
+        self.config.finish_commit(future)
+
+        self.assertEqual(
+            self.config.pending_changes, {self.names[2]: {"x": 10, "y": 1080}}
+        )
+        self.assertEqual(self.config.snapshot()[self.names[1]]["y"], -10)
+        self.assertEqual(self.config.snapshot()[self.names[2]]["x"], 10)
+
+    def test_nothing_to_commit(self):
+        """Test that an empty plan resolves at once without a commit"""
+        future = self.config.commit_changes_async(self.executor)
+
+        self.assertEqual(future.result(), {})
+        self.assertFalse(self.config.committing)
+        self.assertEqual(self.backend.reset_count, 0)
@@ -0,0 +1,50 @@
+import unittest
+from src.display_modes import DisplayMode, ModeCatalogue
+
+
+class TestModeCatalogue(unittest.TestCase):
+    def setUp(self):
+        self.catalogue = ModeCatalogue(
+            [
+                (1920, 1080, 60, 32),
+                (1920, 1080, 144, 16),
+                (1920, 1080, 144, 32),
+                (2560, 1440, 60, 32),
+                (2560, 1440, 60, 32),
+                (1280, 720, 60, 32),
+            ]
+        )
+
+    def test_duplicates_dropped(self):
+        """Test that repeated driver modes are stored once"""
+        self.assertEqual(len(self.catalogue), 5)
+        self.assertIn(DisplayMode(2560, 1440, 60, 32), self.catalogue)
+        self.assertNotIn(DisplayMode(2560, 1440, 144, 32), self.catalogue)
+
+    def test_best_mode(self):
+        """Test picking the highest refresh rate and color depth"""
+        self.assertEqual(
+            self.catalogue.best_mode(1920, 1080), DisplayMode(1920, 1080, 144, 32)
+        )
+        self.assertEqual(
+            self.catalogue.best_mode(1920, 1080, 60), DisplayMode(1920, 1080, 60, 32)
+        )
+        self.assertEqual(
+            self.catalogue.best_mode(1920, 1080, bits_per_pixel=16),
+            DisplayMode(1920, 1080, 144, 16),
+        )
+        self.assertIsNone(self.catalogue.best_mode(1920, 1080, 75))
+        self.assertIsNone(self.catalogue.best_mode(3840, 2160))
+
+    def test_resolutions_and_refresh_rates(self):
+        """Test listing choices largest and fastest first"""
+        self.assertEqual(
+            self.catalogue.resolutions(), [(2560, 1440), (1920, 1080), (1280, 720)]
+        )
+        self.assertEqual(self.catalogue.refresh_rates(1920, 1080), [144, 60])
+        self.assertEqual(self.catalogue.refresh_rates(800, 600), [])
+        self.assertEqual(next(iter(self.catalogue)), DisplayMode(2560, 1440, 60, 32))
+
+
+if __name__ == "__main__":
+    unittest.main()
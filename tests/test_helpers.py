@@ -1,6 +1,8 @@
+import time
 import unittest
 from unittest.mock import MagicMock
 import tkinter as tk
+from src.display_backend import CDS_TEST
 
 
 class TkinterTestCase(unittest.TestCase):
@@ -47,3 +49,58 @@ def create_mock_event(**kwargs):
     for key, value in kwargs.items():
         setattr(event, key, value)
     return event
+
+
+class FakeUser32:
+    """In-memory stand-in for the user32 display functions
+
+    Counts staged devices and global mode resets, and simulates the
+    latency of each reset. ``modes`` lists the (width, height, refresh
+    rate, bits per pixel) modes reported for every device. CDS_TEST calls
+    are recorded in ``tested`` and answered from ``test_codes``, falling
+    back to ``result_codes``.
+    """
+
+    def __init__(self, result_codes=None, reset_latency=0.0, modes=(), test_codes=None):
+        self.result_codes = result_codes or {}
+        self.test_codes = test_codes or {}
+        self.tested = []
+        self.reset_latency = reset_latency
+        self.modes = list(modes)
+        self.mode_reads = 0
+        self.staged = []
+        self.reset_count = 0
+        self.elapsed = 0.0
+
+    def ChangeDisplaySettingsExW(self, device_name, devmode, hwnd, flags, param):
+        if device_name is None:
+            self.reset_count += 1
+            self.elapsed += self.reset_latency
+            if self.reset_latency:
+                time.sleep(self.reset_latency)
+            return 0
+
+        if flags & CDS_TEST:
+            self.tested.append(device_name)
+            return self.test_codes.get(
+                device_name, self.result_codes.get(device_name, 0)
+            )
+
+        self.staged.append(device_name)
+        return self.result_codes.get(device_name, 0)
+
+    def EnumDisplaySettingsW(self, device_name, mode_num, devmode):
+        if mode_num < 0:  # ENUM_CURRENT_SETTINGS
+            return 1
+
+        self.mode_reads += 1
+        if mode_num >= len(self.modes):
+            return 0
+        settings = devmode._obj
+        (
+            settings.dmPelsWidth,
+            settings.dmPelsHeight,
+            settings.dmDisplayFrequency,
+            settings.dmBitsPerPel,
+        ) = self.modes[mode_num]
+        return 1
@@ -0,0 +1,160 @@
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from src.display_backend import SimulatedBackend
+from src.display_config import DisplayConfig
+from src.hotplug import HotplugWatcher, ScriptedChangeSource, Win32ChangeSource
+from src.profiles import ProfileStore
+
+
+class TestChangeSource(unittest.TestCase):
+    def test_events_are_consumed(self):
+        """Test that one wait consumes every queued event"""
+        source = ScriptedChangeSource()
+        source.notify(3)
+
+        self.assertTrue(source.wait(0))
+        self.assertFalse(source.wait(0))
+
+    def test_close_wakes_waiters(self):
+        """Test that closing releases a blocked wait"""
+        source = ScriptedChangeSource()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(source.wait()))
+        waiter.start()
+
+        source.close()
+        waiter.join(1)
+
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(results, [False])
+
+    def test_win32_source_setup_error(self):
+        """Test that a listener window that cannot be created is raised"""
+        win32gui = MagicMock()
+        win32gui.RegisterClass.side_effect = RuntimeError("class already exists")
+        modules = {"win32gui": win32gui, "win32con": MagicMock()}
+
+        with patch.dict(sys.modules, modules):
+            with self.assertRaisesRegex(RuntimeError, "class already exists"):
+                Win32ChangeSource()
+
+
+class TestHotplugWatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.backend = SimulatedBackend(count=2)
+        self.config = DisplayConfig(self.backend)
+        self.store = ProfileStore(os.path.join(self.temp_dir.name, "profiles.json"))
+        self.names = list(self.config.displays)
+
+        # Saved layout with the second display on the left
+        self.config.set_position(self.names[1], -1920, 0)
+        self.store.save_profile("docked", self.config)
+        self.config.discard_changes()
+
+        self.source = ScriptedChangeSource()
+        self.events = queue.Queue()
+        self.watcher = HotplugWatcher(
+            self.config,
+            self.store,
+            self.source,
+            debounce=0.05,
+            on_change=self.events.put,
+        )
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.temp_dir.cleanup()
+
+    def test_burst_reapplies_profile_once(self):
+        """Test that a burst of events causes one enumeration and commit"""
+        thread = threading.Thread(target=self.watcher.run)
+        thread.start()
+        enumerations = self.backend.calls["enumerate_devices"]
+
+        self.source.notify(5)
+        event = self.events.get(timeout=2)
+        self.watcher.stop()
+        thread.join(2)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.backend.calls["enumerate_devices"], enumerations + 1)
+        self.assertEqual(event["profile"], "docked")
+        self.assertTrue(event["ok"])
+        self.assertLess(event["latency"], 1.0)
+        self.assertEqual(self.backend.reset_count, 1)
+        self.assertEqual(self.backend.devices[self.names[1]].dmPositionX, -1920)
+        self.assertEqual(list(self.watcher.history), [event])
+
+    def test_failed_change_keeps_watching(self):
+        """Test that an error is reported and later changes still handled"""
+        thread = threading.Thread(target=self.watcher.run)
+        thread.start()
+
+        with patch.object(
+            self.config, "enumerate_displays", side_effect=RuntimeError("driver gone")
+        ):
+            self.source.notify()
+            failed = self.events.get(timeout=2)
+        self.source.notify()
+        recovered = self.events.get(timeout=2)
+        self.watcher.stop()
+        thread.join(2)
+
+        self.assertFalse(failed["ok"])
+        self.assertEqual(failed["error"], "RuntimeError: driver gone")
+        self.assertTrue(recovered["ok"])
+        self.assertEqual(recovered["profile"], "docked")
+
+    def test_own_commit_is_not_reapplied(self):
+        """Test that the change caused by a reapply does not cause another"""
+        first = self.watcher.handle_change()
+        # Windows moved the display after the commit
+        self.backend.devices[self.names[1]].dmPositionY = 10
+        echo = self.watcher.handle_change()
+
+        self.assertFalse(first["echo"])
+        self.assertTrue(echo["echo"])
+        self.assertEqual(echo["results"], {})
+        self.assertEqual(self.backend.reset_count, 1)
+
+        # Once the echo window has passed the profile is enforced again
+        self.watcher.echo_window = -1
+        self.assertFalse(self.watcher.handle_change()["echo"])
+        self.assertEqual(self.backend.reset_count, 2)
+
+    def test_latency_budget(self):
+        """Test that slow changes are reported as over budget"""
+        self.assertFalse(self.watcher.handle_change()["over_budget"])
+
+        self.watcher.latency_budget = 0.5
+        event = self.watcher.handle_change(time.monotonic() - 1)
+        self.assertTrue(event["over_budget"])
+
+    def test_no_matching_profile(self):
+        """Test that unknown monitor sets are only re-enumerated"""
+        self.backend.connect("\\\\.\\DISPLAY3", 3840, 0)
+
+        event = self.watcher.handle_change()
+
+        self.assertIsNone(event["profile"])
+        self.assertEqual(event["displays"], 3)
+        self.assertEqual(self.backend.reset_count, 0)
+
+    def test_preferred_profile(self):
+        """Test that the preferred profile wins over newer matches"""
+        self.store.save_profile("presenting", self.config)
+        self.assertEqual(self.watcher.choose_profile(), "presenting")
+
+        self.watcher.profile = "docked"
+        self.assertEqual(self.watcher.choose_profile(), "docked")
+
+
+if __name__ == "__main__":
+    unittest.main()
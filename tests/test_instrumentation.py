@@ -0,0 +1,99 @@
+import json
+import unittest
+from src import instrumentation
+from src.display_backend import SimulatedBackend
+from src.display_config import DisplayConfig
+from src.instrumentation import Tracer, percentile, traced
+
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        """Test that disabled spans are a shared no-op"""
+        tracer = Tracer()
+        with tracer.span("work"):
+            pass
+
+        self.assertIs(tracer.span("a"), tracer.span("b"))
+        self.assertEqual(len(tracer.spans), 0)
+
+    def test_ring_buffer(self):
+        """Test that only the newest spans are kept"""
+        tracer = Tracer(capacity=3, enabled=True)
+        for i in range(5):
+            with tracer.span(f"span{i}", index=i):
+                pass
+
+        self.assertEqual([s.name for s in tracer.spans], ["span2", "span3", "span4"])
+        self.assertEqual(tracer.spans[0].args, {"index": 2})
+
+    def test_percentile(self):
+        """Test interpolated percentiles"""
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(percentile(values, 50), 3.0)
+        self.assertEqual(percentile(values, 90), 4.6)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_summary_and_exports(self):
+        """Test the summary and both export formats"""
+        tracer = Tracer(enabled=True)
+        for _ in range(4):
+            with tracer.span("work"):
+                pass
+
+        summary = tracer.summary()
+        self.assertEqual(summary["work"]["count"], 4)
+        self.assertLessEqual(summary["work"]["p50"], summary["work"]["max"])
+
+        exported = json.loads(tracer.export_json())
+        self.assertEqual(len(exported["spans"]), 4)
+        self.assertIn("work", exported["summary"])
+
+        events = json.loads(tracer.export_chrome_trace())["traceEvents"]
+        self.assertEqual(len(events), 4)
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["name"], "work")
+
+
+class TestInstrumentedPaths(unittest.TestCase):
+    def setUp(self):
+        self.was_enabled = instrumentation.tracer.enabled
+        instrumentation.tracer.enable()
+        instrumentation.tracer.clear()
+
+    def tearDown(self):
+        instrumentation.tracer.enabled = self.was_enabled
+        instrumentation.tracer.clear()
+
+    def test_traced_decorator(self):
+        """Test that decorated functions are timed and keep their result"""
+
+        @traced("decorated")
+        def work(value):
+            return value * 2
+
+        self.assertEqual(work(2), 4)
+        self.assertEqual(instrumentation.tracer.spans[-1].name, "decorated")
+
+    def test_apply_spans(self):
+        """Test that enumeration and every driver call are timed"""
+        config = DisplayConfig(SimulatedBackend(count=3))
+        names = list(config.displays)
+        config.set_position(names[1], 1920, -10)
+        config.set_position(names[2], 10, 1080)
+        config.apply_changes()
+
+        spans = [(s.name, s.args) for s in instrumentation.tracer.spans]
+        self.assertEqual(
+            spans,
+            [
+                ("config.enumerate_displays", None),
+                ("config.test", {"devices": 2}),
+                ("config.stage", {"device": names[1]}),
+                ("config.stage", {"device": names[2]}),
+                ("config.commit", {"devices": 2}),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,363 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from src.display_backend import DISP_CHANGE_BADMODE, SimulatedBackend
+from src.display_config import DisplayConfig
+from src.ipc_server import (
+    APPLY_FAILED,
+    INTERNAL_ERROR,
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    IpcClient,
+    IpcError,
+    IpcServer,
+)
+
+
+class TestIpcServerDispatch(unittest.TestCase):
+    def setUp(self):
+        self.backend = SimulatedBackend(count=3)
+        self.config = DisplayConfig(self.backend)
+        self.names = list(self.config.displays)
+        self.server = IpcServer(self.config, address="unused")
+
+    def request(self, method, **params):
+        message = json.dumps(
+            {"jsonrpc": "2.0", "id": 7, "method": method, "params": params}
+        )
+        return json.loads(self.server.handle_message(message.encode("utf-8")))
+
+    def test_snapshot(self):
+        """Test that the snapshot includes pending changes"""
+        self.request("set_position", device=self.names[1], x=1920, y=-10)
+        response = self.request("snapshot")
+
+        self.assertEqual(response["id"], 7)
+        displays = response["result"]["displays"]
+        self.assertEqual(displays[1]["y"], -10)
+        self.assertEqual(
+            response["result"]["pending"], {self.names[1]: {"x": 1920, "y": -10}}
+        )
+
+    def test_snapshot_pending_is_a_copy(self):
+        """Test that snapshots do not share the live pending changes"""
+        self.request("set_position", device=self.names[1], x=1920, y=-10)
+        pending = self.server.rpc_snapshot()["pending"]
+        self.config.set_position(self.names[1], 1920, -20)
+
+        self.assertEqual(pending, {self.names[1]: {"x": 1920, "y": -10}})
+
+    def test_errors(self):
+        """Test JSON-RPC error responses"""
+        self.assertEqual(self.request("reboot")["error"]["code"], METHOD_NOT_FOUND)
+        self.assertEqual(
+            self.request("set_position", device="nope", x=0, y=0)["error"]["code"],
+            INVALID_PARAMS,
+        )
+        self.assertEqual(
+            self.request("set_orientation", device=self.names[0], degrees=45)["error"][
+                "code"
+            ],
+            INVALID_PARAMS,
+        )
+        self.assertEqual(
+            self.request("set_position", device=self.names[0])["error"]["code"],
+            INVALID_PARAMS,
+        )
+        self.assertEqual(
+            self.request(
+                "batch",
+                operations=[{"method": "set_position", "params": [1, 2]}],
+            )["error"]["code"],
+            INVALID_PARAMS,
+        )
+        for operations in (5, None, {"method": "discard"}):
+            self.assertEqual(
+                self.request("batch", operations=operations)["error"]["code"],
+                INVALID_PARAMS,
+            )
+        response = json.loads(self.server.handle_message(b"{not json"))
+        self.assertEqual(response["error"]["code"], PARSE_ERROR)
+
+    def test_invalid_method(self):
+        """Test that a method that is not a string is an invalid request"""
+        response = json.loads(self.server.handle_message(b'{"method": ["a"]}'))
+        self.assertEqual(response["error"]["code"], INVALID_REQUEST)
+
+    def test_internal_errors(self):
+        """Test that failures inside a handler are internal errors"""
+        self.request("set_position", device=self.names[1], x=1920, y=-10)
+        with patch.object(self.backend, "stage", side_effect=OSError("driver gone")):
+            response = self.request("apply")
+        self.assertEqual(response["error"]["code"], INTERNAL_ERROR)
+        self.assertIn("driver gone", response["error"]["message"])
+
+        # Not mistaken for bad params
+        with patch.object(self.config, "modes", side_effect=TypeError("bug")):
+            response = self.request("modes", device=self.names[0])
+        self.assertEqual(response["error"]["code"], INTERNAL_ERROR)
+
+    def test_batch_internal_error_rolls_back(self):
+        """Test that a failing operation restores the pending changes"""
+        with patch.object(self.config, "set_orientation", side_effect=TypeError("bug")):
+            response = self.request(
+                "batch",
+                operations=[
+                    {
+                        "method": "set_position",
+                        "params": {"device": self.names[1], "x": 1920, "y": -10},
+                    },
+                    {
+                        "method": "set_orientation",
+                        "params": {"device": self.names[1], "degrees": 90},
+                    },
+                ],
+                apply=False,
+            )
+
+        self.assertEqual(response["error"]["code"], INTERNAL_ERROR)
+        self.assertEqual(self.config.pending_changes, {})
+
+    def test_batch_single_commit(self):
+        """Test that a batch is committed with one mode reset"""
+        response = self.request(
+            "batch",
+            operations=[
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[1], "x": 1920, "y": -10},
+                },
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[2], "x": 10, "y": 1080},
+                },
+                {
+                    "method": "set_orientation",
+                    "params": {"device": self.names[0], "degrees": 0},
+                },
+            ],
+        )
+
+        self.assertEqual(
+            response["result"]["results"], {self.names[1]: 0, self.names[2]: 0}
+        )
+        self.assertEqual(self.backend.reset_count, 1)
+        self.assertEqual(self.config.pending_changes, {})
+
+    def test_batch_set_mode(self):
+        """Test that a mode change can be batched with a move"""
+        response = self.request(
+            "batch",
+            operations=[
+                {
+                    "method": "set_mode",
+                    "params": {"device": self.names[1], "width": 1280, "height": 720},
+                },
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[2], "x": 10, "y": 1080},
+                },
+            ],
+        )
+
+        self.assertEqual(
+            response["result"]["results"], {self.names[1]: 0, self.names[2]: 0}
+        )
+        self.assertEqual(self.backend.devices[self.names[1]].dmPelsWidth, 1280)
+        self.assertEqual(
+            self.request("set_mode", device=self.names[1], width=1, height=1)["error"][
+                "code"
+            ],
+            INVALID_PARAMS,
+        )
+
+    def test_batch_rolls_back_invalid_operation(self):
+        """Test that a bad operation leaves earlier pending changes alone"""
+        self.request("set_position", device=self.names[1], x=1920, y=-5)
+
+        response = self.request(
+            "batch",
+            operations=[
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[2], "x": 10, "y": 1080},
+                },
+                {
+                    "method": "set_position",
+                    "params": {"device": "nope", "x": 0, "y": 0},
+                },
+            ],
+            apply=False,
+        )
+
+        self.assertEqual(response["error"]["code"], INVALID_PARAMS)
+        self.assertEqual(
+            self.config.pending_changes, {self.names[1]: {"x": 1920, "y": -5}}
+        )
+        self.assertEqual(self.backend.reset_count, 0)
+
+    def test_batch_refused_with_pending_changes(self):
+        """Test that an applied batch never commits earlier pending changes"""
+        self.request("set_position", device=self.names[2], x=10, y=1080)
+
+        response = self.request(
+            "batch",
+            operations=[
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[1], "x": 1920, "y": -10},
+                }
+            ],
+        )
+
+        self.assertEqual(response["error"]["code"], INVALID_REQUEST)
+        self.assertEqual(
+            self.config.pending_changes, {self.names[2]: {"x": 10, "y": 1080}}
+        )
+        self.assertEqual(self.backend.calls["test"], 0)
+        self.assertEqual(self.backend.reset_count, 0)
+
+    def test_batch_rollback_keeps_mode_changes(self):
+        """Test that a failed batch restores queued resolution changes"""
+        self.request("set_mode", device=self.names[2], width=1280, height=720)
+        pending = self.config.pending_changes[self.names[2]].copy()
+
+        response = self.request(
+            "batch",
+            operations=[
+                {
+                    "method": "set_mode",
+                    "params": {"device": self.names[2], "width": 1600, "height": 900},
+                },
+                {"method": "apply"},
+            ],
+            apply=False,
+        )
+
+        self.assertEqual(response["error"]["code"], INVALID_PARAMS)
+        self.assertEqual(self.config.pending_changes, {self.names[2]: pending})
+        self.assertEqual(self.config.snapshot()[self.names[2]]["width"], 1280)
+
+    def test_batch_rolls_back_invalid_layout(self):
+        """Test that an overlapping batch is not applied"""
+        response = self.request(
+            "batch",
+            operations=[
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[1], "x": 100, "y": 0},
+                }
+            ],
+        )
+
+        self.assertEqual(response["error"]["code"], APPLY_FAILED)
+        self.assertEqual(self.config.pending_changes, {})
+        self.assertEqual(self.backend.reset_count, 0)
+
+    def test_batch_restores_layout_after_driver_failure(self):
+        """Test that devices moved by a failed batch are moved back"""
+        self.backend.result_codes[self.names[2]] = DISP_CHANGE_BADMODE
+        self.backend.test_codes[self.names[2]] = 0  # Passes the preflight check
+
+        response = self.request(
+            "batch",
+            operations=[
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[1], "x": 1920, "y": -10},
+                },
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[2], "x": 10, "y": 1080},
+                },
+            ],
+        )
+
+        self.assertEqual(response["error"]["code"], APPLY_FAILED)
+        self.assertEqual(
+            response["error"]["data"],
+            {self.names[1]: 0, self.names[2]: DISP_CHANGE_BADMODE},
+        )
+        self.assertEqual(self.backend.devices[self.names[1]].dmPositionY, 0)
+        self.assertEqual(self.backend.devices[self.names[1]].dmPositionX, 1920)
+        self.assertEqual(self.config.pending_changes, {})
+
+    def test_batch_rejected_by_preflight(self):
+        """Test that a batch the driver rejects is never staged"""
+        self.backend.test_codes[self.names[2]] = DISP_CHANGE_BADMODE
+        self.request("set_position", device=self.names[2], x=10, y=1080)
+        self.assertEqual(
+            self.request("test")["result"], {self.names[2]: DISP_CHANGE_BADMODE}
+        )
+        self.request("discard")
+
+        response = self.request(
+            "batch",
+            operations=[
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[1], "x": 1920, "y": -10},
+                },
+                {
+                    "method": "set_position",
+                    "params": {"device": self.names[2], "x": 10, "y": 1080},
+                },
+            ],
+        )
+
+        self.assertEqual(response["error"]["code"], APPLY_FAILED)
+        self.assertEqual(
+            response["error"]["data"],
+            {self.names[1]: 0, self.names[2]: DISP_CHANGE_BADMODE},
+        )
+        self.assertEqual(self.backend.calls["stage"], 0)
+        self.assertEqual(self.backend.reset_count, 0)
+        self.assertEqual(self.config.pending_changes, {})
+
+
+@unittest.skipIf(sys.platform == "win32", "Unix domain sockets only")
+class TestIpcServerSocket(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.address = os.path.join(self.temp_dir.name, "layout.sock")
+        self.backend = SimulatedBackend(count=2)
+        self.server = IpcServer(DisplayConfig(self.backend), self.address)
+        self.server.start()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.close()
+        self.thread.join(2)
+        self.temp_dir.cleanup()
+
+    def test_client_round_trip(self):
+        """Test calls over a real connection, keeping state between them"""
+        with IpcClient(self.address) as client:
+            displays = client.call("enumerate")
+            name = displays[1]["name"]
+            client.call("set_position", device=name, x=-1920, y=0)
+            results = client.call("apply")
+
+            with self.assertRaises(IpcError) as raised:
+                client.call("set_position", device="nope", x=0, y=0)
+
+        self.assertEqual(results, {name: 0})
+        self.assertEqual(raised.exception.code, INVALID_PARAMS)
+        self.assertEqual(self.backend.devices[name].dmPositionX, -1920)
+
+    def test_close_stops_server(self):
+        """Test that closing makes serve_forever return"""
+        self.server.close()
+        self.thread.join(2)
+        self.assertFalse(self.thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import tracemalloc
+import unittest
+from src.display_backend import SimulatedBackend
+from src.display_config import DisplayConfig
+from src.layout_model import LayoutModel
+
+
+class TestLayoutModel(unittest.TestCase):
+    def setUp(self):
+        self.model = LayoutModel()
+        self.model.set_display("LEFT", 0, 0, 1920, 1080, is_primary=True)
+        self.model.set_display("RIGHT", 1920, 0, 2560, 1440, 1, 144)
+
+    def test_views_match_display_info(self):
+        """Test that rows read like get_display_info dictionaries"""
+        self.assertEqual(
+            dict(self.model["RIGHT"]),
+            {
+                "name": "RIGHT",
+                "x": 1920,
+                "y": 0,
+                "width": 2560,
+                "height": 1440,
+                "orientation": 1,
+                "refresh_rate": 144,
+                "is_primary": False,
+            },
+        )
+        self.assertTrue(self.model["LEFT"]["is_primary"])
+        self.assertIs(self.model["LEFT"], self.model["LEFT"])
+        self.assertIsNone(self.model["LEFT"].get("missing"))
+        self.assertEqual(list(self.model), ["LEFT", "RIGHT"])
+
+    def test_overwrite_keeps_order(self):
+        """Test that updating a display keeps its row"""
+        self.model.set_display("LEFT", -1920, 0, 1920, 1080)
+        self.model.set_position("RIGHT", 0, 10)
+
+        self.assertEqual(list(self.model), ["LEFT", "RIGHT"])
+        self.assertEqual(self.model["LEFT"]["x"], -1920)
+        self.assertEqual(self.model["RIGHT"]["y"], 10)
+
+    def test_rects_and_bounds(self):
+        """Test batch geometry queries"""
+        self.assertEqual(
+            self.model.rects(),
+            {"LEFT": (0, 0, 1920, 1080), "RIGHT": (1920, 0, 4480, 1440)},
+        )
+        self.assertEqual(self.model.bounds(), (0, 0, 4480, 1440))
+        self.assertIsNone(LayoutModel().bounds())
+
+    def test_translate(self):
+        """Test moving every display at once"""
+        self.model.translate(100, -50)
+        self.assertEqual(self.model.bounds(), (100, -50, 4580, 1390))
+
+    def test_arrange(self):
+        """Test the arrangement passes"""
+        self.assertEqual(
+            self.model.arrange_horizontal(), {"LEFT": (0, 0), "RIGHT": (1920, 0)}
+        )
+        self.assertEqual(
+            self.model.arrange_vertical(), {"LEFT": (0, 0), "RIGHT": (0, 1080)}
+        )
+        self.assertEqual(LayoutModel().arrange_horizontal(), {})
+
+    def test_freeze(self):
+        """Test that frozen copies are independent and read-only"""
+        frozen = self.model.freeze()
+        self.model.set_position("LEFT", 500, 500)
+
+        self.assertEqual(frozen["LEFT"]["x"], 0)
+        with self.assertRaises(TypeError):
+            frozen.set_position("LEFT", 1, 1)
+        with self.assertRaises(TypeError):
+            frozen["LEFT"]["x"] = 1
+
+
+class TestLayoutModelWall(unittest.TestCase):
+    def test_snapshot_allocations_flat(self):
+        """Test that snapshots of a 256 output wall do not grow per display"""
+        config = DisplayConfig(SimulatedBackend(count=256))
+        names = list(config.displays)
+        config.snapshot()
+
+        tracemalloc.start()
+        for i in range(10):
+            config.set_position(names[0], i, 0)
+            layout = config.snapshot()
+            layout.rects()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # One frozen copy is a handful of arrays, not 256 dictionaries
+        self.assertLess(current, 64 * 1024)
+        self.assertEqual(layout[names[0]]["x"], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
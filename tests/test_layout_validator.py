@@ -0,0 +1,119 @@
+import time
+import unittest
+from src.layout_validator import describe_problems, validate_layout
+from tests.test_helpers import create_mock_display
+
+
+def layout(*displays):
+    return {display["name"]: display for display in displays}
+
+
+class TestLayoutValidator(unittest.TestCase):
+    def test_valid_side_by_side(self):
+        """Test that adjacent displays are valid"""
+        report = validate_layout(
+            layout(
+                create_mock_display("A"),
+                create_mock_display("B", x=1920),
+                create_mock_display("C", x=0, y=1080),
+            )
+        )
+
+        self.assertTrue(report["valid"])
+        self.assertEqual(report["overlaps"], [])
+        self.assertEqual(report["gaps"], [])
+        self.assertEqual(len(report["islands"]), 1)
+
+    def test_overlap(self):
+        """Test that overlapping displays are reported with their overlap"""
+        report = validate_layout(
+            layout(create_mock_display("A"), create_mock_display("B", x=1900, y=100))
+        )
+
+        self.assertFalse(report["valid"])
+        self.assertEqual(
+            report["overlaps"],
+            [{"displays": ("A", "B"), "rect": (1900, 100, 1920, 1080)}],
+        )
+
+    def test_one_pixel_gap(self):
+        """Test that a small gap is reported and splits the layout"""
+        report = validate_layout(
+            layout(create_mock_display("A"), create_mock_display("B", x=1921))
+        )
+
+        self.assertFalse(report["valid"])
+        self.assertEqual(len(report["gaps"]), 1)
+        self.assertEqual(report["gaps"][0]["axis"], "x")
+        self.assertEqual(report["gaps"][0]["distance"], 1)
+        self.assertEqual(report["gaps"][0]["rect"], (1920, 0, 1921, 1080))
+        self.assertEqual(sorted(map(sorted, report["islands"])), [["A"], ["B"]])
+
+    def test_vertical_gap(self):
+        """Test a gap between stacked displays"""
+        report = validate_layout(
+            layout(create_mock_display("A"), create_mock_display("B", y=1082))
+        )
+
+        self.assertEqual(report["gaps"][0]["axis"], "y")
+        self.assertEqual(report["gaps"][0]["distance"], 2)
+
+    def test_corner_contact_is_disconnected(self):
+        """Test that displays touching only at a corner form two islands"""
+        report = validate_layout(
+            layout(create_mock_display("A"), create_mock_display("B", x=1920, y=1080))
+        )
+
+        self.assertFalse(report["valid"])
+        self.assertEqual(len(report["islands"]), 2)
+
+    def test_far_island(self):
+        """Test an island far away from the rest of the layout"""
+        report = validate_layout(
+            layout(
+                create_mock_display("A"),
+                create_mock_display("B", x=1920),
+                create_mock_display("C", x=10000),
+            )
+        )
+
+        self.assertFalse(report["valid"])
+        self.assertEqual(report["gaps"], [])
+        self.assertEqual(len(report["islands"]), 2)
+        self.assertIn("Displays form 2 disconnected groups", describe_problems(report))
+
+    def test_large_wall(self):
+        """Test a 16x16 wall of displays"""
+        displays = layout(
+            *(
+                create_mock_display(f"D{i}", x=(i % 16) * 1920, y=(i // 16) * 1080)
+                for i in range(256)
+            )
+        )
+
+        self.assertTrue(validate_layout(displays)["valid"])
+
+        displays["D17"] = dict(displays["D17"], x=displays["D17"]["x"] + 5)
+        report = validate_layout(displays)
+        self.assertFalse(report["valid"])
+        self.assertEqual(report["overlaps"][0]["displays"], ("D17", "D18"))
+
+
+    def test_tall_column(self):
+        """Test a vertical stack, where every display shares the sweep"""
+        displays = layout(
+            *(create_mock_display(f"D{i}", y=i * 1080) for i in range(1024))
+        )
+
+        start = time.perf_counter()
+        self.assertTrue(validate_layout(displays)["valid"])
+        self.assertLess(time.perf_counter() - start, 0.25)
+
+        displays["D500"] = dict(displays["D500"], y=displays["D500"]["y"] + 10)
+        report = validate_layout(displays)
+        self.assertEqual(report["overlaps"][0]["displays"], ("D500", "D501"))
+        self.assertEqual(report["gaps"][0]["displays"], ("D499", "D500"))
+
+
+if __name__ == "__main__":
+    unittest.main()
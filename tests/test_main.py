@@ -1,8 +1,15 @@
+import os
+import tempfile
+import time
 import unittest
 from unittest.mock import patch, MagicMock
+import tkinter as tk
 import win32api
 import win32con
-from src.main import DisplayManager
+from src.display_backend import SimulatedBackend
+from src.profiles import ProfileStore
+from src.main import DisplayManager, DisplayMatrixEditor, StartupProbe
+from tests.test_helpers import create_mock_display
 
 
 class MockTkVariable:
@@ -73,6 +80,14 @@ class TestDisplayManager(unittest.TestCase):
         self.mock_device = MagicMock()
         self.mock_device.DeviceName = self.display_name
         self.mock_device.StateFlags = win32con.DISPLAY_DEVICE_ATTACHED_TO_DESKTOP
+        # Keep the user's real profiles out of the tests
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.profile_store = ProfileStore(
+            os.path.join(self.temp_dir.name, "profiles.json")
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
 
     @patch("tkinter.Tk")
     @patch("tkinter.ttk.PanedWindow")
@@ -93,6 +108,7 @@ class TestDisplayManager(unittest.TestCase):
         mock_frame,
         mock_paned,
         mock_tk,
+        **kwargs,
     ):
         # Setup root window mock
         root = MagicMock()
@@ -131,7 +147,8 @@ class TestDisplayManager(unittest.TestCase):
             mock_enum_settings.return_value = 1
 
             # Create manager
-            manager = DisplayManager()
+            kwargs.setdefault("profile_store", self.profile_store)
+            manager = DisplayManager(**kwargs)
             return manager, mock_enum_devices, mock_enum_settings
 
     def test_setup_ui(self, *mocks):
@@ -209,6 +226,24 @@ class TestDisplayManager(unittest.TestCase):
         manager.apply_changes()
         mock_error.assert_called_with("Error", "Failed to update display settings")
 
+    @patch("ctypes.windll.user32.ChangeDisplaySettingsExW")
+    @patch("tkinter.messagebox.showinfo")
+    def test_apply_changes_nothing_to_apply(
+        self, mock_info, mock_change_settings, *mocks
+    ):
+        """Test applying a layout that matches the current settings"""
+        manager, _, _ = self.create_manager_with_mocks(*mocks)
+
+        # Queue the position the display already has
+        manager.display_list.set(self.display_name)
+        manager.x_var.set("0")
+        manager.y_var.set("0")
+        manager.update_position()
+
+        manager.apply_changes()
+        mock_info.assert_called_with("No Changes", "Nothing to apply")
+        mock_change_settings.assert_not_called()
+
     def test_discard_changes(self, *mocks):
         """Test discarding changes"""
         manager, _, _ = self.create_manager_with_mocks(*mocks)
@@ -246,6 +281,183 @@ class TestDisplayManager(unittest.TestCase):
         self.assertTrue(isinstance(manager.canvas.displays, dict))
         self.assertIn(self.display_name, manager.canvas.displays)
 
+    def test_on_matrix_change(self, *mocks):
+        """Test that a committed matrix edit updates one display"""
+        manager, _, _ = self.create_manager_with_mocks(*mocks)
+        manager.refresh_preview()
+
+        with patch.object(manager, "refresh_preview") as mock_refresh:
+            manager.on_matrix_change(self.display_name, "x", 100)
+            mock_refresh.assert_not_called()
+
+        changes = manager.display_config.pending_changes[self.display_name]
+        self.assertEqual(changes, {"x": 100, "y": 0})
+        self.assertEqual(manager.canvas.displays[self.display_name]["x"], 100)
+        self.assertEqual(manager.x_var.get(), "100")
+
+    def test_hidden_preview_updated_on_tab_change(self, *mocks):
+        """Test that only the visible preview is redrawn until tabs change"""
+        manager, _, _ = self.create_manager_with_mocks(*mocks)
+        manager.matrix_canvas.displays = {}
+        manager.refresh_preview()
+
+        self.assertIn(self.display_name, manager.canvas.displays)
+        self.assertEqual(manager.matrix_canvas.displays, {})
+
+        with patch.object(manager, "notebook") as mock_notebook:
+            mock_notebook.index.return_value = 1
+            manager.on_tab_changed()
+
+        self.assertIn(self.display_name, manager.matrix_canvas.displays)
+        self.assertNotIn(manager.matrix_canvas, manager.dirty_canvases)
+
+    def test_apply_profile(self, *mocks):
+        """Test switching to a saved profile"""
+        manager, _, _ = self.create_manager_with_mocks(*mocks)
+        manager.profile_store = MagicMock()
+        manager.profile_store.apply_profile.return_value = {self.display_name: 0}
+        manager.profile_list.get = MagicMock(return_value="docked")
+
+        with patch("tkinter.messagebox.showerror") as mock_error:
+            manager.apply_profile()
+            mock_error.assert_not_called()
+
+        manager.profile_store.apply_profile.assert_called_once_with(
+            "docked", manager.display_config
+        )
+
+    @patch("tkinter.messagebox.showerror")
+    def test_apply_profile_other_monitors(self, mock_error, *mocks):
+        """Test that profiles for other monitors are reported"""
+        manager, _, _ = self.create_manager_with_mocks(*mocks)
+        manager.profile_store = MagicMock()
+        manager.profile_store.apply_profile.side_effect = ValueError
+        manager.profile_store.profiles_for.return_value = []
+        manager.profile_list.get = MagicMock(return_value="docked")
+
+        manager.apply_profile()
+
+        mock_error.assert_called_once()
+
+    def test_update_resolution(self, *mocks):
+        """Test queueing a resolution and refresh rate from the mode lists"""
+        backend = SimulatedBackend(count=2, refresh_rate=144)
+        manager, _, _ = self.create_manager_with_mocks(*mocks, backend=backend)
+
+        manager.update_mode_choices()
+        manager.resolution_var.set("1280x720")
+        manager.update_resolution()
+
+        changes = manager.display_config.pending_changes[self.display_name]
+        self.assertEqual((changes["width"], changes["height"]), (1280, 720))
+        self.assertEqual(manager.refresh_var.get(), "144")
+
+        manager.refresh_var.set("60")
+        manager.update_refresh_rate()
+        self.assertEqual(changes["refresh_rate"], 60)
+
+    def test_background_enumeration(self, *mocks):
+        """Test that displays are loaded after the window is built"""
+        backend = SimulatedBackend(count=2)
+        manager, _, _ = self.create_manager_with_mocks(
+            *mocks, backend=backend, background=True
+        )
+        self.assertEqual(manager.display_config.displays, {})
+
+        manager.enumeration_thread.join()
+        manager.poll_enumeration()
+
+        self.assertEqual(len(manager.display_config.displays), 2)
+        self.assertEqual(len(manager.canvas.displays), 2)
+        self.assertIn("interactive", manager.startup.marks)
+
+    def test_background_apply(self, *mocks):
+        """Test that applying runs on a worker and queues new edits"""
+        backend = SimulatedBackend(count=2)
+        manager, _, _ = self.create_manager_with_mocks(
+            *mocks, backend=backend, background=True
+        )
+        manager.enumeration_thread.join()
+        manager.poll_enumeration()
+        first, second = list(manager.display_config.displays)
+
+        manager.display_config.set_position(second, 1920, -10)
+        manager.apply_changes()
+        self.assertTrue(manager.display_config.committing)
+        manager.apply_buttons[0].state.assert_called_with(["disabled"])
+
+        manager.display_config.set_position(first, 0, 10)
+        manager.apply_future.result()
+        manager.poll_apply()
+
+        self.assertFalse(manager.display_config.committing)
+        self.assertEqual(backend.devices[second].dmPositionY, -10)
+        self.assertEqual(
+            manager.display_config.pending_changes, {first: {"x": 0, "y": 10}}
+        )
+        self.assertEqual(manager.status_var.get(), "Display settings updated")
+        manager.apply_buttons[0].state.assert_called_with(["!disabled"])
+
+    def test_background_apply_profile(self, *mocks):
+        """Test that switching profiles commits on the worker"""
+        backend = SimulatedBackend(count=2)
+        manager, _, _ = self.create_manager_with_mocks(
+            *mocks, backend=backend, background=True
+        )
+        manager.enumeration_thread.join()
+        manager.poll_enumeration()
+        second = list(manager.display_config.displays)[1]
+        manager.display_config.set_position(second, -1920, 0)
+        manager.profile_store.save_profile("left", manager.display_config)
+        manager.display_config.discard_changes()
+        manager.profile_list.get = MagicMock(return_value="left")
+
+        manager.apply_profile()
+        self.assertTrue(manager.display_config.committing)
+        manager.apply_future.result()
+        manager.poll_apply()
+
+        self.assertFalse(manager.display_config.committing)
+        self.assertEqual(backend.devices[second].dmPositionX, -1920)
+        self.assertEqual(manager.status_var.get(), "Display settings updated")
+
+    def test_startup_probe(self, *mocks):
+        """Test that the probe reports once both milestones are reached"""
+        on_interactive = MagicMock()
+        probe = StartupProbe(on_interactive)
+        manager, _, _ = self.create_manager_with_mocks(*mocks, startup_probe=probe)
+
+        manager.on_first_paint()
+
+        on_interactive.assert_called_once_with(probe)
+        self.assertLessEqual(probe.marks["first_paint"], probe.marks["interactive"])
+
+    def test_startup_probe_enumeration_error(self, *mocks):
+        """Test that the probe still reports when enumeration fails"""
+        on_interactive = MagicMock()
+        probe = StartupProbe(on_interactive)
+        backend = SimulatedBackend(count=2)
+        manager, _, _ = self.create_manager_with_mocks(
+            *mocks, backend=backend, background=True, startup_probe=probe
+        )
+        manager.enumeration_thread.join()
+        manager.enumeration_results.get_nowait()
+        manager.enumeration_results.put(RuntimeError("driver gone"))
+
+        with patch("tkinter.messagebox.showerror") as mock_error:
+            manager.poll_enumeration()
+
+        on_interactive.assert_called_once_with(probe)
+        self.assertEqual(probe.error, "driver gone")
+        self.assertNotIn("interactive", probe.marks)
+        mock_error.assert_not_called()
+
+    def test_startup_probe_start(self, *mocks):
+        """Test that the probe can be timed from an earlier clock reading"""
+        probe = StartupProbe(start=time.perf_counter() - 10)
+        probe.mark("first_paint")
+        self.assertGreaterEqual(probe.marks["first_paint"], 10)
+
     def test_display_selection(self, *mocks):
         """Test display selection handling"""
         manager, _, _ = self.create_manager_with_mocks(*mocks)
@@ -284,5 +496,94 @@ class TestDisplayManager(unittest.TestCase):
             mock_discard.assert_called_once()
 
 
+class TestDisplayMatrixEditor(unittest.TestCase):
+    def setUp(self):
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.on_change = MagicMock()
+        self.editor = DisplayMatrixEditor(self.root, self.on_change)
+        self.displays = {
+            f"DISPLAY{i}": create_mock_display(f"DISPLAY{i}", x=i * 1920)
+            for i in range(100)
+        }
+
+    def tearDown(self):
+        self.root.destroy()
+
+    def test_update_displays_inserts_rows(self):
+        """Test that every display gets a row"""
+        self.editor.update_displays(self.displays)
+
+        self.assertEqual(len(self.editor.tree.get_children()), 100)
+        self.assertEqual(self.editor.tree.set("DISPLAY5", "x"), str(5 * 1920))
+
+    def test_update_displays_touches_only_dirty_rows(self):
+        """Test that a refresh only updates the rows that changed"""
+        self.editor.update_displays(self.displays)
+        children = self.editor.tree.get_children()
+
+        changed = dict(self.displays)
+        changed["DISPLAY7"] = dict(self.displays["DISPLAY7"], y=1080)
+        with patch.object(
+            self.editor.tree, "item", wraps=self.editor.tree.item
+        ) as mock_item:
+            self.editor.update_displays(changed)
+            mock_item.assert_called_once()
+
+        self.assertEqual(self.editor.tree.get_children(), children)
+        self.assertEqual(self.editor.tree.set("DISPLAY7", "y"), "1080")
+
+    def test_update_displays_removes_rows(self):
+        """Test that rows of disconnected displays are removed"""
+        self.editor.update_displays(self.displays)
+        self.editor.update_displays({"DISPLAY1": self.displays["DISPLAY1"]})
+
+        self.assertEqual(self.editor.tree.get_children(), ("DISPLAY1",))
+
+    def test_set_position(self):
+        """Test showing a position moved elsewhere"""
+        self.editor.update_displays(self.displays)
+        self.editor.set_position("DISPLAY3", 10, 20)
+
+        self.assertEqual(self.editor.get_positions()["DISPLAY3"], {"x": 10, "y": 20})
+
+    def test_typing_is_debounced(self):
+        """Test that keystrokes are committed once typing pauses"""
+        self.editor.update_displays(self.displays)
+        self.editor._editing = ("DISPLAY2", "x")
+        self.editor._committed_value = "3840"
+
+        for text in ("-", "-1", "-19", "-192", "-1920"):
+            self.editor.edit_var.set(text)
+            self.editor.on_edit_key()
+        self.on_change.assert_not_called()
+
+        self.editor.commit_edit()
+        self.on_change.assert_called_once_with("DISPLAY2", "x", -1920)
+
+        # Closing the editor without further typing does not commit again
+        self.editor.finish_edit()
+        self.on_change.assert_called_once()
+
+    def test_finish_edit_commits_value(self):
+        """Test committing an edited cell"""
+        self.editor.update_displays(self.displays)
+        self.editor._editing = ("DISPLAY2", "y")
+        self.editor.edit_var.set("-1080")
+
+        self.editor.finish_edit()
+
+        self.on_change.assert_called_with("DISPLAY2", "y", -1080)
+        self.assertIsNone(self.editor._editing)
+
+    def test_escape_stays_in_editor(self):
+        """Test that Escape in a cell does not reach the window bindings"""
+        self.editor._editing = ("DISPLAY2", "y")
+
+        self.assertEqual(self.editor.on_edit_escape(), "break")
+        self.assertIsNone(self.editor._editing)
+        self.assertEqual(self.editor.on_edit_return(), "break")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from src.display_backend import DISP_CHANGE_BADPARAM, SimulatedBackend
+from src.display_config import DisplayConfig
+from src.profiles import ProfileStore, config_fingerprint, fingerprint
+
+
+class TestProfileStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "profiles.json")
+        self.backend = SimulatedBackend(count=2)
+        self.config = DisplayConfig(self.backend)
+        self.names = list(self.config.displays)
+        self.store = ProfileStore(self.path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_fingerprint_ignores_positions(self):
+        """Test that moving monitors keeps the fingerprint"""
+        before = fingerprint(self.config.snapshot())
+        self.config.set_position(self.names[1], -1920, 0)
+        self.assertEqual(fingerprint(self.config.snapshot()), before)
+
+        self.backend.connect("\\\\.\\DISPLAY3", 3840, 0)
+        self.config.enumerate_displays()
+        self.assertNotEqual(fingerprint(self.config.snapshot()), before)
+
+    def test_fingerprint_ignores_pending_modes(self):
+        """Test that a queued resolution change keeps profiles matching"""
+        before = config_fingerprint(self.config)
+        self.store.save_profile("docked", self.config)
+        self.config.set_mode(self.names[1], 1280, 720)
+
+        self.assertEqual(config_fingerprint(self.config), before)
+        self.assertEqual(self.store.profiles_for(self.config), ["docked"])
+        self.assertEqual(self.store.apply_profile("docked", self.config), {})
+
+    def test_save_and_reload(self):
+        """Test that profiles survive a new store"""
+        self.store.save_profile("docked", self.config)
+
+        store = ProfileStore(self.path)
+        self.assertEqual(store.profiles_for(self.config), ["docked"])
+        self.assertEqual(
+            store.profiles["docked"]["displays"][self.names[1]],
+            {"x": 1920, "y": 0, "orientation": 0},
+        )
+
+    def test_corrupt_file(self):
+        """Test that an unreadable profiles file leaves the store empty"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"docked": {"fingerprint"')
+
+        store = ProfileStore(self.path)
+
+        self.assertEqual(store.profiles, {})
+        self.assertIn(self.path, store.load_error)
+        self.assertEqual(store.profiles_for(self.config), [])
+
+        store.save_profile("docked", self.config)
+        store.load()
+        self.assertIsNone(store.load_error)
+        self.assertEqual(list(store.profiles), ["docked"])
+
+    def test_apply_profile_single_commit(self):
+        """Test that switching profiles resets the mode once"""
+        self.config.set_position(self.names[1], -1920, 0)
+        self.store.save_profile("left", self.config)
+        self.config.discard_changes()
+
+        results = self.store.apply_profile("left", self.config)
+
+        self.assertEqual(results, {self.names[1]: 0})
+        self.assertEqual(self.backend.reset_count, 1)
+        self.assertEqual(self.config.snapshot()[self.names[1]]["x"], -1920)
+
+        # Already in place, nothing to commit
+        self.assertEqual(self.store.apply_profile("left", self.config), {})
+        self.assertEqual(self.backend.reset_count, 1)
+
+    def test_queue_profile(self):
+        """Test that queueing a profile replaces pending changes without a commit"""
+        self.config.set_position(self.names[1], -1920, 0)
+        self.store.save_profile("left", self.config)
+        self.config.set_position(self.names[0], 0, 50)
+
+        self.store.queue_profile("left", self.config)
+
+        self.assertEqual(self.backend.reset_count, 0)
+        self.assertEqual(self.config.plan_changes(), {self.names[1]: {"x": -1920}})
+
+    def test_apply_profile_other_monitors(self):
+        """Test that profiles for another monitor set are refused"""
+        self.store.save_profile("docked", self.config)
+        self.backend.disconnect(self.names[1])
+        self.config.enumerate_displays()
+
+        self.assertEqual(self.store.profiles_for(self.config), [])
+        with self.assertRaises(ValueError):
+            self.store.apply_profile("docked", self.config)
+        with self.assertRaises(KeyError):
+            self.store.apply_profile("missing", self.config)
+
+    def test_apply_invalid_profile(self):
+        """Test that an overlapping profile is rejected before the driver"""
+        self.config.set_position(self.names[1], 100, 0)
+        self.store.save_profile("overlap", self.config)
+        self.config.discard_changes()
+
+        results = self.store.apply_profile("overlap", self.config)
+
+        self.assertEqual(results, {self.names[1]: DISP_CHANGE_BADPARAM})
+        self.assertEqual(self.backend.reset_count, 0)
+
+    def test_delete_profile(self):
+        """Test removing a profile"""
+        self.store.save_profile("docked", self.config)
+        self.store.delete_profile("docked")
+
+        self.assertEqual(ProfileStore(self.path).profiles, {})
+        self.assertEqual(self.store.profiles_for(self.config), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
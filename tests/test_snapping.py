@@ -0,0 +1,68 @@
+import unittest
+from src.snapping import SnapEngine
+
+
+class TestSnapEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = SnapEngine(tolerance=10)
+        self.engine.update(
+            {
+                "LEFT": (0, 0, 1920, 1080),
+                "RIGHT": (1920, 0, 3840, 1080),
+                "MOVING": (5000, 5000, 6920, 6080),
+            }
+        )
+
+    def test_snap_left_edge(self):
+        """Test snapping the left edge to a neighbour's right edge"""
+        self.assertEqual(self.engine.snap_x("MOVING", 3843, 1920), 3840)
+        self.assertEqual(self.engine.snap_x("MOVING", 3836, 1920), 3840)
+
+    def test_snap_right_edge(self):
+        """Test snapping the right edge to a neighbour's left edge"""
+        self.assertEqual(self.engine.snap_x("MOVING", -1925, 1920), -1920)
+
+    def test_out_of_tolerance(self):
+        """Test that positions far from any edge are left alone"""
+        self.assertEqual(self.engine.snap_x("MOVING", 3900, 1920), 3900)
+        self.assertEqual(self.engine.snap_x("MOVING", 3851, 1920, tolerance=10), 3851)
+
+    def test_own_edges_ignored(self):
+        """Test that a display does not snap to its own edges"""
+        self.assertEqual(self.engine.snap_x("MOVING", 5003, 1920), 5003)
+        self.assertEqual(self.engine.snap_x("LEFT", 1, 1800), 1)
+
+    def test_snap_both_axes(self):
+        """Test closing a 1-pixel gap on both axes"""
+        self.assertEqual(
+            self.engine.snap("MOVING", 3841, 1079, 1920, 1080), (3840, 1080)
+        )
+
+    def test_move_updates_edges(self):
+        """Test incrementally moving a display's edges"""
+        self.engine.move("RIGHT", (1920, 0, 3840, 1080), (0, 1080, 1920, 2160))
+
+        self.assertEqual(self.engine.snap_x("MOVING", 3845, 1920), 3845)
+        self.assertEqual(self.engine.snap_y("MOVING", 2165, 1080), 2160)
+
+    def test_large_wall(self):
+        """Test snapping against 64 displays"""
+        rects = {
+            f"D{i}": (
+                (i % 8) * 1920,
+                (i // 8) * 1080,
+                (i % 8 + 1) * 1920,
+                (i // 8 + 1) * 1080,
+            )
+            for i in range(64)
+        }
+        self.engine.update(rects)
+
+        self.assertEqual(
+            self.engine.snap("NEW", 8 * 1920 + 4, 3 * 1080 - 6, 1920, 1080),
+            (8 * 1920, 3 * 1080),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
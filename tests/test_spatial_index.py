@@ -0,0 +1,66 @@
+import unittest
+from src.spatial_index import SpatialIndex
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SpatialIndex(cell_size=1000)
+        self.index.insert("LEFT", (0, 0, 1920, 1080))
+        self.index.insert("RIGHT", (1920, 0, 3840, 1080))
+
+    def test_query_point(self):
+        """Test point queries inside, between and outside rectangles"""
+        self.assertEqual(self.index.query_point(10, 10), ["LEFT"])
+        self.assertEqual(self.index.query_point(1920, 500), ["RIGHT"])
+        self.assertEqual(self.index.query_point(1919.5, 500), ["LEFT"])
+        self.assertEqual(self.index.query_point(500, 1080), [])
+        self.assertEqual(self.index.query_point(-1, -1), [])
+
+    def test_query_point_overlap_order(self):
+        """Test that overlapping hits are returned in insertion order"""
+        self.index.insert("TOP", (100, 100, 500, 500))
+        self.assertEqual(self.index.query_point(200, 200), ["LEFT", "TOP"])
+
+    def test_query_rect(self):
+        """Test rectangle queries"""
+        self.assertEqual(
+            self.index.query_rect((1000, 100, 2000, 200)), ["LEFT", "RIGHT"]
+        )
+        self.assertEqual(self.index.query_rect((2000, 100, 2100, 200)), ["RIGHT"])
+        self.assertEqual(self.index.query_rect((0, 1080, 4000, 2000)), [])
+
+    def test_query_rect_larger_than_index(self):
+        """Test a query covering far more cells than are occupied"""
+        hits = self.index.query_rect((-1e6, -1e6, 1e6, 1e6))
+        self.assertEqual(hits, ["LEFT", "RIGHT"])
+
+    def test_remove_and_replace(self):
+        """Test removing and re-inserting a rectangle"""
+        self.index.remove("LEFT")
+        self.assertEqual(self.index.query_point(10, 10), [])
+        self.assertNotIn("LEFT", self.index)
+
+        self.index.insert("RIGHT", (0, 0, 100, 100))
+        self.assertEqual(self.index.query_point(10, 10), ["RIGHT"])
+        self.assertEqual(self.index.query_point(2000, 10), [])
+        self.assertEqual(len(self.index), 1)
+
+    def test_rebuild_large_wall(self):
+        """Test hit-testing a 16x16 wall"""
+        rects = {
+            f"D{i}": (
+                (i % 16) * 1920,
+                (i // 16) * 1080,
+                (i % 16 + 1) * 1920,
+                (i // 16 + 1) * 1080,
+            )
+            for i in range(256)
+        }
+        self.index.rebuild(rects)
+
+        self.assertEqual(self.index.query_point(1920 * 5 + 1, 1080 * 7 + 1), ["D117"])
+        self.assertEqual(len(self.index.query_rect((0, 0, 1920 * 2, 1080))), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()